@@ -1,21 +1,34 @@
-import sys, os, threading
+import sys, os, queue, threading, time
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import pandas as pd
-from backtest.engine import run_backtest_df
+from backtest.chunked import BacktestWorker
+from backtest.profiling import DetectorProfiler
 from core.config import DETECTORS_BY_LEVEL
+from data.ingest import load_in_background
 
 print("=== Iniciando app_tk.py ===")
 
+POLL_MS = 16  # ~60 fps: intervalo do polling das filas das threads de trabalho
+CHUNKS = {"Dia": "D", "Semana": "W", "Mês": "MS"}
+
 class SMCBacktestApp(tk.Tk):
     def __init__(self):
         print("  → Construindo janela principal")
         super().__init__()
         self.title("SMC Bot Backtest")
-        self.geometry("650x500")
+        self.geometry("650x700")
         self.file_path = None
+        self.df = None
+        self.df_path = None
+        self.profiler = None
+        # threads de trabalho nunca tocam no Tk: publicam em filas lidas por _poll
+        self.events = queue.Queue()
+        self.worker = None
+        self.load_cancel = None
+        self._polling = False
 
         # Cabeçalho de seleção de arquivo
         btn_frame = tk.Frame(self)
@@ -34,18 +47,53 @@ class SMCBacktestApp(tk.Tk):
             chk.pack(side="left", padx=5)
             self.level_vars[lvl] = var
 
-        # Botão de execução
-        self.run_btn = tk.Button(self, text="Rodar Backtest", command=self.on_run)
-        self.run_btn.pack(pady=10)
+        # Botões de execução / cancelamento e tamanho dos blocos
+        run_frame = tk.Frame(self)
+        run_frame.pack(pady=10)
+        self.run_btn = tk.Button(run_frame, text="Rodar Backtest", command=self.on_run)
+        self.run_btn.pack(side="left", padx=5)
+        self.cancel_btn = tk.Button(run_frame, text="Cancelar", command=self.on_cancel, state="disabled")
+        self.cancel_btn.pack(side="left", padx=5)
+        tk.Label(run_frame, text="Blocos:").pack(side="left", padx=(15, 2))
+        self.chunk = tk.StringVar(value="Semana")
+        ttk.Combobox(run_frame, textvariable=self.chunk, values=list(CHUNKS), state="readonly",
+                     width=8).pack(side="left")
 
         # Barra de progresso
-        self.progress = ttk.Progressbar(self, orient="horizontal", length=600, mode="determinate")
+        self.progress = ttk.Progressbar(self, orient="horizontal", length=600, mode="determinate", maximum=100)
         self.progress.pack(pady=5)
+        self.status = tk.Label(self, text="")
+        self.status.pack()
+
+        # CSV convertido para Parquet na primeira leitura (aberturas seguintes quase instantâneas)
+        self.to_parquet = tk.BooleanVar(value=True)
+        tk.Checkbutton(self, text="Converter CSV para Parquet", variable=self.to_parquet).pack()
+
+        # Perfil por detector (tempo, CPU, memória, tamanho da saída)
+        self.profile = tk.BooleanVar(value=False)
+        tk.Checkbutton(self, text="Medir tempo/memória por detector", variable=self.profile).pack()
 
         # Caixa de resultados
-        self.result_box = tk.Text(self, height=15)
+        self.result_box = tk.Text(self, height=12)
         self.result_box.pack(fill="both", expand=True, padx=5, pady=5)
 
+        # Tabela do perfil
+        profile_frame = tk.LabelFrame(self, text="Perfil dos detectores")
+        profile_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        columns = ("detector", "wall_s", "cpu_s", "peak_mb", "signals", "output_kb")
+        headings = ("Detector", "Tempo (s)", "CPU (s)", "Pico (MB)", "Sinais", "Saída (KB)")
+        self.profile_table = ttk.Treeview(profile_frame, columns=columns, show="headings", height=8)
+        for col, text in zip(columns, headings):
+            self.profile_table.heading(col, text=text)
+            self.profile_table.column(col, width=200 if col == "detector" else 80,
+                                      anchor="w" if col == "detector" else "e")
+        self.profile_table.pack(side="left", fill="both", expand=True)
+        scroll = ttk.Scrollbar(profile_frame, orient="vertical", command=self.profile_table.yview)
+        scroll.pack(side="right", fill="y")
+        self.profile_table.configure(yscrollcommand=scroll.set)
+        self.trace_btn = tk.Button(self, text="Exportar trace (JSON)", command=self.export_trace, state="disabled")
+        self.trace_btn.pack(pady=5)
+
     def load_file(self):
         fp = filedialog.askopenfilename(filetypes=[("CSV","*.csv"),("Parquet","*.parquet")])
         if fp:
@@ -58,17 +106,10 @@ class SMCBacktestApp(tk.Tk):
             return
 
         self.run_btn.config(state="disabled")
+        self.cancel_btn.config(state="normal")
         self.result_box.delete("1.0", tk.END)
-
-        try:
-            if self.file_path.lower().endswith(".csv"):
-                self.df = pd.read_csv(self.file_path, parse_dates=["datetime"], infer_datetime_format=True)
-            else:
-                self.df = pd.read_parquet(self.file_path)
-        except Exception as e:
-            messagebox.showerror("Erro ao ler arquivo", str(e))
-            self.run_btn.config(state="normal")
-            return
+        self.profile_table.delete(*self.profile_table.get_children())
+        self.trace_btn.config(state="disabled")
 
         # Monta lista de detectores
         self.detectors = []
@@ -76,25 +117,135 @@ class SMCBacktestApp(tk.Tk):
             if var.get():
                 self.detectors += DETECTORS_BY_LEVEL[lvl]
 
-        self.progress["maximum"] = len(self.detectors)
-        self.progress["value"] = 0
-
-        threading.Thread(target=self._threaded_backtest, daemon=True).start()
-
-    def _threaded_backtest(self):
-
-    # montamos a lista de detectores a partir do config
-    detectors = []
-    for lvl, var in self.level_vars.items():
-        if var.get():
-            detectors += DETECTORS_BY_LEVEL[lvl]
-
-    results = run_backtest_df(self.df, detectors, progress_callback=lambda v: self.after(0, lambda: self.progress.config(value=v * len(detectors)))
+        self._start_polling()
+        if self.df is not None and self.df_path == self.file_path:
+            self._start_backtest()
+            return
 
-    def _finish_backtest(self, results):
-        for name, cnt in results.items():
-            self.result_box.insert(tk.END, f"{name}: sinais = {cnt}\n")
+        # leitura em blocos numa thread; a janela continua respondendo
+        self.status.config(text="Lendo arquivo...")
+        self.progress["value"] = 0
+        self.load_cancel = threading.Event()
+        load_in_background(
+            self.file_path,
+            on_done=lambda df: self.events.put(("loaded", df)),
+            on_error=lambda e: self.events.put(("load_error", e)),
+            progress_callback=lambda v: self.events.put(("progress", v)),
+            cancel=self.load_cancel,
+            to_parquet=self.to_parquet.get(),
+        )
+
+    def on_cancel(self):
+        self.cancel_btn.config(state="disabled")
+        self.status.config(text="Cancelando...")
+        if self.load_cancel is not None:
+            self.load_cancel.set()
+        if self.worker is not None:
+            self.worker.cancel()
+
+    # ---- polling das filas (única ponte entre as threads e o Tk)
+
+    def _start_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        latest_chunk = None
+        while True:
+            try:
+                kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.progress["value"] = payload
+            elif kind == "loaded":
+                self._loaded(payload)
+            elif kind == "load_error":
+                cancelled = isinstance(payload, InterruptedError)
+                self._finish("Leitura cancelada" if cancelled else "", None if cancelled else payload,
+                             "Erro ao ler arquivo")
+        if self.worker is not None:
+            while True:
+                try:
+                    kind, payload = self.worker.messages.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "chunk":
+                    latest_chunk = payload  # só o último bloco desta volta vai para a tela
+                elif kind == "done":
+                    if latest_chunk is not None:
+                        self._show_partial(latest_chunk)
+                        latest_chunk = None
+                    self._finish_backtest(payload)
+                elif kind == "error":
+                    self._finish("", payload, "Erro no backtest")
+        if latest_chunk is not None:
+            self._show_partial(latest_chunk)
+        if self.worker is not None or self.load_cancel is not None:
+            self.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
+
+    # ---- etapas
+
+    def _loaded(self, df):
+        self.load_cancel = None
+        self.df = df
+        self.df_path = self.file_path
+        self._start_backtest()
+
+    def _start_backtest(self):
+        self.status.config(text=f"{len(self.df):,} candles — rodando detectores...")
+        self.progress["value"] = 0
+        self.profiler = DetectorProfiler() if self.profile.get() else None
+        self._started = time.perf_counter()
+        self.worker = BacktestWorker(self.df, self.detectors, chunk=CHUNKS[self.chunk.get()],
+                                     profiler=self.profiler).start()
+
+    def _show_partial(self, info):
+        self.progress["value"] = int(info["done"] / info["total"] * 100)
+        rate = info["bars"] / max(time.perf_counter() - self._started, 1e-9)
+        self.status.config(text=f"Bloco {info['done']}/{info['total']} — {info['bars']:,} de "
+                                f"{len(self.df):,} candles ({rate:,.0f} candles/s)")
+        self._show_totals(info["totals"])
+
+    def _show_totals(self, totals, per_chunk=()):
+        self.result_box.delete("1.0", tk.END)
+        for name, count in totals.items():
+            note = " (soma por bloco)" if name in per_chunk else ""
+            self.result_box.insert(tk.END, f"{name}: sinais = {count}{note}\n")
+
+    def _finish_backtest(self, result):
+        self._show_totals(result.totals, result.per_chunk)
+        if self.profiler is not None:
+            self._show_profile()
+        done = int(result.table["bars"].sum())
+        text = f"Cancelado após {done:,} candles" if result.cancelled else ""
+        self._finish(text)
+
+    def _finish(self, text, error=None, title=""):
+        self.worker = None
+        self.load_cancel = None
+        self.status.config(text=text)
         self.run_btn.config(state="normal")
+        self.cancel_btn.config(state="disabled")
+        if error is not None:
+            messagebox.showerror(title, str(error))
+
+    def _show_profile(self):
+        for row in self.profiler.summary().itertuples(index=False):
+            self.profile_table.insert("", tk.END, values=(
+                row.detector, f"{row.wall_s:.4f}", f"{row.cpu_s:.4f}", f"{row.peak_mb:.2f}",
+                row.signals, f"{row.output_bytes / 1024:.1f}"))
+        self.trace_btn.config(state="normal")
+
+    def export_trace(self):
+        if self.profiler is None:
+            return
+        fp = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome trace", "*.json")])
+        if fp:
+            self.profiler.write_chrome_trace(fp)
 
 if __name__ == "__main__":
     print("  → Chamando mainloop()")
@@ -0,0 +1,130 @@
+# backtest/batch.py
+
+"""
+Backtest em lote: todas as combinações (ativo, timeframe, nível) distribuídas
+num pool de processos. Cada job roda isolado; falhas viram uma linha com
+status 'error' em vez de derrubar o lote. O resultado é uma tabela-resumo com
+o número de sinais por detector.
+"""
+
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from core.config import ASSETS, TIMEFRAMES, DETECTORS_BY_LEVEL
+
+
+def count_signals(result: Any) -> int:
+    """Número de sinais de um resultado de detector (bool, lista, dict, índice)."""
+    if isinstance(result, (bool, int)):
+        return int(result)
+    if isinstance(result, dict) and 'premium' in result:
+        return 1
+    try:
+        return len(result)
+    except TypeError:
+        return int(bool(result))
+
+
+def _default_runner(source, symbol, timeframe, start, end, levels):
+    from backtest.engine import run_backtest
+    return run_backtest(source, symbol, timeframe, start, end, levels)
+
+
+def _run_job(runner: Callable, source: str, symbol: str, timeframe: str,
+             level: str, start, end) -> Dict[str, Any]:
+    row: Dict[str, Any] = {'asset': symbol, 'timeframe': timeframe, 'level': level}
+    t0 = time.perf_counter()
+    try:
+        results = runner(source, symbol, timeframe, start, end, [level])
+        row.update({name: count_signals(res) for name, res in results.items()})
+        row['status'] = 'ok'
+        row['error'] = None
+    except Exception as e:
+        row['status'] = 'error'
+        row['error'] = f"{type(e).__name__}: {e}"
+        row['traceback'] = traceback.format_exc()
+    row['seconds'] = time.perf_counter() - t0
+    return row
+
+
+def run_batch(
+    source: str,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    assets: Iterable[str] = ASSETS,
+    timeframes: Iterable[str] = TIMEFRAMES,
+    levels: Iterable[str] = tuple(DETECTORS_BY_LEVEL),
+    max_workers: Optional[int] = None,
+    runner: Callable = _default_runner,
+    progress_callback=None,
+) -> pd.DataFrame:
+    """
+    Roda cada (ativo, timeframe, nível) em um processo do pool.
+    - max_workers: processos do pool (padrão: os.cpu_count()); 1 roda em série
+    - runner: função (source, symbol, timeframe, start, end, levels) -> {detector: resultado},
+      precisa ser importável pelos workers (padrão: backtest.engine.run_backtest)
+    Retorna DataFrame com uma linha por job: asset, timeframe, level, status, error,
+    seconds e uma coluna por detector com o número de sinais.
+    """
+    jobs = list(product(assets, timeframes, levels))
+    max_workers = max_workers or os.cpu_count() or 1
+    rows: List[Dict[str, Any]] = []
+
+    if max_workers == 1:
+        for i, (symbol, tf, lvl) in enumerate(jobs, start=1):
+            rows.append(_run_job(runner, source, symbol, tf, lvl, start, end))
+            if progress_callback:
+                progress_callback(int(i / len(jobs) * 100))
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs) or 1)) as pool:
+            futures = {pool.submit(_run_job, runner, source, symbol, tf, lvl, start, end): (symbol, tf, lvl)
+                       for symbol, tf, lvl in jobs}
+            for i, fut in enumerate(as_completed(futures), start=1):
+                symbol, tf, lvl = futures[fut]
+                try:
+                    rows.append(fut.result())
+                except Exception as e:
+                    # falha do próprio worker (ex.: processo morto), não do detector
+                    rows.append({'asset': symbol, 'timeframe': tf, 'level': lvl, 'status': 'error',
+                                 'error': f"{type(e).__name__}: {e}", 'seconds': None})
+                if progress_callback:
+                    progress_callback(int(i / len(jobs) * 100))
+
+    order = {job: k for k, job in enumerate(jobs)}
+    rows.sort(key=lambda r: order[(r['asset'], r['timeframe'], r['level'])])
+    summary = pd.DataFrame(rows)
+    front = ['asset', 'timeframe', 'level', 'status', 'error', 'seconds']
+    detector_cols = [c for c in summary.columns if c not in front and c != 'traceback']
+    return summary[[c for c in front if c in summary] + detector_cols
+                   + (['traceback'] if 'traceback' in summary else [])]
+
+
+def _run_detector_group(spec, names: List[str]) -> Dict[str, Any]:
+    from core.graph import DetectorGraph
+    from core.shared import attach_frame
+    return DetectorGraph(attach_frame(spec)).run(names)
+
+
+def run_detectors_parallel(df: pd.DataFrame, detectors: Iterable, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Roda os detectores de um mesmo DataFrame em paralelo sem serializar o OHLC:
+    as colunas vão uma vez para memória compartilhada (core.shared) e cada worker
+    se anexa a elas. Detectores são distribuídos em grupos, um DAG por grupo.
+    Retorna {nome do detector: resultado} na ordem pedida.
+    """
+    from core.shared import SharedOHLC
+
+    names = [d if isinstance(d, str) else d.__name__ for d in detectors]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(names) or 1)
+    groups = [names[k::max_workers] for k in range(max_workers)]
+    results: Dict[str, Any] = {}
+    with SharedOHLC(df) as shm, ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for part in pool.map(_run_detector_group, [shm.spec] * len(groups), groups):
+            results.update(part)
+    return {name: results[name] for name in names}
@@ -0,0 +1,195 @@
+# backtest/chunked.py
+
+"""
+Backtest em blocos de tempo, cancelável e com resultados parciais.
+O DataFrame é dividido em blocos (frequência pandas como 'D'/'W'/'MS' ou um
+número fixo de candles); cada bloco roda no DAG de detectores (core.graph)
+com `warmup` candles anteriores como contexto e `lookahead` candles seguintes
+(padrões confirmados depois do candle, ex.: FVG usa i+2). Eventos com posição
+('index', listas de posições, killzones) são trazidos para a posição global
+e só contam no bloco a que pertencem, então as sobreposições não duplicam
+sinais: com warmup e lookahead suficientes, os totais desses detectores
+batem com a passada única. Resultados sem posição (BOS/CHoCH/MSS, zonas de
+liquidez, equilíbrio, confluência) valem por bloco e podem diferir de uma
+passada única sobre a série inteira.
+
+BacktestWorker roda o backtest numa thread e publica o progresso numa
+queue.Queue, para que a interface consuma no próprio ritmo (app_tk faz
+polling com after()).
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from backtest.batch import count_signals
+from core.events import is_event_table
+from core.graph import DetectorGraph
+
+DEFAULT_CHUNK = 'W'
+DEFAULT_WARMUP = 500
+DEFAULT_LOOKAHEAD = 10
+
+
+class ChunkedResult(NamedTuple):
+    table: pd.DataFrame          # um bloco por linha: start, end, bars, seconds, sinais por detector
+    totals: Dict[str, int]       # sinais por detector (sem posição: passada única na série inteira)
+    cancelled: bool
+    results: Optional[Dict[str, List[Any]]] = None   # resultados por bloco (keep_results=True)
+    per_chunk: Tuple[str, ...] = ()   # detectores sem posição cujo total ainda é soma por bloco
+
+
+def chunk_bounds(index: pd.Index, chunk: Union[str, int] = DEFAULT_CHUNK) -> List[Tuple[int, int]]:
+    """Posições [início, fim) de cada bloco; chunk = frequência pandas ou número de candles."""
+    n = len(index)
+    if n == 0:
+        return []
+    if isinstance(chunk, (int, np.integer)):
+        if chunk <= 0:
+            raise ValueError("chunk deve ser positivo")
+        starts = np.arange(0, n, chunk)
+    else:
+        if not isinstance(index, pd.DatetimeIndex):
+            raise ValueError("Blocos por tempo exigem índice datetime")
+        edges = pd.date_range(index[0].normalize(), index[-1], freq=chunk)
+        starts = np.unique(np.r_[0, np.searchsorted(index, edges)])
+        starts = starts[starts < n]
+    ends = np.r_[starts[1:], n]
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def trim_result(result: Any, offset: int, start: int, end: int, index: Optional[pd.Index] = None) -> Any:
+    """
+    Resultado de um bloco calculado sobre df.iloc[offset:...] -> posições
+    globais, só com os eventos do próprio bloco [start, end) (sem aquecimento
+    nem candles emprestados do bloco seguinte). index: índice completo do df,
+    usado para recortar resultados em datas (killzones).
+    """
+    if is_event_table(result):
+        shifted = result.copy()
+        shifted['index'] += offset
+        return shifted[(shifted['index'] >= start) & (shifted['index'] < end)]
+    if isinstance(result, pd.DatetimeIndex):
+        if index is None:
+            return result
+        return result[(result >= index[start]) & (result <= index[end - 1])]
+    if isinstance(result, list) and result:
+        if all(isinstance(ev, dict) and 'index' in ev for ev in result):
+            return [{**ev, 'index': ev['index'] + offset} for ev in result
+                    if start <= ev['index'] + offset < end]
+        if all(isinstance(ev, (int, np.integer)) and not isinstance(ev, bool) for ev in result):
+            # listas de posições (stop hunts, order flow imbalance)
+            return [ev + offset for ev in result if start <= ev + offset < end]
+    return result
+
+
+def is_positional(result: Any) -> bool:
+    """True se trim_result consegue recortar o resultado por posição (eventos somam entre blocos)."""
+    if is_event_table(result) or isinstance(result, pd.DatetimeIndex):
+        return True
+    if isinstance(result, list) and result:
+        return (all(isinstance(ev, dict) and 'index' in ev for ev in result)
+                or all(isinstance(ev, (int, np.integer)) and not isinstance(ev, bool) for ev in result))
+    return False
+
+
+def run_backtest_chunked(df: pd.DataFrame, detectors: Iterable, chunk: Union[str, int] = DEFAULT_CHUNK,
+                         warmup: int = DEFAULT_WARMUP, lookahead: int = DEFAULT_LOOKAHEAD,
+                         params: Optional[Dict[str, Dict[str, Any]]] = None,
+                         cancel: Optional[threading.Event] = None,
+                         on_chunk: Optional[Callable[[int, int, Dict[str, Any], Dict[str, int]], None]] = None,
+                         profiler=None, keep_results: bool = False) -> ChunkedResult:
+    """
+    Roda os detectores bloco a bloco.
+    - cancel: threading.Event verificado entre blocos; o resultado parcial volta com cancelled=True
+    - on_chunk(i, n_blocos, linha, totais): chamado ao fim de cada bloco
+    - profiler: DetectorProfiler (backtest.profiling), um registro por detector e bloco
+    - keep_results: guarda {detector: [resultado de cada bloco]} (posições globais)
+    Detectores cujo resultado nunca teve posição (bool, dict, lista de preços)
+    rodam de novo sobre o df inteiro depois do último bloco e esse é o total.
+    """
+    names = [d if isinstance(d, str) else d.__name__ for d in detectors]
+    bounds = chunk_bounds(df.index, chunk)
+    times = df.index if isinstance(df.index, pd.DatetimeIndex) else None
+    totals = {name: 0 for name in names}
+    rows: List[Dict[str, Any]] = []
+    kept: Optional[Dict[str, List[Any]]] = {name: [] for name in names} if keep_results else None
+    positional = set()
+    cancelled = False
+    for i, (start, end) in enumerate(bounds, start=1):
+        if cancel is not None and cancel.is_set():
+            cancelled = True
+            break
+        t0 = time.perf_counter()
+        offset = max(0, start - warmup)
+        window = df.iloc[offset:min(len(df), end + lookahead)]
+        results = DetectorGraph(window, profiler=profiler).run(names, params=params)
+        row: Dict[str, Any] = {'start': df.index[start], 'end': df.index[end - 1], 'bars': end - start}
+        for name in names:
+            if is_positional(results[name]):
+                positional.add(name)
+            res = trim_result(results[name], offset, start, end, times)
+            row[name] = count_signals(res)
+            totals[name] += row[name]
+            if kept is not None:
+                kept[name].append(res)
+        row['seconds'] = time.perf_counter() - t0
+        rows.append(row)
+        if on_chunk:
+            on_chunk(i, len(bounds), row, dict(totals))
+    per_chunk = [name for name in names if name not in positional]
+    if per_chunk and rows and not cancelled:
+        if cancel is not None and cancel.is_set():
+            cancelled = True
+        else:
+            results = DetectorGraph(df, profiler=profiler).run(per_chunk, params=params)
+            totals.update({name: count_signals(results[name]) for name in per_chunk})
+            per_chunk = []
+    table = pd.DataFrame(rows, columns=['start', 'end', 'bars', 'seconds'] + names)
+    return ChunkedResult(table, totals, cancelled, kept, tuple(per_chunk) if rows else ())
+
+
+class BacktestWorker:
+    """
+    run_backtest_chunked numa thread daemon. Mensagens em `messages` (queue.Queue):
+    - ('chunk', {'done', 'total', 'bars', 'row', 'totals'}) ao fim de cada bloco
+    - ('done', ChunkedResult) no fim (cancelled=True se cancelado)
+    - ('error', exceção)
+    """
+
+    def __init__(self, df: pd.DataFrame, detectors: Iterable, **kwargs):
+        self.df = df
+        self.detectors = list(detectors)
+        self.kwargs = kwargs
+        self.messages: queue.Queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self._bars = 0
+
+    def start(self) -> "BacktestWorker":
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def join(self, timeout: Optional[float] = None):
+        self.thread.join(timeout)
+
+    def _on_chunk(self, done: int, total: int, row: Dict[str, Any], totals: Dict[str, int]):
+        self._bars += row['bars']
+        self.messages.put(('chunk', {'done': done, 'total': total, 'bars': self._bars,
+                                     'row': row, 'totals': totals}))
+
+    def _run(self):
+        try:
+            result = run_backtest_chunked(self.df, self.detectors, cancel=self.cancel_event,
+                                          on_chunk=self._on_chunk, **self.kwargs)
+        except Exception as e:
+            self.messages.put(('error', e))
+        else:
+            self.messages.put(('done', result))
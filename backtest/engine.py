@@ -3,6 +3,29 @@
 import pandas as pd
 from data.data_provider import get_data
 from core.config import DETECTORS_BY_LEVEL
+from core.graph import DetectorGraph
+from backtest.walk_forward import walk_forward_signals
+
+
+def select_detectors(levels: list[str]) -> list:
+    # monta lista de detectores a executar, respeitando a ordem: Básico → Intermediário → Avançado
+    detectors = []
+    for lvl in levels:
+        detectors.extend(DETECTORS_BY_LEVEL.get(lvl, []))
+    return detectors
+
+
+def run_backtest_df(df: pd.DataFrame, detectors: list, progress_callback=None,
+                    params: dict = None, profiler=None) -> dict:
+    """
+    Executa os detectores sobre um DataFrame como DAG (core.graph): OB, FVG,
+    liquidez, BOS/CHoCH e sweeps usados por detectores compostos são calculados
+    uma vez e compartilhados. Retorna {nome do detector: resultado}.
+    profiler: backtest.profiling.DetectorProfiler opcional que registra tempo,
+    CPU, memória e tamanho da saída de cada detector.
+    """
+    return DetectorGraph(df, profiler=profiler).run(detectors, params=params, progress_callback=progress_callback)
+
 
 def run_backtest(
     source: str,
@@ -11,20 +34,27 @@ def run_backtest(
     start: pd.Timestamp,
     end: pd.Timestamp,
     levels: list[str],
-    progress_callback=None
-) -> dict:
+    progress_callback=None,
+    mode: str = "batch",
+    profiler=None,
+):
+    """
+    mode="batch": cada detector roda uma vez sobre o DataFrame inteiro; retorna
+    dict {nome do detector: resultado}.
+    mode="walk_forward": retorna DataFrame com um sinal por candle e detector,
+    calculado só com dados disponíveis até o candle (ver backtest.walk_forward).
+    profiler: DetectorProfiler (backtest.profiling) para medir cada detector no
+    modo batch; depois use profiler.report() ou profiler.write_chrome_trace().
+    """
     df = get_data(source, symbol, timeframe, start, end)
+    detectors = select_detectors(levels)
 
-    # monta lista de detectores a executar, respeitando a ordem: Básico → Intermediário → Avançado
-    detectors = []
-    for lvl in levels:
-        detectors.extend(DETECTORS_BY_LEVEL.get(lvl, []))
-
-    total = len(detectors)
-    results = {}
-    for i, detector in enumerate(detectors, start=1):
-        results[detector.__name__] = detector(df)
+    if mode == "walk_forward":
+        table = walk_forward_signals(df, detectors)
         if progress_callback:
-            progress_callback(int(i / total * 100))
-    return results
+            progress_callback(100)
+        return table
+    if mode != "batch":
+        raise ValueError(f"Modo de backtest desconhecido: {mode}")
 
+    return run_backtest_df(df, detectors, progress_callback, profiler=profiler)
@@ -0,0 +1,367 @@
+# backtest/optimizer.py
+
+"""
+Varredura de parâmetros dos detectores (grid ou busca aleatória) definida em
+backtest_configs.json, uma lista de varreduras:
+
+    [
+      {"name": "ob", "detector": "detect_order_blocks", "search": "grid",
+       "params": {"min_range": [0, 5, 10], "lookback": [20, 50, 100]}},
+      {"name": "hunts", "detector": "detect_stop_hunts", "search": "random", "objective": "signals",
+       "samples": 20, "seed": 7, "params": {"wick_ratio": {"low": 0.3, "high": 0.9}}}
+    ]
+
+grid: produto cartesiano das listas (um escalar fixa o parâmetro).
+objective: o que ordena as combinações. Padrão 'expectancy': os eventos de
+zona viram ordens (trade.simulator.zone_candidates) e a simulação dá o PnL
+médio por trade; 'profit_factor' usa a mesma simulação. 'signals' (nº de
+sinais) premia os parâmetros mais frouxos e fica só como opção explícita,
+obrigatória para detectores fora de trade.simulator.CONFIRMATION (stop
+hunts, sweeps, ...). Chaves extras da entrada (ex.: "note") são ignoradas.
+random: `samples` sorteios com `seed`; cada parâmetro é uma lista (sorteio
+entre os valores) ou {"low", "high"} uniforme, inteiro se os dois limites
+forem inteiros, com "log": true para escala logarítmica.
+
+Em paralelo, o OHLC vai uma vez para memória compartilhada (core.shared) e
+cada worker recebe lotes de parâmetros do mesmo detector sobre um único
+DetectorGraph: os arrays OHLC e os nós de dependência (ex.: detect_fvg em
+detect_multi_fvg) são calculados uma vez por lote, não uma vez por
+combinação. Cada execução concluída vira uma linha JSON no checkpoint;
+rodar de novo com o mesmo arquivo e os mesmos dados pula o que já foi feito.
+"""
+
+import argparse
+import hashlib
+import inspect
+import itertools
+import json
+import math
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from backtest.batch import count_signals
+from core import patterns
+from core.graph import DETECTOR_INPUTS, DetectorGraph
+from trade.simulator import CONFIRMATION, simulate, zone_candidates
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / 'backtest_configs.json'
+SEARCHES = ('grid', 'random')
+RESULT_COLUMNS = ['sweep', 'rank', 'detector', 'params', 'objective', 'score', 'signals', 'seconds',
+                  'status', 'error']
+# chaves de trade.simulator.trade_stats usadas como score, mais a contagem de sinais
+TRADE_OBJECTIVES = ('expectancy', 'profit_factor')
+OBJECTIVES = TRADE_OBJECTIVES + ('signals',)
+DEFAULT_OBJECTIVE = 'expectancy'
+
+
+class Sweep(NamedTuple):
+    name: str
+    detector: str
+    params: Dict[str, Any]
+    search: str = 'grid'
+    samples: int = 10
+    seed: Optional[int] = None
+    objective: str = DEFAULT_OBJECTIVE
+
+
+def parse_sweep(spec: Dict[str, Any]) -> Sweep:
+    """Valida uma entrada do arquivo de configuração (detector, busca e nomes dos parâmetros)."""
+    detector = spec.get('detector')
+    func = getattr(patterns, detector, None) if isinstance(detector, str) else None
+    if not detector or not detector.startswith('detect_') or func is None:
+        raise ValueError(f"Detector desconhecido: {detector!r}")
+    search = spec.get('search', 'grid')
+    if search not in SEARCHES:
+        raise ValueError(f"Busca desconhecida: {search!r} (use {', '.join(SEARCHES)})")
+    params = dict(spec.get('params', {}))
+    accepted = set(inspect.signature(func).parameters) - {'df', 'as_table'} - set(DETECTOR_INPUTS.get(detector, {}))
+    unknown = sorted(set(params) - accepted)
+    if unknown:
+        raise ValueError(f"{detector} não aceita {', '.join(unknown)}")
+    samples = int(spec.get('samples', 10))
+    if samples <= 0:
+        raise ValueError("samples deve ser positivo")
+    objective = spec.get('objective', DEFAULT_OBJECTIVE)
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Objetivo desconhecido: {objective!r} (use {', '.join(OBJECTIVES)})")
+    if objective in TRADE_OBJECTIVES and detector not in CONFIRMATION:
+        raise ValueError(f"{detector} não gera zonas operáveis; use \"objective\": \"signals\"")
+    return Sweep(spec.get('name', detector), detector, params, search, samples, spec.get('seed'), objective)
+
+
+def load_sweeps(path: Union[str, Path] = CONFIG_PATH) -> List[Sweep]:
+    with open(path, encoding='utf-8') as f:
+        specs = json.load(f)
+    if isinstance(specs, dict):
+        specs = [specs]
+    sweeps = [parse_sweep(spec) for spec in specs]
+    names = [s.name for s in sweeps]
+    if len(set(names)) != len(names):
+        raise ValueError("Nomes de varredura repetidos")
+    return sweeps
+
+
+def _sample(rng: np.random.Generator, spec: Any) -> Any:
+    if isinstance(spec, list):
+        return spec[rng.integers(len(spec))]
+    if isinstance(spec, dict):
+        low, high = spec['low'], spec['high']
+        if spec.get('log'):
+            value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        else:
+            value = float(rng.uniform(low, high))
+        if isinstance(low, int) and isinstance(high, int):
+            return int(min(max(round(value), low), high))
+        return value
+    return spec
+
+
+def expand(sweep: Sweep) -> List[Dict[str, Any]]:
+    """Combinações de parâmetros da varredura, sem repetições, na ordem de geração."""
+    names = list(sweep.params)
+    if sweep.search == 'grid':
+        values = [v if isinstance(v, list) else [v] for v in sweep.params.values()]
+        combos = [dict(zip(names, combo)) for combo in itertools.product(*values)]
+    else:
+        rng = np.random.default_rng(sweep.seed)
+        combos = [{name: _sample(rng, sweep.params[name]) for name in names} for _ in range(sweep.samples)]
+    unique: Dict[str, Dict[str, Any]] = {}
+    for combo in combos:
+        unique.setdefault(json.dumps(combo, sort_keys=True), combo)
+    return list(unique.values())
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Hash curto do índice e das colunas OHLC: checkpoints só valem para os mesmos dados."""
+    h = hashlib.blake2b(digest_size=8)
+    if isinstance(df.index, pd.DatetimeIndex):
+        h.update(df.index.as_unit('ns').asi8.tobytes())
+    for col in ('open', 'high', 'low', 'close'):
+        h.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)).tobytes())
+    return f"{len(df)}:{h.hexdigest()}"
+
+
+def run_key(sweep: str, detector: str, params: Dict[str, Any], data: str,
+            objective: str = DEFAULT_OBJECTIVE) -> str:
+    return json.dumps([sweep, detector, params, data, objective], sort_keys=True)
+
+
+def format_params(params: Dict[str, Any]) -> str:
+    return ', '.join(f"{k}={v}" for k, v in params.items())
+
+
+def load_checkpoint(path: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+    """{chave da execução: linha} do checkpoint; linhas truncadas por uma queda são ignoradas."""
+    done: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+                done[row['key']] = row
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+
+def _open_checkpoint(path: Union[str, Path]):
+    f = open(path, 'a+', encoding='utf-8')
+    if f.tell() > 0:
+        # última linha sem '\n' (queda no meio da escrita): a próxima começa numa linha nova
+        f.seek(f.tell() - 1)
+        if f.read(1) != '\n':
+            f.write('\n')
+    return f
+
+
+def objective_score(df: pd.DataFrame, detector: str, result: Any, objective: str) -> float:
+    """Score de um resultado: nº de sinais ou estatística dos trades simulados das zonas."""
+    if objective == 'signals':
+        return float(count_signals(result))
+    trades = simulate(df, zone_candidates(result, detector))
+    return float(trades.stats[objective])
+
+
+def _evaluate_batch(graph: DetectorGraph, sweep: str, detector: str, param_sets: List[Dict[str, Any]],
+                    data: str, score: Optional[Callable[[Any], float]],
+                    objective: str = DEFAULT_OBJECTIVE) -> List[Dict[str, Any]]:
+    rows = []
+    for params in param_sets:
+        row: Dict[str, Any] = {'key': run_key(sweep, detector, params, data, objective), 'sweep': sweep,
+                               'detector': detector, 'params': params, 'data': data,
+                               'objective': 'custom' if score is not None else objective}
+        t0 = time.perf_counter()
+        try:
+            result = graph.get(detector, **params)
+            row['signals'] = count_signals(result)
+            if score is not None:
+                row['score'] = float(score(result))
+            else:
+                row['score'] = objective_score(graph.df, detector, result, objective)
+            row['status'] = 'ok'
+            row['error'] = None
+        except Exception as e:
+            row.update(signals=None, score=None, status='error', error=f"{type(e).__name__}: {e}",
+                       traceback=traceback.format_exc())
+        row['seconds'] = time.perf_counter() - t0
+        # só os nós de dependência ficam em cache para as próximas combinações do lote
+        graph.forget(detector, **params)
+        rows.append(row)
+    return rows
+
+
+def _run_param_batch(spec, sweep: str, detector: str, param_sets: List[Dict[str, Any]],
+                     data: str, score: Optional[Callable[[Any], float]],
+                     objective: str = DEFAULT_OBJECTIVE) -> List[Dict[str, Any]]:
+    from core.shared import attach_frame
+    return _evaluate_batch(DetectorGraph(attach_frame(spec)), sweep, detector, param_sets, data, score,
+                           objective)
+
+
+def rank_results(rows: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Tabela ordenada por varredura e rank (1 = maior score; empates na ordem
+    de geração das combinações). Execuções com erro ficam no fim, sem rank.
+    """
+    table = pd.DataFrame(list(rows))
+    if table.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    table['params'] = table['params'].map(format_params)
+    order = {name: k for k, name in enumerate(dict.fromkeys(table['sweep']))}
+    table = table.assign(_order=table['sweep'].map(order))
+    table = table.sort_values(['_order', 'score'], ascending=[True, False], na_position='last', kind='stable')
+    table['rank'] = table.groupby('sweep')['score'].rank(method='first', ascending=False).astype('Int64')
+    table = table.sort_values(['_order', 'rank'], na_position='last').reset_index(drop=True)
+    return table[RESULT_COLUMNS]
+
+
+def run_sweeps(
+    df: pd.DataFrame,
+    sweeps: Optional[Iterable[Sweep]] = None,
+    checkpoint: Optional[Union[str, Path]] = None,
+    max_workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    score: Optional[Callable[[Any], float]] = None,
+    progress_callback=None,
+) -> pd.DataFrame:
+    """
+    Roda todas as combinações das varreduras (padrão: load_sweeps()).
+    - checkpoint: arquivo JSONL; execuções já gravadas para os mesmos dados são reaproveitadas
+    - max_workers: processos do pool (padrão: os.cpu_count()); 1 roda em série, sem memória compartilhada
+    - batch_size: combinações por tarefa (padrão: ~4 lotes por worker)
+    - score: função (resultado do detector) -> float, importável pelos workers; substitui
+      o objective de cada varredura (padrão: expectancy dos trades simulados)
+    Retorna a tabela de rank_results.
+    """
+    sweeps = load_sweeps() if sweeps is None else list(sweeps)
+    data = data_fingerprint(df)
+    done = load_checkpoint(checkpoint) if checkpoint else {}
+    rows: Dict[str, Dict[str, Any]] = {}
+    pending: List[tuple] = []
+    for sweep in sweeps:
+        for params in expand(sweep):
+            key = run_key(sweep.name, sweep.detector, params, data, sweep.objective)
+            if key in done:
+                rows[key] = done[key]
+            else:
+                rows[key] = None
+                pending.append((sweep, params))
+
+    max_workers = max_workers or os.cpu_count() or 1
+    batch_size = batch_size or max(1, math.ceil(len(pending) / (max_workers * 4)))
+    batches = []
+    for sweep, group in itertools.groupby(pending, key=lambda job: job[0]):
+        group = [params for _, params in group]
+        batches += [(sweep, group[i:i + batch_size]) for i in range(0, len(group), batch_size)]
+
+    out = _open_checkpoint(checkpoint) if checkpoint else None
+    finished = 0
+
+    def record(batch_rows):
+        nonlocal finished
+        for row in batch_rows:
+            rows[row['key']] = row
+            if out is not None:
+                out.write(json.dumps(row, default=_json_default) + '\n')
+        if out is not None:
+            out.flush()
+        finished += len(batch_rows)
+        if progress_callback:
+            progress_callback(int(finished / len(pending) * 100))
+
+    try:
+        if max_workers == 1 or len(batches) <= 1:
+            graph = DetectorGraph(df)
+            for sweep, param_sets in batches:
+                record(_evaluate_batch(graph, sweep.name, sweep.detector, param_sets, data, score,
+                                       sweep.objective))
+        else:
+            from core.shared import SharedOHLC
+            with SharedOHLC(df) as shm, ProcessPoolExecutor(max_workers=min(max_workers, len(batches))) as pool:
+                futures = {pool.submit(_run_param_batch, shm.spec, sweep.name, sweep.detector,
+                                       param_sets, data, score, sweep.objective): (sweep, param_sets)
+                           for sweep, param_sets in batches}
+                for fut in as_completed(futures):
+                    sweep, param_sets = futures[fut]
+                    try:
+                        batch_rows = fut.result()
+                    except Exception as e:
+                        # falha do próprio worker (ex.: processo morto): não vai para o checkpoint
+                        for params in param_sets:
+                            key = run_key(sweep.name, sweep.detector, params, data, sweep.objective)
+                            rows[key] = {'key': key, 'sweep': sweep.name, 'detector': sweep.detector,
+                                         'params': params, 'objective': sweep.objective, 'signals': None,
+                                         'score': None, 'seconds': None, 'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+                        continue
+                    record(batch_rows)
+    finally:
+        if out is not None:
+            out.close()
+    return rank_results(rows.values())
+
+
+def _json_default(obj: Any):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"{type(obj).__name__} não serializável")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros dos detectores SMC")
+    parser.add_argument('data', help="arquivo OHLC CSV/Parquet")
+    parser.add_argument('--config', default=str(CONFIG_PATH))
+    parser.add_argument('--checkpoint', default='sweeps.jsonl', help="JSONL para retomar execuções")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--top', type=int, default=5, help="linhas por varredura no resumo")
+    parser.add_argument('--out', metavar='CSV', help="grava a tabela completa")
+    args = parser.parse_args(argv)
+
+    from data.ingest import load_ohlc
+
+    df = load_ohlc(args.data)
+    table = run_sweeps(df, load_sweeps(args.config), checkpoint=args.checkpoint, max_workers=args.workers,
+                       batch_size=args.batch_size, progress_callback=lambda p: print(f"{p}%", end='\r'))
+    print()
+    if args.out:
+        table.to_csv(args.out, index=False)
+    top = table[table['rank'].le(args.top).fillna(False).astype(bool)]
+    with pd.option_context('display.max_rows', None, 'display.width', 160):
+        print(top.drop(columns=['error']).to_string(index=False))
+    errors = int((table['status'] == 'error').sum())
+    if errors:
+        print(f"{errors} execução(ões) com erro")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,404 @@
+# backtest/walk_forward.py
+
+"""
+Walk-forward sem lookahead: a resposta de cada detector candle a candle,
+usando só os dados disponíveis até aquele candle.
+Nada é refatiado nem reexecutado por prefixo; cada detector tem um kernel
+com janelas deslizantes, extremos acumulados, o candle de confirmação de
+cada evento ou uma estrutura incremental (zonas de liquidez e confluência),
+então o custo total é O(n) a O(n log n).
+
+Convenções da tabela (uma linha por candle, índice do df):
+  - detectores booleanos (BOS, CHoCH, MSS, killzones, OFI): valor do detector
+    no prefixo que termina no candle;
+  - detectores de eventos (FVG, OB, breakers, ...): quantos eventos ficaram
+    confirmados naquele candle (um FVG em i só é conhecido em i+2);
+  - zonas de liquidez e confluência: variação do número de níveis que o
+    batch devolveria no prefixo (negativa quando um nível novo absorve zonas
+    já existentes), calculada de forma incremental;
+  - equilíbrio: colunas _low, _mid e _high da faixa acumulada.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from core.incremental import ConfluenceLevels, LiquidityClusters
+from core.kernels import (
+    OHLCArrays,
+    ohlc_arrays,
+    bos_masks,
+    fvg_masks,
+    order_block_masks,
+    breaker_masks,
+    mitigation_masks,
+    void_masks,
+    stop_hunt_masks,
+    sweep_events,
+)
+from core.patterns import _choch_masks
+from core.sessions import killzone_mask
+
+Columns = Dict[str, np.ndarray]
+
+
+def _counts_at(positions: np.ndarray, n: int) -> np.ndarray:
+    """Quantos eventos confirmam em cada candle."""
+    return np.bincount(positions, minlength=n)[:n].astype(np.int32)
+
+
+def _bos_asof(a: OHLCArrays, lookback: int = 2) -> np.ndarray:
+    up, down = bos_masks(a, lookback)
+    return up | down
+
+
+def _choch_asof(a: OHLCArrays) -> np.ndarray:
+    up, down = _choch_masks(a)
+    return np.logical_or.accumulate(up) & np.logical_or.accumulate(down)
+
+
+def _fvg_positions(a: OHLCArrays) -> np.ndarray:
+    if len(a) < 3:
+        return np.array([], dtype=np.int64)
+    bull, bear = fvg_masks(a)
+    return np.flatnonzero(bull | bear) + 2
+
+
+def wf_bos(a, index, lookback: int = 2) -> Columns:
+    return {'detect_bos': _bos_asof(a, lookback)}
+
+
+def wf_choch(a, index) -> Columns:
+    return {'detect_choch': _choch_asof(a)}
+
+
+def wf_fvg(a, index, lookback: int = 3) -> Columns:
+    counts = _counts_at(_fvg_positions(a), len(a))
+    counts[:lookback - 1] = 0
+    return {'detect_fvg': counts}
+
+
+def _ob_positions(a: OHLCArrays, min_range: float = 0, lookback: int = 50) -> np.ndarray:
+    bull, bear = order_block_masks(a, min_range, lookback)
+    return np.flatnonzero(bull | bear)
+
+
+def wf_order_blocks(a, index, min_range: float = 0, lookback: int = 50) -> Columns:
+    return {'detect_order_blocks': _counts_at(_ob_positions(a, min_range, lookback) + 2, len(a))}
+
+
+def _chains(values: np.ndarray, tol: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cadeia de cada valor: valores distintos ordenados, separados onde o
+    vizinho está a mais de `tol` (NaN recebe -1). Cadeias não interagem nem
+    em prefixos da série. Retorna (cadeia por valor, amplitude > tol por cadeia).
+    """
+    chain = np.full(len(values), -1, dtype=np.int64)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) == 0:
+        return chain, np.array([], dtype=bool)
+    uniq, inverse = np.unique(values[valid], return_inverse=True)
+    new = np.r_[True, np.diff(uniq) > tol]
+    ids = np.cumsum(new) - 1
+    starts = np.flatnonzero(new)
+    ends = np.r_[starts[1:], len(uniq)] - 1
+    chain[valid] = ids[inverse.ravel()]
+    return chain, (uniq[ends] - uniq[starts]) > tol
+
+
+def _zone_updates(a: OHLCArrays, min_touches: int = 2, tol: float = 1e-5):
+    """
+    Mudanças nas zonas de detect_liquidity_zones de um prefixo para o
+    seguinte: lista de (candle, +1/-1, nível, posição no batch).
+    Numa cadeia com amplitude <= tol todos os preços formam uma zona só, que
+    surge no min_touches-ésimo toque e é representada pelo primeiro high (ou,
+    sem highs ainda, pelo primeiro low); só as cadeias largas passam por
+    LiquidityClusters, candle a candle.
+    """
+    n = len(a)
+    prices = np.concatenate([a.high, a.low]).astype(float)
+    times = np.concatenate([np.arange(n), np.arange(n)])
+    chain, wide = _chains(prices, tol)
+    updates = []
+
+    pos = np.flatnonzero(chain >= 0)
+    pos = pos[~wide[chain[pos]]]
+    if len(pos):
+        pos = pos[np.lexsort((pos >= n, times[pos], chain[pos]))]
+        starts = np.flatnonzero(np.r_[True, np.diff(chain[pos]) != 0])
+        sizes = np.diff(np.r_[starts, len(pos)])
+        is_high = pos < n
+        # primeiro high de cada cadeia (n se não houver) e primeiro low
+        first_high = np.minimum.reduceat(np.where(is_high, times[pos], n), starts)
+        first_low = np.minimum.reduceat(np.where(is_high, n, times[pos]), starts)
+        ok = np.flatnonzero(sizes >= max(min_touches, 1))
+        arrive = times[pos[starts[ok] + max(min_touches, 1) - 1]]
+        for t, fh, fl in zip(arrive.tolist(), first_high[ok].tolist(), first_low[ok].tolist()):
+            if fh <= t:
+                updates.append((t, 1, prices[fh], (0, fh)))
+                continue
+            updates.append((t, 1, prices[n + fl], (1, fl)))
+            if fh < n:
+                updates.append((fh, -1, prices[n + fl], (1, fl)))
+                updates.append((fh, 1, prices[fh], (0, fh)))
+
+    in_wide = np.zeros(2 * n, dtype=bool)
+    in_wide[chain >= 0] = wide[chain[chain >= 0]]
+    if in_wide.any():
+        clusters = LiquidityClusters(tol, min_touches)
+        high = np.where(in_wide[:n], prices[:n], np.nan)
+        low = np.where(in_wide[n:], prices[n:], np.nan)
+        for t in np.flatnonzero(in_wide[:n] | in_wide[n:]).tolist():
+            added, removed = clusters.update(high[t], low[t], t)
+            updates += [(t, -1, lvl, key) for lvl, key in removed]
+            updates += [(t, 1, lvl, key) for lvl, key in added]
+    return updates
+
+
+def wf_liquidity_zones(a, index, min_touches: int = 2, tol: float = 1e-5) -> Columns:
+    counts = np.zeros(len(a), dtype=np.int32)
+    for t, sign, _, _ in _zone_updates(a, min_touches, tol):
+        counts[t] += sign
+    return {'detect_liquidity_zones': counts}
+
+
+def _rolling_sweeps(a: OHLCArrays, lookback: int = 10, body_ratio: float = 0.5,
+                    tol: float = 1e-5, chunk: int = 10_000):
+    """
+    Sweeps causais: no candle t as zonas são os preços com 2+ toques entre
+    highs e lows dos últimos `lookback` candles (até t), como
+    detect_liquidity_sweep faria com zones=None sobre o prefixo.
+    Retorna (sweeps por candle, inducements confirmados por candle).
+    """
+    n = len(a)
+    sweeps = np.zeros(n, dtype=np.int32)
+    confirms = np.zeros(n, dtype=np.int32)
+    if n < 2 or lookback < 1:
+        return sweeps, confirms
+    pad = np.full(lookback - 1, np.nan)
+    win_h = sliding_window_view(np.concatenate([pad, a.high.astype(float)]), lookback)
+    win_l = sliding_window_view(np.concatenate([pad, a.low.astype(float)]), lookback)
+    o, h, l, c = (np.asarray(x, dtype=float) for x in a)
+    rng = h - l
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eligible = (rng != 0) & ~(np.abs(c - o) / rng > body_ratio)
+    eligible[0] = False
+    later = np.triu(np.ones((2 * lookback, 2 * lookback), dtype=bool), k=1)
+
+    rows_all = np.flatnonzero(eligible)
+    for s in range(0, len(rows_all), chunk):
+        rows = rows_all[s:s + chunk]
+        P = np.concatenate([win_h[rows], win_l[rows]], axis=1)
+        near = np.abs(P[:, :, None] - P[:, None, :]) <= tol
+        touches = near.sum(axis=2)
+        # cada nível conta uma vez por candle, pelo primeiro preço do cluster
+        repeated = (near & later[None]).any(axis=1)
+        zone = (touches >= 2) & ~repeated
+        hb, lb, cb = h[rows, None], l[rows, None], c[rows, None]
+        up = zone & (hb > P + tol) & (cb < P - tol)
+        down = zone & (lb < P - tol) & (cb > P + tol)
+        sweeps[rows] = (up | down).sum(axis=1)
+        # inducement: close do candle seguinte do lado do sweep
+        nxt = rows + 1
+        valid = nxt < n
+        cn = np.where(valid, c[np.minimum(nxt, n - 1)], np.nan)[:, None]
+        counts = ((up & (cn > P)) | (down & (cn < P))).sum(axis=1)
+        confirms[nxt[valid]] += counts[valid].astype(np.int32)
+    return sweeps, confirms
+
+
+def _fixed_zone_sweeps(a: OHLCArrays, zones, body_ratio: float = 0.5, tol: float = 1e-5):
+    idx, pos, is_down = sweep_events(a, list(zones), body_ratio, tol)
+    n = len(a)
+    lvl = np.asarray(list(zones), dtype=float)[pos]
+    nxt = idx + 1
+    valid = nxt < n
+    cn = a.close[np.minimum(nxt, n - 1)] if len(idx) else lvl
+    ok = valid & np.where(is_down, cn < lvl, cn > lvl)
+    return _counts_at(idx, n), _counts_at(nxt[ok], n)
+
+
+def wf_liquidity_sweep(a, index, zones=None, lookback: int = 10, body_ratio: float = 0.5,
+                       tol: float = 1e-5) -> Columns:
+    if zones is not None:
+        sweeps, _ = _fixed_zone_sweeps(a, zones, body_ratio, tol)
+    else:
+        sweeps, _ = _rolling_sweeps(a, lookback, body_ratio, tol)
+    return {'detect_liquidity_sweep': sweeps}
+
+
+def wf_inducement(a, index, zones=None) -> Columns:
+    if zones is not None:
+        _, confirms = _fixed_zone_sweeps(a, zones)
+    else:
+        _, confirms = _rolling_sweeps(a)
+    return {'detect_inducement': confirms}
+
+
+def wf_equilibrium(a, index) -> Columns:
+    hi = np.fmax.accumulate(np.asarray(a.high, dtype=float))
+    lo = np.fmin.accumulate(np.asarray(a.low, dtype=float))
+    return {
+        'compute_equilibrium_zone_low': lo,
+        'compute_equilibrium_zone_mid': (hi + lo) / 2,
+        'compute_equilibrium_zone_high': hi,
+    }
+
+
+def wf_killzones(a, index, sessions=[(8, 10), (13, 15)]) -> Columns:
+    if not isinstance(index, pd.DatetimeIndex):
+        raise ValueError("DataFrame deve ter índice datetime para killzones")
+    return {'detect_killzones': killzone_mask(index, sessions)}
+
+
+def wf_mss(a, index) -> Columns:
+    return {'detect_mss': _bos_asof(a) & _choch_asof(a)}
+
+
+def wf_breaker_blocks(a, index, min_range: float = 0) -> Columns:
+    if len(a) < 3:
+        return {'detect_breaker_blocks': np.zeros(len(a), dtype=np.int32)}
+    bearish, bullish = breaker_masks(a, min_range)
+    # breaker em i é confirmado pelo close de i+1
+    return {'detect_breaker_blocks': _counts_at(np.flatnonzero(bearish | bullish) + 2, len(a))}
+
+
+def wf_confluence_zones(a, index, tolerance: float = 1e-5) -> Columns:
+    """
+    Níveis de OB e FVG entram no candle em que são confirmados e os de
+    liquidez seguem as zonas de cada prefixo (_zone_updates); a seleção de
+    confluência é mantida por ConfluenceLevels com a ordem dos níveis no
+    batch. Como em _zone_updates, cadeias com amplitude <= tolerance são
+    contadas direto (uma confluência enquanto tiverem 2+ níveis) e só as
+    cadeias largas passam por ConfluenceLevels.
+    """
+    n = len(a)
+    updates = []
+    for j in _ob_positions(a).tolist():
+        updates += [(j + 2, 1, a.low[j], (0, j, 0)), (j + 2, 1, a.high[j], (0, j, 1))]
+    fvg = _fvg_positions(a) - 2
+    if len(fvg):
+        is_bull = fvg_masks(a)[0][fvg]
+        fvg_lower = np.where(is_bull, a.high[fvg], a.high[fvg + 2])
+        fvg_upper = np.where(is_bull, a.low[fvg + 2], a.low[fvg])
+        for i, lower, upper in zip(fvg.tolist(), fvg_lower.tolist(), fvg_upper.tolist()):
+            updates += [(i + 2, 1, lower, (1, i, 0)), (i + 2, 1, upper, (1, i, 1))]
+    updates += [(t, sign, lvl, (2,) + key) for t, sign, lvl, key in _zone_updates(a)]
+
+    counts = np.zeros(n, dtype=np.int32)
+    if not updates:
+        return {'detect_confluence_zones': counts}
+    values = np.array([u[2] for u in updates], dtype=float)
+    signs = np.array([u[1] for u in updates], dtype=np.int64)
+    chain, wide = _chains(values, tolerance)
+
+    times = np.array([u[0] for u in updates], dtype=np.int64)
+    # cadeia com amplitude <= tolerance: uma confluência enquanto tiver 2+ níveis
+    tight = np.flatnonzero(chain >= 0)
+    tight = tight[~wide[chain[tight]]]
+    if len(tight):
+        tight = tight[np.lexsort((signs[tight], times[tight], chain[tight]))]
+        present = np.cumsum(signs[tight])
+        starts = np.flatnonzero(np.r_[True, np.diff(chain[tight]) != 0])
+        present -= np.repeat(present[starts] - signs[tight][starts], np.diff(np.r_[starts, len(tight)]))
+        active = (present >= 2).astype(np.int32)
+        delta = np.diff(active, prepend=0)
+        delta[starts] = active[starts]
+        np.add.at(counts, times[tight], delta)
+
+    levels = ConfluenceLevels(tolerance)
+    rest = np.flatnonzero(chain >= 0)
+    rest = rest[wide[chain[rest]]]
+    for k in rest[np.lexsort((signs[rest], times[rest]))].tolist():
+        t, sign, lvl, key = updates[k]
+        before = len(levels.accepted)
+        if sign > 0:
+            levels.add(lvl, key)
+        else:
+            levels.remove(lvl, key)
+        counts[t] += len(levels.accepted) - before
+    return {'detect_confluence_zones': counts}
+
+
+def wf_mitigation_blocks(a, index) -> Columns:
+    if len(a) < 3:
+        return {'detect_mitigation_blocks': np.zeros(len(a), dtype=np.int32)}
+    bullish, bearish = mitigation_masks(a)
+    counts = np.zeros(len(a), dtype=np.int32)
+    counts[2:] = bullish.astype(np.int32) + bearish
+    return {'detect_mitigation_blocks': counts}
+
+
+def wf_liquidity_voids(a, index, tol: float = 0.0) -> Columns:
+    counts = np.zeros(len(a), dtype=np.int32)
+    if len(a) >= 2:
+        bullish, bearish = void_masks(a, tol)
+        counts[1:] = bullish.astype(np.int32) + bearish
+    return {'detect_liquidity_voids': counts}
+
+
+def wf_stop_hunts(a, index, wick_ratio: float = 0.5) -> Columns:
+    counts = np.zeros(len(a), dtype=np.int32)
+    if len(a) >= 2:
+        lower, upper = stop_hunt_masks(a, wick_ratio)
+        counts[1:] = lower.astype(np.int32) + upper
+    return {'detect_stop_hunts': counts}
+
+
+def wf_multi_fvg(a, index, min_gaps: int = 2) -> Columns:
+    counts = _counts_at(_fvg_positions(a), len(a))
+    total = np.cumsum(counts)
+    released = np.where(total >= min_gaps, counts, 0)
+    # no candle em que o mínimo é atingido saem também os gaps anteriores
+    first = np.flatnonzero(total >= min_gaps)
+    if len(first):
+        released[first[0]] = total[first[0]]
+    return {'detect_multi_fvg': released.astype(np.int32)}
+
+
+def wf_order_flow_imbalance(a, index, factor: float = 2.0) -> Columns:
+    ranges = np.asarray(a.high - a.low, dtype=float)
+    return {'detect_order_flow_imbalance': ranges > factor * np.fmax.accumulate(ranges)}
+
+
+WALK_FORWARD_KERNELS: Dict[str, Callable[..., Columns]] = {
+    'detect_bos': wf_bos,
+    'detect_choch': wf_choch,
+    'detect_fvg': wf_fvg,
+    'detect_order_blocks': wf_order_blocks,
+    'detect_liquidity_zones': wf_liquidity_zones,
+    'detect_liquidity_sweep': wf_liquidity_sweep,
+    'detect_inducement': wf_inducement,
+    'compute_equilibrium_zone': wf_equilibrium,
+    'detect_killzones': wf_killzones,
+    'detect_mss': wf_mss,
+    'detect_breaker_blocks': wf_breaker_blocks,
+    'detect_confluence_zones': wf_confluence_zones,
+    'detect_mitigation_blocks': wf_mitigation_blocks,
+    'detect_liquidity_voids': wf_liquidity_voids,
+    'detect_stop_hunts': wf_stop_hunts,
+    'detect_multi_fvg': wf_multi_fvg,
+    'detect_order_flow_imbalance': wf_order_flow_imbalance,
+}
+
+
+def walk_forward_signals(df: pd.DataFrame, detectors: Iterable,
+                         params: Optional[Dict[str, Dict[str, Any]]] = None) -> pd.DataFrame:
+    """
+    Tabela de sinais por candle (ver convenções no topo do módulo).
+    - detectors: funções de core.patterns (ou seus nomes)
+    - params: {nome do detector: kwargs} opcionais
+    """
+    params = params or {}
+    a = ohlc_arrays(df)
+    columns: Columns = {}
+    for det in detectors:
+        name = det if isinstance(det, str) else det.__name__
+        try:
+            kernel = WALK_FORWARD_KERNELS[name]
+        except KeyError:
+            raise ValueError(f"Sem kernel walk-forward para: {name}")
+        columns.update(kernel(a, df.index, **params.get(name, {})))
+    return pd.DataFrame(columns, index=df.index)
@@ -0,0 +1,78 @@
+# benchmarks/compact_ohlc.py
+
+"""
+Memória e tempo dos detectores: DataFrame float64 vs CompactOHLC (ticks int32
+e float32). Uso:
+
+    python -m benchmarks.compact_ohlc --bars 2000000 --tick 0.01
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_ohlc
+from core import patterns
+from core.compact import CompactOHLC
+from core.kernels import OHLC_COLUMNS
+
+DETECTORS = [
+    'detect_choch', 'detect_fvg', 'detect_order_blocks', 'detect_liquidity_zones',
+    'detect_liquidity_sweep', 'detect_breaker_blocks', 'detect_mitigation_blocks',
+    'detect_liquidity_voids', 'detect_stop_hunts',
+]
+
+
+def synthetic_bars(n: int, tick: float, seed: int = 0) -> pd.DataFrame:
+    return synthetic_ohlc(n, seed=seed, tick=tick)[list(OHLC_COLUMNS)]
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(n: int, tick: float, repeat: int = 3, detectors: List[str] = DETECTORS) -> pd.DataFrame:
+    df = synthetic_bars(n, tick)
+    inputs: Dict[str, object] = {
+        'dataframe': df,
+        'ticks': CompactOHLC.from_frame(df, tick_size=tick, mode='ticks'),
+        'float32': CompactOHLC.from_frame(df, tick_size=tick, mode='float32'),
+    }
+    prices_df = int(df[['open', 'high', 'low', 'close']].memory_usage(index=False).sum())
+    memory = {'dataframe': prices_df,
+              'ticks': inputs['ticks'].nbytes - df.index.nbytes,
+              'float32': inputs['float32'].nbytes - df.index.nbytes}
+
+    rows = []
+    for name in detectors:
+        func = getattr(patterns, name)
+        row = {'detector': name}
+        for label, data in inputs.items():
+            row[label] = _best_of(lambda: func(data), repeat)
+        rows.append(row)
+    table = pd.DataFrame(rows).set_index('detector')
+    table.loc['preço (MB)'] = {k: v / 2**20 for k, v in memory.items()}
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bars', type=int, default=1_000_000)
+    parser.add_argument('--tick', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    table = run(args.bars, args.tick, args.repeat)
+    with pd.option_context('display.float_format', '{:.4f}'.format):
+        print(f"{args.bars:,} candles, tick {args.tick} (tempos em s, melhor de {args.repeat})")
+        print(table)
+
+
+if __name__ == '__main__':
+    main()
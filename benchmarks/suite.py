@@ -0,0 +1,179 @@
+# benchmarks/suite.py
+
+"""
+Benchmark dos detectores (DETECTORS_BY_LEVEL) e do run_backtest completo
+sobre séries sintéticas (benchmarks.synthetic), com baseline em JSON e
+portão de regressão.
+
+    # mede e grava a baseline
+    python -m benchmarks.suite --sizes 1000 100000 1000000 --save benchmarks/baseline.json
+    # mede e falha (exit 1) se algo ficou mais lento/pesado que a baseline
+    python -m benchmarks.suite --sizes 1000 100000 1000000 --check benchmarks/baseline.json
+
+Cada medida guarda o melhor tempo de `repeat` execuções e o pico de memória
+alocada (tracemalloc, numa execução separada para não distorcer o tempo).
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_ohlc
+from core.config import DETECTORS_BY_LEVEL
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_THRESHOLD = 0.25      # 25% mais lento que a baseline
+MIN_SECONDS = 0.005           # diferenças menores que isso são ruído
+MIN_MEGABYTES = 1.0
+SYMBOL, TIMEFRAME = 'SYNTH', 'M1'
+
+
+def measure(func: Callable[[], Any], repeat: int = 3, memory: bool = True) -> Dict[str, float]:
+    """{'seconds': melhor tempo, 'peak_mb': pico de alocação} de func()."""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    result = {'seconds': best}
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def _detectors(levels: Optional[Iterable[str]] = None) -> List[Callable]:
+    levels = list(levels or DETECTORS_BY_LEVEL)
+    seen, out = set(), []
+    for lvl in levels:
+        for det in DETECTORS_BY_LEVEL[lvl]:
+            if det.__name__ not in seen:
+                seen.add(det.__name__)
+                out.append(det)
+    return out
+
+
+def run_suite(sizes: Iterable[int] = DEFAULT_SIZES, repeat: int = 3, memory: bool = True,
+              levels: Optional[Iterable[str]] = None, backtest: bool = True, seed: int = 0,
+              progress: Optional[Callable[[str], None]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Mede cada detector (e run_backtest, com os dados num ParquetStore temporário)
+    para cada tamanho de série. Retorna {'<nome>@<candles>': medida}.
+    """
+    from backtest.engine import run_backtest
+    from data.store import ParquetStore
+
+    detectors = _detectors(levels)
+    levels = list(levels or DETECTORS_BY_LEVEL)
+    results: Dict[str, Dict[str, float]] = {}
+    for n in sizes:
+        df = synthetic_ohlc(n, seed=seed)
+        for det in detectors:
+            key = f"{det.__name__}@{n}"
+            results[key] = measure(lambda: det(df), repeat, memory)
+            if progress:
+                progress(f"{key}: {results[key]['seconds']:.4f}s")
+        if backtest:
+            with tempfile.TemporaryDirectory() as root:
+                ParquetStore(root).write(SYMBOL, TIMEFRAME, df)
+                start, end = df.index[0], df.index[-1]
+                key = f"run_backtest@{n}"
+                results[key] = measure(lambda: run_backtest(root, SYMBOL, TIMEFRAME, start, end, levels),
+                                       repeat, memory)
+                if progress:
+                    progress(f"{key}: {results[key]['seconds']:.4f}s")
+    return results
+
+
+def environment() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def save_baseline(results: Dict[str, Dict[str, float]], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': environment(), 'results': results}, f, indent=1, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float = DEFAULT_THRESHOLD, memory_threshold: Optional[float] = None,
+            min_seconds: float = MIN_SECONDS, min_megabytes: float = MIN_MEGABYTES) -> pd.DataFrame:
+    """
+    Tabela comparando medidas presentes nas duas execuções. `regressed` é True
+    quando o tempo passa de baseline * (1 + threshold) (e a diferença absoluta
+    passa de min_seconds) ou, com memory_threshold, o mesmo para o pico de memória.
+    """
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    rows = []
+    for key in sorted(set(current) & set(baseline)):
+        cur, base = current[key], baseline[key]
+        ratio = cur['seconds'] / base['seconds'] if base['seconds'] > 0 else float('inf')
+        slow = (cur['seconds'] > base['seconds'] * (1 + threshold)
+                and cur['seconds'] - base['seconds'] > min_seconds)
+        heavy = False
+        if 'peak_mb' in cur and 'peak_mb' in base:
+            heavy = (cur['peak_mb'] > base['peak_mb'] * (1 + memory_threshold)
+                     and cur['peak_mb'] - base['peak_mb'] > min_megabytes)
+        name, _, size = key.rpartition('@')
+        rows.append({'benchmark': name, 'bars': int(size), 'seconds': cur['seconds'],
+                     'baseline_seconds': base['seconds'], 'ratio': ratio,
+                     'peak_mb': cur.get('peak_mb'), 'baseline_peak_mb': base.get('peak_mb'),
+                     'regressed': slow or heavy})
+    return pd.DataFrame(rows, columns=['benchmark', 'bars', 'seconds', 'baseline_seconds', 'ratio',
+                                       'peak_mb', 'baseline_peak_mb', 'regressed'])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dos detectores SMC")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--levels', nargs='+', default=None, help="níveis de DETECTORS_BY_LEVEL")
+    parser.add_argument('--no-memory', action='store_true', help="não mede pico de memória")
+    parser.add_argument('--no-backtest', action='store_true', help="não mede run_backtest")
+    parser.add_argument('--save', metavar='JSON', help="grava as medidas como baseline")
+    parser.add_argument('--check', metavar='JSON', help="compara com a baseline e falha em regressão")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.repeat, memory=not args.no_memory, levels=args.levels,
+                        backtest=not args.no_backtest, progress=print)
+    if args.save:
+        save_baseline(results, args.save)
+        print(f"baseline gravada em {args.save}")
+    if args.check:
+        report = compare(results, load_baseline(args.check), threshold=args.threshold)
+        with pd.option_context('display.max_rows', None, 'display.width', 160):
+            print(report.to_string(index=False))
+        regressed = report[report['regressed']]
+        if len(regressed):
+            print(f"{len(regressed)} regressão(ões) acima de {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# core/compact.py
+
+"""
+Representação compacta de OHLC para séries longas.
+Os detectores só precisam de precisão até o tick do instrumento, então os
+preços podem ser guardados como:
+- 'ticks': int32 com o número de ticks (preço = ticks * tick_size), 4 bytes
+  por valor e comparações exatas
+- 'float32': metade da memória de float64, com erro de arredondamento menor
+  que meio tick para os preços usuais
+CompactOHLC é aceito diretamente por todos os detectores de core.patterns:
+os kernels rodam na unidade nativa (ticks ou float32), tolerâncias são
+convertidas para essa unidade (ver `tolerance`) e os preços devolvidos nos
+resultados são decodificados para float.
+"""
+
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from core.kernels import OHLC_COLUMNS, OHLCArrays
+
+MODES = ('ticks', 'float32')
+
+
+class _ILoc:
+    def __init__(self, owner: "CompactOHLC"):
+        self._owner = owner
+
+    def __getitem__(self, key) -> "CompactOHLC":
+        if not isinstance(key, slice):
+            raise TypeError("CompactOHLC.iloc aceita apenas fatias")
+        o = self._owner
+        return CompactOHLC(*(v[key] for v in o.native_arrays()), tick_size=o.tick_size,
+                           index=None if o.index is None else o.index[key], symbol=o.symbol)
+
+
+class CompactOHLC:
+    """
+    Colunas OHLC compactas + metadados para decodificar.
+    - open/high/low/close: arrays int32 (modo 'ticks') ou float32
+    - tick_size: tamanho do tick (obrigatório em 'ticks'; em 'float32' define
+      o piso das tolerâncias)
+    - index: DatetimeIndex opcional (killzones e relatórios)
+    Compatível com o acesso usado pelos detectores: c['high'] (Series
+    decodificada), c.index, c.iloc[a:b] e len(c).
+    """
+
+    def __init__(self, open, high, low, close, tick_size: Optional[float] = None,
+                 index: Optional[pd.Index] = None, symbol: Optional[str] = None):
+        self.open, self.high, self.low, self.close = (np.ascontiguousarray(v) for v in (open, high, low, close))
+        self.mode = 'ticks' if np.issubdtype(self.close.dtype, np.integer) else 'float32'
+        if self.mode == 'ticks' and not tick_size:
+            raise ValueError("tick_size é obrigatório para preços em ticks")
+        self.tick_size = tick_size
+        self.index = index
+        self.symbol = symbol
+        self.iloc = _ILoc(self)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, tick_size: Optional[float] = None, mode: str = 'ticks',
+                   symbol: Optional[str] = None) -> "CompactOHLC":
+        """
+        Compacta um DataFrame OHLC. Em 'ticks', os preços são arredondados para
+        o tick mais próximo; levanta ValueError se algum não couber em int32.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Modo desconhecido: {mode} (use {MODES})")
+        index = df.index if isinstance(df.index, pd.DatetimeIndex) else None
+        if mode == 'float32':
+            cols = [df[c].to_numpy(dtype=np.float32) for c in OHLC_COLUMNS]
+            return cls(*cols, tick_size=tick_size, index=index, symbol=symbol)
+        if not tick_size:
+            raise ValueError("tick_size é obrigatório no modo 'ticks'")
+        cols = []
+        limit = np.iinfo(np.int32)
+        for c in OHLC_COLUMNS:
+            ticks = np.rint(df[c].to_numpy(dtype=np.float64) / tick_size)
+            if len(ticks) and (np.nanmax(ticks) > limit.max or np.nanmin(ticks) < limit.min):
+                raise ValueError(f"Preços de '{c}' não cabem em int32 com tick_size={tick_size}")
+            cols.append(ticks.astype(np.int32))
+        return cls(*cols, tick_size=tick_size, index=index, symbol=symbol)
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    @property
+    def nbytes(self) -> int:
+        index = self.index.nbytes if self.index is not None else 0
+        return sum(v.nbytes for v in self.native_arrays()) + index
+
+    def native_arrays(self) -> OHLCArrays:
+        """Colunas na unidade nativa (sem cópia), como consumidas pelos kernels."""
+        return OHLCArrays(self.open, self.high, self.low, self.close)
+
+    def decode(self, values: Union[np.ndarray, float]) -> Union[np.ndarray, float]:
+        """Unidade nativa -> preço float64."""
+        values = np.asarray(values, dtype=np.float64)
+        if self.mode == 'ticks':
+            values = values * self.tick_size
+        elif self.tick_size:
+            # float32 volta para o grid do tick
+            values = np.rint(values / self.tick_size) * self.tick_size
+        return values if values.ndim else float(values)
+
+    def to_native(self, price: Union[np.ndarray, float]) -> Union[np.ndarray, float]:
+        """Preço (ou distância de preço) -> unidade nativa, sem arredondar."""
+        if self.mode == 'ticks':
+            return np.asarray(price, dtype=np.float64) / self.tick_size
+        return price
+
+    def tolerance(self, tol: float) -> float:
+        """
+        Tolerância de preço na unidade nativa, ciente do tick:
+        - 'ticks': tol / tick_size (abaixo de 1 tick equivale a igualdade exata)
+        - 'float32': no mínimo meio tick (ou o erro de arredondamento do float32
+          no maior preço, sem tick_size), para que preços iguais no tick
+          continuem iguais depois da conversão
+        """
+        if self.mode == 'ticks':
+            return tol / self.tick_size
+        if self.tick_size:
+            floor = self.tick_size / 2
+        else:
+            scale = float(np.nanmax(np.abs(self.high))) if len(self) else 0.0
+            floor = float(np.finfo(np.float32).eps) * scale
+        return max(tol, floor)
+
+    def price_tolerance(self, tol: float) -> float:
+        """
+        Tolerância para comparar preços já decodificados (ex.: confluência).
+        Só float32 sem tick_size precisa de piso: nos demais casos a
+        decodificação cai exatamente no grid do tick.
+        """
+        if self.mode == 'ticks' or self.tick_size:
+            return tol
+        return self.tolerance(tol)
+
+    def __getitem__(self, column: str) -> pd.Series:
+        if column not in OHLC_COLUMNS:
+            raise KeyError(column)
+        return pd.Series(self.decode(getattr(self, column)), index=self.index, name=column)
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame float64 equivalente (preços decodificados)."""
+        return pd.DataFrame({c: self.decode(getattr(self, c)) for c in OHLC_COLUMNS}, index=self.index)
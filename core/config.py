@@ -29,6 +29,9 @@ ASSETS: List[str] = ["BTCUSD", "XAUUSD", "EURUSD", "USDJPY"]
 # 2) timeframes permitidos
 TIMEFRAMES: List[str] = ["M1", "M5", "M15", "H1", "D1"]
 
+# duração de cada timeframe em minutos (base M1 para o resampling em data.resample)
+TIMEFRAME_MINUTES: Dict[str, int] = {"M1": 1, "M5": 5, "M15": 15, "M30": 30, "H1": 60, "H4": 240, "D1": 1440}
+
 # 3) data-padrão de início para backtest
 START_DATE: datetime = datetime(2020, 1, 1)
 
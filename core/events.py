@@ -0,0 +1,79 @@
+# core/events.py
+
+"""
+Saída colunar dos detectores de zona (opção as_table=True em core.patterns).
+Em vez de uma lista de dicts por evento, o detector devolve um array
+estruturado NumPy com um registro por evento:
+
+    index  int64    candle do evento
+    side   int8     +1 bull/bullish, -1 bear/bearish
+    lower  float64  limite inferior da zona
+    upper  float64  limite superior da zona
+
+O array é montado por indexação vetorizada (nenhum objeto Python por evento).
+to_legacy converte de volta para o formato de dicts de cada detector e
+to_frame para DataFrame.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+EVENT_DTYPE = np.dtype([('index', np.int64), ('side', np.int8), ('lower', np.float64), ('upper', np.float64)])
+BULL, BEAR = 1, -1
+
+# detector -> (chave do lado, rótulo bull, rótulo bear, formato da zona)
+# formato 'edges': chaves 'lower'/'upper' (FVG); 'zone': tupla (lower, upper)
+LEGACY_FORMATS: Dict[str, tuple] = {
+    'detect_fvg': ('side', 'bull', 'bear', 'edges'),
+    'detect_order_blocks': ('side', 'bull', 'bear', 'zone'),
+    'detect_breaker_blocks': ('type', 'bullish', 'bearish', 'zone'),
+    'detect_mitigation_blocks': ('type', 'bullish', 'bearish', 'zone'),
+    'detect_liquidity_voids': ('type', 'bullish', 'bearish', 'zone'),
+}
+
+
+def event_table(index: np.ndarray, is_bear: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """Monta a tabela de eventos a partir das colunas (mesmo comprimento)."""
+    table = np.empty(len(index), dtype=EVENT_DTYPE)
+    table['index'] = index
+    table['side'] = np.where(is_bear, BEAR, BULL)
+    table['lower'] = lower
+    table['upper'] = upper
+    return table
+
+
+def is_event_table(obj: Any) -> bool:
+    return isinstance(obj, np.ndarray) and obj.dtype == EVENT_DTYPE
+
+
+def event_levels(events) -> List[float]:
+    """
+    Limites das zonas na ordem (lower, upper) de cada evento, para tabelas ou
+    listas legadas (chaves 'lower'/'upper' ou tupla 'zone').
+    """
+    if is_event_table(events):
+        return np.column_stack([events['lower'], events['upper']]).ravel().tolist()
+    return [edge for ev in events
+            for edge in (ev['zone'] if 'zone' in ev else (ev['lower'], ev['upper']))]
+
+
+def to_legacy(table: np.ndarray, detector: str) -> List[Dict[str, Any]]:
+    """Tabela de eventos -> lista de dicts no formato original de `detector`."""
+    key, bull, bear, fmt = LEGACY_FORMATS[detector]
+    sides = [bear if s == BEAR else bull for s in table['side'].tolist()]
+    idx, lower, upper = table['index'].tolist(), table['lower'].tolist(), table['upper'].tolist()
+    if fmt == 'edges':
+        return [{key: s, 'lower': lo, 'upper': hi, 'index': i}
+                for s, lo, hi, i in zip(sides, lower, upper, idx)]
+    if detector == 'detect_order_blocks':
+        return [{key: s, 'zone': (lo, hi), 'index': i}
+                for s, lo, hi, i in zip(sides, lower, upper, idx)]
+    return [{'index': i, key: s, 'zone': (lo, hi)}
+            for s, lo, hi, i in zip(sides, lower, upper, idx)]
+
+
+def to_frame(table: np.ndarray) -> pd.DataFrame:
+    """Tabela de eventos -> DataFrame com colunas index, side, lower, upper."""
+    return pd.DataFrame({name: table[name] for name in EVENT_DTYPE.names})
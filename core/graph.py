@@ -0,0 +1,123 @@
+# core/graph.py
+
+"""
+Execução dos detectores como DAG com resultados intermediários compartilhados.
+Detectores compostos declaram de quais detectores dependem (DETECTOR_INPUTS)
+e de quais parâmetros essas entradas derivariam (INPUT_SOURCES);
+DetectorGraph calcula cada nó uma única vez por DataFrame e conjunto de
+parâmetros e repassa o resultado como argumento, sem recalcular OB, FVG,
+liquidez, BOS/CHoCH ou sweeps dentro de outros detectores.
+"""
+
+import hashlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core import patterns
+
+# detector -> {parâmetro: detector que o fornece (com parâmetros padrão)}
+DETECTOR_INPUTS: Dict[str, Dict[str, str]] = {
+    'detect_mss': {'bos': 'detect_bos', 'choch': 'detect_choch'},
+    'detect_multi_fvg': {'gaps': 'detect_fvg'},
+    'detect_inducement': {'sweeps': 'detect_liquidity_sweep'},
+    'detect_confluence_zones': {
+        'order_blocks': 'detect_order_blocks',
+        'fvgs': 'detect_fvg',
+        'liquidity_zones': 'detect_liquidity_zones',
+    },
+}
+
+# parâmetros do chamador dos quais uma entrada derivaria: se algum vier em
+# params, a entrada não é injetada e o próprio detector a calcula a partir dele
+INPUT_SOURCES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    'detect_inducement': {'sweeps': ('zones',)},
+    'detect_multi_fvg': {'gaps': ('as_table',)},
+}
+
+NodeKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+def _param_key(value: Any) -> Any:
+    """
+    Chave de cache de um parâmetro. Arrays e objetos do pandas entram pelo
+    hash do conteúdo (o repr deles é truncado em séries grandes).
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            return ('ndarray', value.shape, tuple(_param_key(v) for v in value.ravel().tolist()))
+        digest = hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return ('ndarray', value.dtype.str, value.shape, digest)
+    if isinstance(value, (pd.Series, pd.DataFrame, pd.Index)):
+        names = list(value.columns) if isinstance(value, pd.DataFrame) else value.name
+        digest = hashlib.sha1(pd.util.hash_pandas_object(value).to_numpy().tobytes()).hexdigest()
+        return (type(value).__name__, repr(names), value.shape, digest)
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_param_key(v) for v in value))
+    if isinstance(value, dict):
+        return ('dict', tuple((repr(k), _param_key(v)) for k, v in value.items()))
+    return repr(value)
+
+
+def _freeze(params: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple(sorted((k, _param_key(v)) for k, v in params.items()))
+
+
+class DetectorGraph:
+    """
+    DAG de detectores sobre um DataFrame.
+    - get(nome, **params): resultado memoizado do nó (dependências resolvidas antes)
+    - run(detectores): {nome: resultado} na ordem pedida
+    `computed` guarda os nós efetivamente calculados, em ordem.
+    Com `profiler` (backtest.profiling.DetectorProfiler), cada nó calculado é
+    medido sem incluir o tempo das dependências.
+    """
+
+    def __init__(self, df: pd.DataFrame, profiler=None):
+        self.df = df
+        self.profiler = profiler
+        self.cache: Dict[NodeKey, Any] = {}
+        self.computed: List[NodeKey] = []
+        self._active: set = set()
+
+    def get(self, name: str, **params) -> Any:
+        key = (name, _freeze(params))
+        if key in self.cache:
+            return self.cache[key]
+        if key in self._active:
+            raise ValueError(f"Dependência circular em {name}")
+        self._active.add(key)
+        try:
+            func: Callable = getattr(patterns, name)
+            sources = INPUT_SOURCES.get(name, {})
+            inputs = {arg: self.get(dep)
+                      for arg, dep in DETECTOR_INPUTS.get(name, {}).items()
+                      if arg not in params and not any(p in params for p in sources.get(arg, ()))}
+            if self.profiler is None:
+                result = func(self.df, **inputs, **params)
+            else:
+                with self.profiler.measure(name, ', '.join(f"{k}={v}" for k, v in key[1])) as box:
+                    box['result'] = result = func(self.df, **inputs, **params)
+        finally:
+            self._active.discard(key)
+        self.cache[key] = result
+        self.computed.append(key)
+        return result
+
+    def forget(self, name: str, **params):
+        """Descarta o resultado memoizado de um nó; as dependências continuam em cache."""
+        self.cache.pop((name, _freeze(params)), None)
+
+    def run(self, detectors: Iterable, params: Optional[Dict[str, Dict[str, Any]]] = None,
+            progress_callback=None) -> Dict[str, Any]:
+        params = params or {}
+        detectors = list(detectors)
+        total = len(detectors)
+        results = {}
+        for i, det in enumerate(detectors, start=1):
+            name = det if isinstance(det, str) else det.__name__
+            results[name] = self.get(name, **params.get(name, {}))
+            if progress_callback:
+                progress_callback(int(i / total * 100))
+        return results
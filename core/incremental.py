@@ -0,0 +1,309 @@
+# core/incremental.py
+
+"""
+Estruturas incrementais (com estado) que mantêm, evento a evento, o mesmo
+resultado dos kernels batch de core.kernels sobre o prefixo já visto:
+- LiquidityClusters: agrupamento de detect_liquidity_zones (cluster_levels)
+- ConfluenceLevels: seleção de confluence_select sob inserções e remoções
+Usadas pelos detectores de core.streaming e por backtest.walk_forward;
+core.kernels fica só com funções puras sobre arrays.
+"""
+
+import heapq
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class LiquidityClusters:
+    """
+    Agrupamento de detect_liquidity_zones mantido candle a candle: depois de
+    update(high, low, t) para cada candle, zones() é igual ao batch sobre o
+    prefixo (concat([highs, lows]) com âncoras fixas, cluster_levels).
+    Como no batch os highs vêm antes dos lows, um high novo só entra entre as
+    âncoras de highs; se virar âncora, os lows livres (sem âncora de high a
+    até `tol`) ao seu alcance passam para ela e só a cadeia de lows livres em
+    volta é reagrupada. Os demais casos são O(log k) com bisect.
+    `capacity` limita as âncoras mantidas (descarta a tocada há mais tempo;
+    a partir daí o resultado é aproximado).
+    """
+
+    def __init__(self, tol: float, min_touches: int = 2, capacity: Optional[int] = None):
+        self.tol = tol
+        self.min_touches = min_touches
+        self.capacity = capacity
+        self.owner: Dict[float, float] = {}   # preço distinto -> âncora
+        self.mult: Dict[float, int] = {}      # ocorrências do preço
+        self.first: Dict[float, tuple] = {}   # posição no batch: (0, t) high, (1, t) low
+        # âncora -> [toques, posição no batch, preços do cluster], da tocada há mais tempo
+        self.anchors: "OrderedDict[float, list]" = OrderedDict()
+        self.high_anchors: List[float] = []   # ordenadas
+        self.low_anchors: List[float] = []
+        self.free: List[float] = []           # lows sem âncora de high a até tol, ordenados
+        self.n_zones = 0
+        self._changed: Dict[float, Tuple[bool, tuple]] = {}
+
+    def update(self, high: float, low: float, t: int) -> Tuple[list, list]:
+        """
+        Acrescenta o candle t. Retorna (entraram, saíram): pares (nível, posição
+        no batch) das zonas que passaram a existir ou deixaram de existir; uma
+        zona que muda de posição aparece nas duas listas.
+        """
+        self._changed = {}
+        self._add(float(high), 0, t)
+        self._add(float(low), 1, t)
+        self._evict()
+        added, removed = [], []
+        for a, (was, old_key) in self._changed.items():
+            e = self.anchors.get(a)
+            now = e is not None and e[0] >= self.min_touches
+            moved = e is not None and e[1] != old_key
+            if was and (not now or moved):
+                removed.append((a, old_key))
+            if now and (not was or moved):
+                added.append((a, e[1]))
+        self.n_zones += len(added) - len(removed)
+        return added, removed
+
+    def zones(self) -> Dict[float, int]:
+        """{nível: toques} das zonas com toques >= min_touches, na ordem do batch."""
+        live = sorted((e[1], a, e[0]) for a, e in self.anchors.items() if e[0] >= self.min_touches)
+        return {a: n for _, a, n in live}
+
+    def _mark(self, a: float):
+        if a not in self._changed:
+            e = self.anchors.get(a)
+            self._changed[a] = (False, ()) if e is None else (e[0] >= self.min_touches, e[1])
+
+    def _earliest(self, seq: List[float], v: float) -> Optional[float]:
+        """Âncora mais antiga a até tol de v (as âncoras distam mais que tol entre si)."""
+        k = bisect_left(seq, v)
+        best = None
+        if k > 0 and v - seq[k - 1] <= self.tol:
+            best = seq[k - 1]
+        if k < len(seq) and seq[k] - v <= self.tol:
+            if best is None or self.anchors[seq[k]][1] < self.anchors[best][1]:
+                best = seq[k]
+        return best
+
+    def _join(self, v: float, a: float):
+        self._mark(a)
+        e = self.anchors[a]
+        e[0] += self.mult[v]
+        e[2].add(v)
+        self.owner[v] = a
+        self.anchors.move_to_end(a)
+
+    def _create(self, v: float, seq: List[float]):
+        self._mark(v)
+        self.anchors[v] = [0, self.first[v], set()]
+        insort(seq, v)
+
+    def _add(self, v: float, kind: int, t: int):
+        if v != v:  # NaN
+            return
+        a = self.owner.get(v)
+        if a is not None:
+            self.mult[v] += 1
+            if kind == 0 and self.first[v][0] == 1:
+                self.first[v] = (0, t)
+                if self.anchors[a][1][0] == 1:
+                    # low livre visto agora como high: vira âncora de high
+                    self._high_anchor(v)
+                    return
+            self._mark(a)
+            self.anchors[a][0] += 1
+            self.anchors.move_to_end(a)
+            return
+        self.first[v] = (kind, t)
+        self.mult[v] = 1
+        a = self._earliest(self.high_anchors, v)
+        if a is not None:
+            self._join(v, a)
+        elif kind == 0:
+            self._high_anchor(v)
+        else:
+            insort(self.free, v)
+            a = self._earliest(self.low_anchors, v)
+            if a is None:
+                self._create(v, self.low_anchors)
+                a = v
+            self._join(v, a)
+
+    def _high_anchor(self, v: float):
+        free, tol = self.free, self.tol
+        k = bisect_left(free, v)
+        lo, hi = k, k
+        while lo > 0 and v - free[lo - 1] <= tol:
+            lo -= 1
+        while hi < len(free) and free[hi] - v <= tol:
+            hi += 1
+        start, end = lo, hi
+        if lo < hi:
+            while start > 0 and free[start] - free[start - 1] <= tol:
+                start -= 1
+            while end < len(free) and free[end] - free[end - 1] <= tol:
+                end += 1
+        left, covered, right = free[start:lo], free[lo:hi], free[hi:end]
+        for a in {self.owner[p] for p in free[start:end]}:
+            self._mark(a)
+            del self.anchors[a]
+            del self.low_anchors[bisect_left(self.low_anchors, a)]
+        del free[lo:hi]
+        self._create(v, self.high_anchors)
+        for p in set(covered) | {v}:
+            self._join(p, v)
+        for p in sorted(left + right, key=self.first.__getitem__):
+            a = self._earliest(self.low_anchors, p)
+            if a is None:
+                self._create(p, self.low_anchors)
+                a = p
+            self._join(p, a)
+
+    def _evict(self):
+        if self.capacity is None:
+            return
+        while len(self.anchors) > self.capacity:
+            a = next(iter(self.anchors))
+            self._mark(a)
+            _, key, members = self.anchors.pop(a)
+            seq = self.high_anchors if key[0] == 0 else self.low_anchors
+            del seq[bisect_left(seq, a)]
+            for p in members:
+                if key[0] == 1:
+                    del self.free[bisect_left(self.free, p)]
+                del self.owner[p], self.mult[p], self.first[p]
+
+
+class ConfluenceLevels:
+    """
+    Seleção de confluence_select mantida sob inserções e remoções de níveis.
+    Cada nível leva a posição que teria na lista do batch (`key`). Um nível é
+    aceito se tem vizinho a até `tol` e nenhum aceito de key menor está a até
+    `tol`; a cada mudança só são reavaliados, em ordem de key, os níveis cuja
+    resposta pode ter mudado (vizinhos imediatos e os afetados em cascata).
+    Os níveis ficam agrupados por preço distinto, como costumam cair no grid
+    do tick.
+    """
+
+    def __init__(self, tol: float):
+        self.tol = tol
+        self.values: List[float] = []               # preços distintos, ordenados
+        self.keys: Dict[float, List[tuple]] = {}    # preço -> keys ordenadas
+        self.accepted: set = set()
+        self._taken: List[Tuple[float, tuple]] = []   # aceitos, ordenados
+
+    def add(self, level: float, key: tuple) -> List[Tuple[float, tuple]]:
+        """Insere o nível; retorna os níveis que passaram a ser aceitos."""
+        v = float(level)
+        if v != v:
+            return []
+        keys = self.keys.get(v)
+        if keys is None:
+            self.keys[v] = [key]
+            insort(self.values, v)
+        else:
+            insort(keys, key)
+        return self._settle([(v, key)] + self._lonely(v))
+
+    def remove(self, level: float, key: tuple) -> List[Tuple[float, tuple]]:
+        """Retira o nível; retorna os níveis que passaram a ser aceitos."""
+        v = float(level)
+        keys = self.keys.get(v)
+        if keys is None:
+            return []
+        k = bisect_left(keys, key)
+        if k == len(keys) or keys[k] != key:
+            return []
+        del keys[k]
+        if not keys:
+            del self.keys[v]
+            del self.values[bisect_left(self.values, v)]
+        queue = self._lonely(v)
+        if (v, key) in self.accepted:
+            self._set((v, key), False)
+            queue += [it for it in self._near(v) if it[1] > key]
+        return self._settle(queue)
+
+    def selected(self) -> List[float]:
+        """Níveis aceitos na ordem do batch."""
+        return [lvl for lvl, _ in sorted(self.accepted, key=lambda it: it[1])]
+
+    def _lonely(self, v: float) -> List[Tuple[float, tuple]]:
+        """Níveis cuja candidatura pode mudar com uma mudança em v: em v e nos preços vizinhos."""
+        k = bisect_left(self.values, v)
+        out = [(v, key) for key in self.keys.get(v, ())[:2]]
+        for j in (k - 1, k + 1 if out else k):
+            if 0 <= j < len(self.values):
+                keys = self.keys[self.values[j]]
+                if len(keys) == 1:
+                    out.append((self.values[j], keys[0]))
+        return out
+
+    def _taken_near(self, item: Tuple[float, tuple]) -> List[Tuple[float, tuple]]:
+        """Aceitos a até tol de `item`, sem ele próprio."""
+        t, v, tol = self._taken, item[0], self.tol
+        k = bisect_left(t, item)
+        out = []
+        j = k - 1
+        while j >= 0 and v - t[j][0] <= tol:
+            out.append(t[j])
+            j -= 1
+        j = k
+        while j < len(t) and t[j][0] - v <= tol:
+            if t[j] != item:
+                out.append(t[j])
+            j += 1
+        return out
+
+    def _near(self, v: float) -> List[Tuple[float, tuple]]:
+        """Níveis a até tol de v (inclusive os de preço v)."""
+        s, tol = self.values, self.tol
+        k = bisect_left(s, v)
+        lo, hi = k, k
+        while lo > 0 and v - s[lo - 1] <= tol:
+            lo -= 1
+        while hi < len(s) and s[hi] - v <= tol:
+            hi += 1
+        return [(p, key) for p in s[lo:hi] for key in self.keys[p]]
+
+    def _wanted(self, item: Tuple[float, tuple]) -> bool:
+        v, key = item
+        s, tol = self.values, self.tol
+        k = bisect_left(s, v)
+        if not (len(self.keys[v]) > 1
+                or (k > 0 and v - s[k - 1] <= tol)
+                or (k + 1 < len(s) and s[k + 1] - v <= tol)):
+            return False
+        return all(it[1] > key for it in self._taken_near(item))
+
+    def _set(self, item: Tuple[float, tuple], accept: bool):
+        if accept:
+            self.accepted.add(item)
+            insort(self._taken, item)
+        else:
+            self.accepted.discard(item)
+            del self._taken[bisect_left(self._taken, item)]
+
+    def _settle(self, queue: List[Tuple[float, tuple]]) -> List[Tuple[float, tuple]]:
+        heap = [(it[1], it[0]) for it in queue]
+        heapq.heapify(heap)
+        before: Dict[Tuple[float, tuple], bool] = {}
+        while heap:
+            key, v = heapq.heappop(heap)
+            keys = self.keys.get(v)
+            if keys is None or keys[min(bisect_left(keys, key), len(keys) - 1)] != key:
+                continue
+            item = (v, key)
+            now = item in self.accepted
+            want = self._wanted(item)
+            if want == now:
+                continue
+            before.setdefault(item, now)
+            self._set(item, want)
+            # aceitar só derruba aceitos de key maior; sair pode liberar qualquer vizinho de key maior
+            affected = self._taken_near(item) if want else self._near(v)
+            for it in affected:
+                if it[1] > key:
+                    heapq.heappush(heap, (it[1], it[0]))
+        return [it for it, was in before.items() if not was and it in self.accepted]
@@ -0,0 +1,364 @@
+# core/kernels.py
+
+"""
+Kernels vetorizados sobre colunas OHLC.
+As colunas são extraídas uma única vez como arrays NumPy contíguos (OHLCArrays)
+e cada detector de core.patterns é expresso como máscaras booleanas sobre
+arrays deslocados, sem df.iloc por candle.
+"""
+
+from bisect import bisect_left, insort
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+OHLC_COLUMNS = ('open', 'high', 'low', 'close')
+
+
+class OHLCArrays(NamedTuple):
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+
+def ohlc_arrays(df) -> OHLCArrays:
+    """
+    Extrai as colunas OHLC como arrays contíguos.
+    Aceita DataFrame, um OHLCArrays já extraído (retornado sem cópia) ou um
+    container compacto (core.compact.CompactOHLC, na unidade nativa dele).
+    """
+    if isinstance(df, OHLCArrays):
+        return df
+    if hasattr(df, 'native_arrays'):
+        return df.native_arrays()
+    return OHLCArrays(*(np.ascontiguousarray(df[col].to_numpy()) for col in OHLC_COLUMNS))
+
+
+def fvg_masks(a: OHLCArrays) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    FVG na janela (i, i+2), para i em [0, n-2):
+    bull: high[i] < low[i+2]; bear (só se não bull): low[i] > high[i+2].
+    """
+    bull = a.high[:-2] < a.low[2:]
+    bear = ~bull & (a.low[:-2] > a.high[2:])
+    return bull, bear
+
+
+def order_block_masks(a: OHLCArrays, min_range: float, lookback: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Order Blocks no candle j = i-1, para i em [1, min(n-1, lookback)):
+    bull: j bearish e close[j+2] > high[j]; bear: j bullish e close[j+2] < low[j].
+    """
+    m = max(min(len(a) - 1, lookback) - 1, 0)
+    o, h, l, c = a.open[:m], a.high[:m], a.low[:m], a.close[:m]
+    nxt_close = a.close[2:m + 2]
+    wide = (h - l) >= min_range
+    bull = (c < o) & (nxt_close > h) & wide
+    bear = (c > o) & (nxt_close < l) & wide
+    return bull, bear
+
+
+def breaker_masks(a: OHLCArrays, min_range: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Breaker Blocks no candle i, para i em [1, n-1) (máscaras de tamanho n-2):
+    bearish: low[i] < low[i-1] e close[i+1] > high[i];
+    bullish (só se não bearish): high[i] > high[i-1] e close[i+1] < low[i].
+    """
+    h, l = a.high[1:-1], a.low[1:-1]
+    nxt_close = a.close[2:]
+    wide = (h - l) >= min_range
+    bearish = (l < a.low[:-2]) & (nxt_close > h) & wide
+    bullish = ~bearish & (h > a.high[:-2]) & (nxt_close < l) & wide
+    return bearish, bullish
+
+
+def mitigation_masks(a: OHLCArrays) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mitigation Blocks no candle i, para i em [2, n) (máscaras de tamanho n-2):
+    bullish: high[i-1] > high[i-2] e close[i] <= high[i-2];
+    bearish: low[i-1] < low[i-2] e close[i] >= low[i-2].
+    """
+    h2, l2 = a.high[:-2], a.low[:-2]
+    c = a.close[2:]
+    bullish = (a.high[1:-1] > h2) & (c <= h2)
+    bearish = (a.low[1:-1] < l2) & (c >= l2)
+    return bullish, bearish
+
+
+def void_masks(a: OHLCArrays, tol: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Liquidity Voids no candle i, para i em [1, n) (máscaras de tamanho n-1):
+    bullish: low[i] > high[i-1] + tol; bearish: high[i] < low[i-1] - tol.
+    """
+    bullish = a.low[1:] > a.high[:-1] + tol
+    bearish = a.high[1:] < a.low[:-1] - tol
+    return bullish, bearish
+
+
+def stop_hunt_masks(a: OHLCArrays, wick_ratio: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stop Hunts no candle i, para i em [1, n) (máscaras de tamanho n-1):
+    lower: pavio inferior / range > wick_ratio e close <= open;
+    upper: pavio superior / range > wick_ratio e close >= open.
+    Candles com range zero são ignorados.
+    """
+    o, h, l, c = a.open[1:], a.high[1:], a.low[1:], a.close[1:]
+    rng = h - l
+    valid = rng != 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lower = valid & ((np.minimum(o, c) - l) / rng > wick_ratio) & (c <= o)
+        upper = valid & ((h - np.maximum(o, c)) / rng > wick_ratio) & (c >= o)
+    return lower, upper
+
+
+def bos_masks(a: OHLCArrays, lookback: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rompimentos de estrutura no candle t, para t >= lookback (máscaras de tamanho n):
+    up: close[t] > max(high[t-lookback:t]); down: close[t] < min(low[t-lookback:t]).
+    NaN é ignorado nos extremos, como em rolling().max().
+    """
+    n = len(a)
+    up = np.zeros(n, dtype=bool)
+    down = np.zeros(n, dtype=bool)
+    if n <= lookback or lookback < 1:
+        return up, down
+    prev_high = np.fmax.reduce(sliding_window_view(a.high[:-1], lookback), axis=1)
+    prev_low = np.fmin.reduce(sliding_window_view(a.low[:-1], lookback), axis=1)
+    c = a.close[lookback:]
+    up[lookback:] = c > prev_high
+    down[lookback:] = c < prev_low
+    return up, down
+
+
+def interleave(first: np.ndarray, second: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Junta duas máscaras alinhadas em (posição, origem), ordenado por posição
+    e com `first` antes de `second` na mesma posição.
+    Retorna (posições, is_second).
+    """
+    pos = np.flatnonzero(first | second)
+    both = first[pos] & second[pos]
+    pos = np.repeat(pos, 1 + both)
+    is_second = ~first[pos]
+    # quando ambas ocorrem, a segunda cópia da posição é a de `second`
+    dup = np.flatnonzero(np.diff(pos) == 0) + 1
+    is_second[dup] = True
+    return pos, is_second
+
+
+def average_true_range(a: OHLCArrays) -> float:
+    """
+    ATR médio da série: média do true range
+    max(high-low, |high-close[i-1]|, |low-close[i-1]|), ignorando NaN.
+    """
+    if len(a) == 0:
+        return 0.0
+    tr = a.high - a.low
+    if len(a) > 1:
+        prev_close = a.close[:-1]
+        tr = tr.astype(float)
+        tr[1:] = np.fmax(tr[1:], np.fmax(np.abs(a.high[1:] - prev_close),
+                                         np.abs(a.low[1:] - prev_close)))
+    return float(np.nanmean(tr)) if np.isfinite(tr).any() else 0.0
+
+
+def _anchor_of(uniq: np.ndarray, first: np.ndarray, tol: float) -> np.ndarray:
+    """
+    Âncora (posição em `uniq`) de cada preço distinto, com `first` = primeira
+    aparição de cada um. Depois da ordenação, cadeias de vizinhos a até `tol`
+    não interagem; numa cadeia com amplitude <= tol o primeiro a aparecer é a
+    âncora de todos, e só cadeias mais largas passam pelo laço com bisect
+    sobre as âncoras já criadas (no máximo uma a até `tol` de cada lado).
+    """
+    n = len(uniq)
+    new = np.empty(n, dtype=bool)
+    new[0] = True
+    new[1:] = np.diff(uniq) > tol
+    chain = np.cumsum(new) - 1
+    starts = np.flatnonzero(new)
+    ends = np.r_[starts[1:], n]
+    anchor = np.lexsort((first, chain))[starts][chain]
+    tight = (uniq[ends - 1] - uniq[starts]) <= tol
+    values, firsts = uniq.tolist(), first.tolist()
+    for st, en in zip(starts[~tight].tolist(), ends[~tight].tolist()):
+        members = st + np.argsort(first[st:en], kind='stable')
+        anchor_values: List[float] = []
+        anchor_pos: List[int] = []
+        for i in members.tolist():
+            v = values[i]
+            k = bisect_left(anchor_values, v)
+            best = -1
+            if k > 0 and v - anchor_values[k - 1] <= tol:
+                best = anchor_pos[k - 1]
+            if k < len(anchor_values) and anchor_values[k] - v <= tol:
+                right = anchor_pos[k]
+                if best < 0 or firsts[right] < firsts[best]:
+                    best = right
+            if best < 0:
+                anchor_values.insert(k, v)
+                anchor_pos.insert(k, i)
+                best = i
+            anchor[i] = best
+    return anchor
+
+
+def cluster_labels(prices: np.ndarray, tol: float) -> np.ndarray:
+    """
+    Cluster de cada preço com âncoras fixas, como o scan original de
+    detect_liquidity_zones: os preços distintos, na ordem da primeira
+    aparição, entram na âncora mais antiga a até `tol` ou viram uma nova
+    âncora. O rótulo é a ordem de criação da âncora (0, 1, ...) e só depende
+    dos preços anteriores, então acrescentar preços no fim não muda os
+    rótulos já dados. NaN recebe -1.
+    """
+    prices = np.asarray(prices)
+    labels = np.full(len(prices), -1, dtype=np.int64)
+    valid = np.flatnonzero(~np.isnan(prices)) if prices.dtype.kind == 'f' else np.arange(len(prices))
+    if len(valid) == 0:
+        return labels
+    uniq, first, inverse = np.unique(prices[valid], return_index=True, return_inverse=True)
+    anchor = _anchor_of(uniq, first, tol)
+    # âncoras numeradas pela ordem de criação (= primeira aparição)
+    created = np.unique(anchor)
+    rank = np.empty(len(uniq), dtype=np.int64)
+    rank[created[np.argsort(first[created], kind='stable')]] = np.arange(len(created))
+    labels[valid] = rank[anchor][inverse.ravel()]
+    return labels
+
+
+def cluster_levels(prices: np.ndarray, tol: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Zonas de cluster_labels: (níveis, toques) na ordem de criação das âncoras,
+    cada zona representada pelo preço da âncora (o primeiro preço da zona).
+    NaN é descartado.
+    """
+    prices = np.asarray(prices)
+    if prices.dtype.kind == 'f':
+        prices = prices[~np.isnan(prices)]
+    if len(prices) == 0:
+        return prices[:0], np.array([], dtype=np.int64)
+    labels = cluster_labels(prices, tol)
+    _, anchor_pos, touches = np.unique(labels, return_index=True, return_counts=True)
+    return prices[anchor_pos], touches
+
+
+def sweep_events(a: OHLCArrays, zones: np.ndarray, body_ratio: float,
+                 tol: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Liquidity Sweeps com índice ordenado de zonas.
+    Os níveis distintos de `zones` ficam ordenados; para cada candle elegível
+    (i >= 1, range != 0, corpo/range <= body_ratio) uma busca binária encontra
+    só as zonas dentro de [low, high], e apenas essas passam pelo teste de close:
+    up:   high > z + tol e close < z - tol
+    down: low  < z - tol e close > z + tol
+    Retorna (índice do candle, posição da zona em `zones`, is_down), ordenado por
+    candle e pela ordem original das zonas (zonas repetidas contam uma vez).
+    Com tol < 0 as duas condições podem valer juntas; como no laço original,
+    vale 'up' (testado primeiro).
+    """
+    empty = np.array([], dtype=np.int64)
+    z = np.asarray(zones, dtype=float)
+    levels, first_pos = np.unique(z, return_index=True)
+    keep = ~np.isnan(levels)
+    levels, first_pos = levels[keep], first_pos[keep]
+    if len(a) < 2 or len(levels) == 0:
+        return empty, empty, empty.astype(bool)
+
+    o, h, l, c = a.open, a.high, a.low, a.close
+    rng = h - l
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ok = (rng != 0) & ~(np.abs(c - o) / rng > body_ratio)
+    ok[0] = False
+    bars = np.flatnonzero(ok)
+
+    # as condições implicam low < z < high quando tol >= 0
+    pad = -2 * tol if tol < 0 else 0.0
+    lo = np.searchsorted(levels, l[bars] - pad, side='left')
+    hi = np.searchsorted(levels, h[bars] + pad, side='right')
+    counts = np.clip(hi - lo, 0, None)
+    total = int(counts.sum())
+    if total == 0:
+        return empty, empty, empty.astype(bool)
+
+    bar = np.repeat(bars, counts)
+    offsets = np.cumsum(counts) - counts
+    zi = np.arange(total) - np.repeat(offsets, counts) + np.repeat(lo, counts)
+    lvl = levels[zi]
+    hb, lb, cb = h[bar], l[bar], c[bar]
+    up = (hb > lvl + tol) & (cb < lvl - tol)
+    down = (lb < lvl - tol) & (cb > lvl + tol)
+    hit = up | down
+    bar, pos, is_down = bar[hit], first_pos[zi[hit]], (down & ~up)[hit]
+    order = np.lexsort((pos, bar))
+    return bar[order], pos[order], is_down[order]
+
+
+def confluence_select(levels: np.ndarray, tol: float) -> np.ndarray:
+    """
+    Seleção de níveis de confluência por varredura ordenada, O(L log L).
+    Um nível é candidato se outro nível estiver a até `tol` (basta olhar os
+    vizinhos imediatos na ordem ordenada). Os candidatos são aceitos na ordem
+    original se nenhum nível já aceito estiver a até `tol`.
+    Retorna as posições aceitas em `levels`.
+    """
+    levels = np.asarray(levels, dtype=float)
+    if len(levels) < 2:
+        return np.array([], dtype=np.int64)
+    order = np.argsort(levels, kind='stable')
+    s = levels[order]
+    close = np.abs(np.diff(s)) <= tol
+    near = np.zeros(len(s), dtype=bool)
+    near[:-1] |= close
+    near[1:] |= close
+    candidate = np.zeros(len(s), dtype=bool)
+    candidate[order] = near
+
+    # candidatos só interagem dentro de cadeias de vizinhos a até `tol`; em cadeias
+    # com amplitude <= tol o primeiro na ordem original é o único aceito
+    cand = np.flatnonzero(candidate)
+    if len(cand) == 0:
+        return cand
+    corder = cand[np.argsort(levels[cand], kind='stable')]
+    cs = levels[corder]
+    starts = np.flatnonzero(np.r_[True, np.diff(cs) > tol])
+    ends = np.r_[starts[1:], len(cs)]
+    tight = (cs[ends - 1] - cs[starts]) <= tol
+    picked = [np.minimum.reduceat(corder, starts)[tight]]
+
+    for st, en in zip(starts[~tight].tolist(), ends[~tight].tolist()):
+        accepted: List[float] = []
+        chosen = []
+        for p in np.sort(corder[st:en]).tolist():
+            lvl = levels[p]
+            k = bisect_left(accepted, lvl)
+            if k < len(accepted) and abs(accepted[k] - lvl) <= tol:
+                continue
+            if k > 0 and abs(accepted[k-1] - lvl) <= tol:
+                continue
+            insort(accepted, lvl)
+            chosen.append(p)
+        picked.append(np.asarray(chosen, dtype=np.int64))
+    return np.sort(np.concatenate(picked))
+
+
+def window_counts(levels: np.ndarray, kinds: np.ndarray, query: np.ndarray,
+                  tol: float, n_kinds: int) -> np.ndarray:
+    """
+    Quantos níveis de cada tipo caem em [q - tol, q + tol] para cada q de `query`.
+    Retorna matriz (len(query), n_kinds) via somas prefixadas por tipo.
+    """
+    order = np.argsort(levels, kind='stable')
+    s, k = np.asarray(levels, dtype=float)[order], np.asarray(kinds)[order]
+    query = np.asarray(query, dtype=float)
+    lo = np.searchsorted(s, query - tol, side='left')
+    hi = np.searchsorted(s, query + tol, side='right')
+    out = np.empty((len(query), n_kinds), dtype=np.int64)
+    for t in range(n_kinds):
+        prefix = np.concatenate([[0], np.cumsum(k == t)])
+        out[:, t] = prefix[hi] - prefix[lo]
+    return out
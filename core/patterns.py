@@ -9,7 +9,58 @@ Change of Character (CHOCH), Fair Value Gaps (FVG), Order Blocks, liquidity zone
 
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Union
+
+from core.kernels import (
+    ohlc_arrays,
+    fvg_masks,
+    order_block_masks,
+    breaker_masks,
+    mitigation_masks,
+    void_masks,
+    stop_hunt_masks,
+    interleave,
+    average_true_range,
+    cluster_levels,
+    sweep_events,
+    confluence_select,
+    window_counts,
+)
+from core.compact import CompactOHLC
+from core.events import event_levels, event_table, is_event_table, to_legacy
+from core.sessions import killzone_mask
+
+
+# Os detectores aceitam DataFrame ou CompactOHLC (core.compact). Com CompactOHLC
+# os kernels rodam em ticks/float32: parâmetros em preço passam por _native/_tol
+# e os preços devolvidos por _prices.
+
+def _native(df, price):
+    """Preço (ou distância de preço) na unidade dos arrays de ohlc_arrays(df)."""
+    return df.to_native(price) if isinstance(df, CompactOHLC) else price
+
+
+def _tol(df, tol: float) -> float:
+    """Tolerância de preço na unidade nativa, ciente do tick."""
+    return df.tolerance(tol) if isinstance(df, CompactOHLC) else tol
+
+
+def _decode(df, values: np.ndarray) -> np.ndarray:
+    """Valores na unidade nativa -> preços float."""
+    return df.decode(values) if isinstance(df, CompactOHLC) else values
+
+
+def _prices(df, values: np.ndarray) -> list:
+    """Valores na unidade nativa -> lista de preços float."""
+    return _decode(df, values).tolist()
+
+
+def _zone_events(df, detector: str, index: np.ndarray, is_bear: np.ndarray,
+                 lower: np.ndarray, upper: np.ndarray, as_table: bool):
+    """Tabela de eventos (core.events) ou a lista de dicts original do detector."""
+    table = event_table(index, is_bear, _decode(df, lower), _decode(df, upper))
+    return table if as_table else to_legacy(table, detector)
+
 
 def detect_bos(df: pd.DataFrame, lookback: int = 2) -> bool:
     """
@@ -35,87 +86,137 @@ def detect_bos(df: pd.DataFrame, lookback: int = 2) -> bool:
     return False
 
 
+def _choch_masks(df: pd.DataFrame) -> tuple:
+    """
+    Máscaras de rompimento usadas pelo CHoCH, em O(n):
+    up[i]   = close[i] > max(high[:i])
+    down[i] = close[i] < min(low[:i])
+    Os extremos anteriores vêm de máximos/mínimos cumulativos (NaN é ignorado,
+    como em Series.max/min).
+    """
+    a = ohlc_arrays(df)
+    highs, lows, closes = a.high, a.low, a.close
+
+    prev_max = np.fmax.accumulate(highs)[:-1]
+    prev_min = np.fmin.accumulate(lows)[:-1]
+    up = np.zeros(len(closes), dtype=bool)
+    down = np.zeros(len(closes), dtype=bool)
+    up[1:] = closes[1:] > prev_max
+    down[1:] = closes[1:] < prev_min
+    return up, down
+
+
+def detect_choch_breaks(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Rompimentos de estrutura que compõem o CHoCH.
+    Retorna dict:
+      {'choch': bool, 'index': np.ndarray, 'direction': np.ndarray}
+    onde direction é +1 (rompimento de alta) ou -1 (rompimento de baixa),
+    ordenados por índice (alta antes de baixa no mesmo candle).
+    """
+    empty = np.array([], dtype=np.int64)
+    if df is None or len(df) < 2:
+        return {'choch': False, 'index': empty, 'direction': empty.astype(np.int8)}
+    up, down = _choch_masks(df)
+    up_idx = np.flatnonzero(up)
+    down_idx = np.flatnonzero(down)
+    index = np.concatenate([up_idx, down_idx])
+    direction = np.concatenate([np.ones(len(up_idx), dtype=np.int8),
+                                -np.ones(len(down_idx), dtype=np.int8)])
+    order = np.argsort(index, kind='stable')
+    return {
+        'choch': bool(len(up_idx)) and bool(len(down_idx)),
+        'index': index[order],
+        'direction': direction[order],
+    }
+
+
 def detect_choch(df: pd.DataFrame) -> bool:
     """
     Change of Character (CHoCH): detecta ao menos um rompimento de alta
     e um rompimento de baixa em sequência, em qualquer ordem, em 2+ barras.
+    Para os índices e direções dos rompimentos, use detect_choch_breaks.
     """
     if df is None or len(df) < 2:
         return False
-    highs   = df['high']
-    lows    = df['low']
-    closes  = df['close']
-
-    # índices onde houve rompimento de swing high ou swing low
-    high_breaks = [i for i in range(1, len(df))
-                   if closes.iat[i] > highs.iloc[:i].max()]
-    low_breaks  = [i for i in range(1, len(df))
-                   if closes.iat[i] < lows.iloc[:i].min()]
+    up, down = _choch_masks(df)
 
     # precisa ter ao menos um de cada
-    return bool(high_breaks) and bool(low_breaks)
+    return bool(up.any()) and bool(down.any())
 
-def detect_fvg(df: pd.DataFrame, lookback: int = 3) -> List[Dict[str, Any]]:
+def detect_fvg(df: pd.DataFrame, lookback: int = 3, as_table: bool = False) -> List[Dict[str, Any]]:
     """
     Fair Value Gap: for each window of 3, if candle[i].high < candle[i+2].low => bull gap,
     or candle[i].low > candle[i+2].high => bear gap.
     Returns list of dicts: side, lower, upper, index
+    (as_table=True: array estruturado de core.events).
     """
-    gaps = []
-    if df is None or len(df) < lookback:
-        return gaps
-    highs = df['high']; lows = df['low']
-    for i in range(len(df) - 2):
-        if highs.iat[i] < lows.iat[i+2]:
-            gaps.append({
-                'side': 'bull',
-                'lower': highs.iat[i],
-                'upper': lows.iat[i+2],
-                'index': i
-            })
-        elif lows.iat[i] > highs.iat[i+2]:
-            gaps.append({
-                'side': 'bear',
-                'lower': highs.iat[i+2],
-                'upper': lows.iat[i],
-                'index': i
-            })
-    return gaps
-
-
-def detect_order_blocks(df: pd.DataFrame, min_range: float = 0, lookback: int = 50) -> List[Dict[str, Any]]:
+    if df is None or len(df) < lookback or len(df) < 3:
+        return event_table(*[np.array([])] * 4) if as_table else []
+    a = ohlc_arrays(df)
+    bull, bear = fvg_masks(a)
+    idx, is_bear = interleave(bull, bear)
+    lower = np.where(is_bear, a.high[idx + 2], a.high[idx])
+    upper = np.where(is_bear, a.low[idx], a.low[idx + 2])
+    return _zone_events(df, 'detect_fvg', idx, is_bear, lower, upper, as_table)
+
+
+def detect_order_blocks(df: pd.DataFrame, min_range: float = 0, lookback: int = 50,
+                        as_table: bool = False) -> List[Dict[str, Any]]:
     """
     Detect Order Blocks: last bearish before bullish impulse (bull OB) and vice-versa.
-    Returns list of dicts with side, zone (low,high), index of OB candle.
-    """
-    obs = []
-    for i in range(1, min(len(df)-1, lookback)):
-        prev = df.iloc[i-1]
-        curr = df.iloc[i]
-        nxt = df.iloc[i+1]
-        # bullish OB: prev bearish and next close > prev.high
-        if prev['close'] < prev['open'] and nxt['close'] > prev['high'] and (prev['high']-prev['low']) >= min_range:
-            obs.append({'side': 'bull', 'zone': (prev['low'], prev['high']), 'index': i-1})
-        # bearish OB: prev bullish and next close < prev.low
-        if prev['close'] > prev['open'] and nxt['close'] < prev['low'] and (prev['high']-prev['low']) >= min_range:
-            obs.append({'side': 'bear', 'zone': (prev['low'], prev['high']), 'index': i-1})
-    # unique by index
-    uniq = {o['index']: o for o in obs}
-    return list(uniq.values())
-
-
-def detect_liquidity_zones(df: pd.DataFrame, min_touches: int = 2, tol: float = 1e-5) -> Dict[float,int]:
-    counts = {}
-    for price in pd.concat([df['high'], df['low']]):
-        counts[price] = counts.get(price, 0) + 1
-    zones = {}
-    for price, cnt in counts.items():
-        found = next((z for z in zones if abs(z - price) <= tol), None)
-        if found is not None:
-            zones[found] += cnt
-        else:
-            zones[price] = cnt
-    return {z: c for z, c in zones.items() if c >= min_touches}
+    Returns list of dicts with side, zone (low,high), index of OB candle
+    (as_table=True: array estruturado de core.events).
+    """
+    a = ohlc_arrays(df)
+    bull, bear = order_block_masks(a, _native(df, min_range), lookback)
+    # bull e bear são mutuamente exclusivos (close < open vs close > open)
+    idx, is_bear = interleave(bull, bear)
+    return _zone_events(df, 'detect_order_blocks', idx, is_bear, a.low[idx], a.high[idx], as_table)
+
+
+def detect_liquidity_zones(df: pd.DataFrame, min_touches: int = 2, tol: float = 1e-5,
+                           atr_mult: Optional[float] = None) -> Dict[float,int]:
+    """
+    Liquidity Zones: níveis de preço (highs e lows) tocados pelo menos `min_touches` vezes.
+    Os preços são ordenados uma vez e vizinhos a até `tol` são fundidos em um único nível,
+    representado pelo preço visto primeiro. Com `atr_mult`, a tolerância passa a ser
+    relativa à volatilidade: tol = atr_mult * ATR médio da série.
+    Retorna dict {nível: toques}.
+    """
+    a = ohlc_arrays(df)
+    tol = atr_mult * average_true_range(a) if atr_mult is not None else _tol(df, tol)
+    levels, touches = cluster_levels(np.concatenate([a.high, a.low]), tol)
+    keep = touches >= min_touches
+    return dict(zip(_prices(df, levels[keep]), touches[keep].tolist()))
+
+
+def _sweep_columns(df: pd.DataFrame, zones: Optional[List[float]], lookback: int,
+                   body_ratio: float, tol: float) -> tuple:
+    """
+    Passada única de sweeps + confirmação de inducement.
+    Retorna (índices, níveis, is_down, confirmado) onde confirmado indica que o
+    candle seguinte fecha do lado do sweep (acima do nível para 'up', abaixo para 'down').
+    """
+    if zones is None:
+        recent = df.iloc[-lookback:]
+        zones = list(detect_liquidity_zones(recent))
+    zones = list(zones)
+    a = ohlc_arrays(df)
+    native_zones = _native(df, np.asarray(zones, dtype=float))
+    idx, pos, is_down = sweep_events(a, native_zones, body_ratio, _tol(df, tol))
+    nxt = idx + 1
+    has_next = nxt < len(a)
+    lvl = native_zones[pos] if len(pos) else np.array([], dtype=float)
+    c_next = a.close[np.minimum(nxt, len(a) - 1)] if len(idx) else lvl
+    confirmed = has_next & np.where(is_down, c_next < lvl, c_next > lvl)
+    levels = [zones[p] for p in pos.tolist()]
+    return idx.tolist(), levels, is_down.tolist(), confirmed.tolist()
+
+
+def _sweep_dicts(idx: list, levels: list, is_down: list) -> List[Dict[str, Any]]:
+    return [{'index': i, 'level': z, 'direction': 'down' if d else 'up'}
+            for i, z, d in zip(idx, levels, is_down)]
 
 
 def detect_liquidity_sweep(df: pd.DataFrame, zones: Optional[List[float]] = None,
@@ -123,58 +224,55 @@ def detect_liquidity_sweep(df: pd.DataFrame, zones: Optional[List[float]] = None
     """
     Liquidity Sweep: last candle sweeps levels (zones) up or down.
     If zones None, compute on last `lookback` bars.
+    Zones are kept sorted, so each candle only checks the levels inside its [low, high].
     Returns list of {'index', 'level', 'direction'}
     """
     if df is None or len(df) < 2:
         return []
-    if zones is None:
-        recent = df.iloc[-lookback:]
-        zones = list(detect_liquidity_zones(recent))
-    sweeps = []
-    highs = df['high']; lows = df['low']; closes = df['close']; opens = df['open']
-    for i in range(1, len(df)):
-        h, l, o, c = highs.iat[i], lows.iat[i], opens.iat[i], closes.iat[i]
-        rng = h - l
-        if rng == 0 or abs(c-o)/rng > body_ratio:
-            continue
-        for z in zones:
-            if h > z + tol and c < z - tol:
-                sweeps.append({'index': i, 'level': z, 'direction': 'up'})
-            if l < z - tol and c > z + tol:
-                sweeps.append({'index': i, 'level': z, 'direction': 'down'})
-    # unique
-    seen = set()
-    uniq = []
-    for s in sweeps:
-        key = (s['index'], s['level'])
-        if key not in seen:
-            seen.add(key)
-            uniq.append(s)
-    return uniq
+    idx, levels, is_down, _ = _sweep_columns(df, zones, lookback, body_ratio, tol)
+    return _sweep_dicts(idx, levels, is_down)
+
+
+def detect_sweeps_and_inducements(df: pd.DataFrame, zones: Optional[List[float]] = None,
+                                  lookback: int = 10, body_ratio: float = 0.5,
+                                  tol: float = 1e-5) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Sweeps e inducements na mesma passada (sem refazer o sweep para o inducement).
+    Retorna {'sweeps': [...], 'inducements': [...]} nos formatos de
+    detect_liquidity_sweep e detect_inducement.
+    """
+    if df is None or len(df) < 2:
+        return {'sweeps': [], 'inducements': []}
+    idx, levels, is_down, confirmed = _sweep_columns(df, zones, lookback, body_ratio, tol)
+    sweeps = _sweep_dicts(idx, levels, is_down)
+    inducements = [{'sweep': sw, 'confirm_idx': sw['index'] + 1}
+                   for sw, ok in zip(sweeps, confirmed) if ok]
+    return {'sweeps': sweeps, 'inducements': inducements}
 
 # ------------------- NÍVEL INTERMEDIÁRIO -------------------
 
-def detect_inducement(df: pd.DataFrame, zones: List[float]) -> List[Dict[str, Any]]:
+def detect_inducement(df: pd.DataFrame, zones: Optional[List[float]] = None,
+                      sweeps: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
     """
     Inducement: identifica um sweep seguido de candle de confirmação no mesmo lado.
     - df: DataFrame com colunas ['open','high','low','close']
-    - zones: lista de preços de níveis de liquidez (output de detect_liquidity_zones)
+    - zones: lista de preços de níveis de liquidez (output de detect_liquidity_zones);
+      None usa as zonas dos últimos candles, como detect_liquidity_sweep
+    - sweeps: saída já calculada de detect_liquidity_sweep (evita refazer o sweep)
     Retorna lista de dicts: {'sweep': {...}, 'confirm_idx': idx_confirm}
     """
-    sweeps = detect_liquidity_sweep(df, zones)
-    inducements: List[Dict[str, Any]] = []
-    for sw in sweeps:
-        idx = sw['index']
-        z = sw['level']
-        dir_ = sw['direction']
-        nxt = idx + 1
-        if nxt < len(df):
-            c = df['close'].iat[nxt]
-            if dir_ == 'up' and c > z:
-                inducements.append({'sweep': sw, 'confirm_idx': nxt})
-            if dir_ == 'down' and c < z:
-                inducements.append({'sweep': sw, 'confirm_idx': nxt})
-    return inducements
+    if sweeps is None:
+        return detect_sweeps_and_inducements(df, zones)['inducements']
+    if not sweeps:
+        return []
+    closes = ohlc_arrays(df).close
+    nxt = np.array([sw['index'] for sw in sweeps]) + 1
+    lvl = _native(df, np.array([sw['level'] for sw in sweeps], dtype=float))
+    down = np.array([sw['direction'] == 'down' for sw in sweeps])
+    c = closes[np.minimum(nxt, len(closes) - 1)]
+    confirmed = (nxt < len(closes)) & np.where(down, c < lvl, c > lvl)
+    return [{'sweep': sw, 'confirm_idx': sw['index'] + 1}
+            for sw, ok in zip(sweeps, confirmed.tolist()) if ok]
 
 
 def compute_equilibrium_zone(df: pd.DataFrame) -> Dict[str, tuple]:
@@ -190,139 +288,162 @@ def compute_equilibrium_zone(df: pd.DataFrame) -> Dict[str, tuple]:
 
 
 def detect_killzones(df: pd.DataFrame,
-                     sessions: List[tuple] = [(8,10), (13,15)]
-                    ) -> List[pd.Timestamp]:
-    
-    #Kill Zones: retorna timestamps cujo hour está nas faixas de volatilidade UTC.
-    #sessions: lista de (start_hour, end_hour).
-    
+                     sessions: List[tuple] = [(8,10), (13,15)],
+                     as_mask: bool = False
+                    ) -> Union[pd.DatetimeIndex, np.ndarray]:
+    """
+    Kill Zones: candles cujo horário cai nas sessões (core.sessions, vetorizado).
+    sessions: tuplas (start_hour, end_hour) no horário do índice (padrão: UTC;
+    (22, 2) atravessa a meia-noite, (8, 8) não pega nada), nomes ('london_open', 'new_york', ...) ou core.sessions.Session com fuso
+    e horário de verão.
+    Retorna o DatetimeIndex desses candles ou, com as_mask=True, a máscara bool
+    por candle (para filtrar sinais de outros detectores).
+    """
     if not hasattr(df, 'index') or not pd.api.types.is_datetime64_any_dtype(df.index):
         raise ValueError("DataFrame deve ter índice datetime para killzones")
-    kills: List[pd.Timestamp] = []
-    for ts in df.index:
-        for start, end in sessions:
-            if start <= ts.hour < end:
-                kills.append(ts)
-                break
-    return kills
+    mask = killzone_mask(df.index, sessions)
+    return mask if as_mask else df.index[mask]
 
 # ------------------- NÍVEL AVANÇADO -------------------
 
-def detect_mss(df: pd.DataFrame) -> bool:
+def detect_mss(df: pd.DataFrame, bos: Optional[bool] = None, choch: Optional[bool] = None) -> bool:
     """
     Market Structure Shift (MSS): identifica se há pelo menos um BOS e um CHOCH no histórico.
+    bos/choch aceitam resultados já calculados de detect_bos/detect_choch.
     Retorna True se ambos ocorreram em df.
     """
-    return detect_bos(df) and detect_choch(df)
+    if bos is None:
+        bos = detect_bos(df)
+    if not bos:
+        return False
+    return detect_choch(df) if choch is None else choch
 
 
-def detect_breaker_blocks(df: pd.DataFrame, min_range: float = 0) -> List[Dict[str, Any]]:
+def detect_breaker_blocks(df: pd.DataFrame, min_range: float = 0, as_table: bool = False) -> List[Dict[str, Any]]:
     """
     Breaker Blocks: zonas que resultam de falso rompimento seguido de reversão rápida.
     - df: DataFrame com candles ['open','high','low','close']
     - min_range: range mínimo de candle para considerar.
+    - as_table: devolve array estruturado de core.events em vez de dicts
     Retorna lista de dicts: {'index': i, 'type':'bullish'/'bearish', 'zone':(low,high)}
     """
-    blocks: List[Dict[str, Any]] = []
-    for i in range(1, len(df)-1):
-        prev, curr, nxt = df.iloc[i-1], df.iloc[i], df.iloc[i+1]
-        # bearish breaker: curr rompe abaixo do prev.low e próximo fecha acima de curr.high
-        if curr['low'] < prev['low'] and nxt['close'] > curr['high'] and (curr['high']-curr['low']) >= min_range:
-            blocks.append({'index': i, 'type': 'bearish', 'zone': (curr['low'], curr['high'])})
-        # bullish breaker: curr rompe acima do prev.high e próximo fecha abaixo de curr.low
-        if curr['high'] > prev['high'] and nxt['close'] < curr['low'] and (curr['high']-curr['low']) >= min_range:
-            blocks.append({'index': i, 'type': 'bullish', 'zone': (curr['low'], curr['high'])})
-    # remover duplicatas por índice
-    seen = set()
-    uniq = []
-    for b in blocks:
-        if b['index'] not in seen:
-            seen.add(b['index'])
-            uniq.append(b)
-    return uniq
-
-
-def detect_confluence_zones(df: pd.DataFrame, tolerance: float = 1e-5) -> List[float]:
+    if len(df) < 3:
+        return event_table(*[np.array([])] * 4) if as_table else []
+    a = ohlc_arrays(df)
+    # bearish tem prioridade quando os dois critérios valem no mesmo índice
+    bearish, bullish = breaker_masks(a, _native(df, min_range))
+    pos, is_bull = interleave(bearish, bullish)
+    i = pos + 1
+    return _zone_events(df, 'detect_breaker_blocks', i, ~is_bull, a.low[i], a.high[i], as_table)
+
+
+CONFLUENCE_SOURCES = ('order_block', 'fvg', 'liquidity')
+
+
+def _confluence_inputs(df: pd.DataFrame, order_blocks: Optional[List[Dict[str, Any]]] = None,
+                       fvgs: Optional[List[Dict[str, Any]]] = None,
+                       liquidity_zones: Optional[Dict[float, int]] = None) -> tuple:
+    """Níveis candidatos (na ordem OB → FVG → liquidez) e o tipo de origem de cada um."""
+    if order_blocks is None:
+        order_blocks = detect_order_blocks(df)
+    if fvgs is None:
+        fvgs = detect_fvg(df)
+    if liquidity_zones is None:
+        liquidity_zones = detect_liquidity_zones(df)
+    ob_levels = event_levels(order_blocks)
+    fvg_levels = event_levels(fvgs)
+    liq_levels = list(liquidity_zones.keys())
+    kinds = np.repeat(np.arange(3), [len(ob_levels), len(fvg_levels), len(liq_levels)])
+    return ob_levels + fvg_levels + liq_levels, kinds
+
+
+def detect_confluence_zones(df: pd.DataFrame, tolerance: float = 1e-5,
+                            order_blocks: Optional[List[Dict[str, Any]]] = None,
+                            fvgs: Optional[List[Dict[str, Any]]] = None,
+                            liquidity_zones: Optional[Dict[float, int]] = None) -> List[float]:
     """
     Confluence Zones: preços onde ocorrem múltiplos padrões simultaneamente.
     - Integrar níveis de Order Blocks, Fair Value Gaps e Liquidity Zones.
     - tolerance: proximidade para agrupar valores.
+    - order_blocks/fvgs/liquidity_zones: saídas já calculadas dos detectores (opcional).
     Retorna lista de níveis de confluência.
     """
-    # coletar níveis de cada padrão
-    ob_levels = [lvl for ob in detect_order_blocks(df) for lvl in ob['zone']]
-    fvg_levels = [edge for gap in detect_fvg(df) for edge in (gap['lower'], gap['upper'])]
-    liq_levels = list(detect_liquidity_zones(df).keys())
+    all_levels, _ = _confluence_inputs(df, order_blocks, fvgs, liquidity_zones)
+    tolerance = df.price_tolerance(tolerance) if isinstance(df, CompactOHLC) else tolerance
+    picked = confluence_select(np.asarray(all_levels, dtype=float), tolerance)
+    return [all_levels[p] for p in picked.tolist()]
 
-    all_levels = ob_levels + fvg_levels + liq_levels
-    confluence = []
-    for lvl in all_levels:
-        # agrupar níveis próximos
-        group = [x for x in all_levels if abs(x - lvl) <= tolerance]
-        if len(group) >= 2 and not any(abs(c - lvl) <= tolerance for c in confluence):
-            confluence.append(lvl)
-    return confluence
 
-def detect_mitigation_blocks(df: pd.DataFrame) -> List[Dict[str, Any]]:
+def detect_confluence_levels(df: pd.DataFrame, tolerance: float = 1e-5) -> List[Dict[str, Any]]:
+    """
+    Mesmos níveis de detect_confluence_zones, com a composição de cada um
+    para permitir ponderação por tipo de padrão.
+    Retorna lista de dicts:
+      {'level': nível, 'count': total, 'sources': {'order_block': n, 'fvg': n, 'liquidity': n}}
+    onde as contagens consideram os níveis a até `tolerance`.
+    """
+    all_levels, kinds = _confluence_inputs(df)
+    tolerance = df.price_tolerance(tolerance) if isinstance(df, CompactOHLC) else tolerance
+    values = np.asarray(all_levels, dtype=float)
+    picked = confluence_select(values, tolerance)
+    counts = window_counts(values, kinds, values[picked], tolerance, len(CONFLUENCE_SOURCES))
+    return [{'level': all_levels[p],
+             'count': int(row.sum()),
+             'sources': dict(zip(CONFLUENCE_SOURCES, row.tolist()))}
+            for p, row in zip(picked.tolist(), counts)]
+
+def detect_mitigation_blocks(df: pd.DataFrame, as_table: bool = False) -> List[Dict[str, Any]]:
     """
     Mitigation Blocks: identifica zonas onde houve "failure swing" seguido de retorno.
     Critério: candle i-1 fecha além de candle i-2 (break), e candle i fecha dentro do range de i-2.
     Retorna lista de dicts: {'index': i, 'type':'bullish'/'bearish', 'zone':(low,high)}
+    (as_table=True: array estruturado de core.events).
     """
-    blocks = []
-    for i in range(2, len(df)):
-        prev2 = df.iloc[i-2]
-        prev1 = df.iloc[i-1]
-        curr  = df.iloc[i]
-        # bullish mitigation: prev1.high > prev2.high e curr.close <= prev2.high
-        if prev1['high'] > prev2['high'] and curr['close'] <= prev2['high']:
-            blocks.append({'index': i, 'type': 'bullish', 'zone': (prev2['low'], prev2['high'])})
-        # bearish mitigation: prev1.low < prev2.low e curr.close >= prev2.low
-        if prev1['low'] < prev2['low'] and curr['close'] >= prev2['low']:
-            blocks.append({'index': i, 'type': 'bearish', 'zone': (prev2['low'], prev2['high'])})
-    return blocks
+    if len(df) < 3:
+        return event_table(*[np.array([])] * 4) if as_table else []
+    a = ohlc_arrays(df)
+    bullish, bearish = mitigation_masks(a)
+    pos, is_bear = interleave(bullish, bearish)
+    return _zone_events(df, 'detect_mitigation_blocks', pos + 2, is_bear, a.low[pos], a.high[pos], as_table)
 
 
-def detect_liquidity_voids(df: pd.DataFrame, tol: float = 0.0) -> List[Dict[str, Any]]:
+def detect_liquidity_voids(df: pd.DataFrame, tol: float = 0.0, as_table: bool = False) -> List[Dict[str, Any]]:
     """
     Liquidity Voids: gaps entre candles sem overlap de preço.
     gap up: curr.low > prev.high + tol
     gap down: curr.high < prev.low - tol
-    Retorna lista de {'index', 'type', 'zone'}
+    Retorna lista de {'index', 'type', 'zone'} (as_table=True: array estruturado de core.events)
     """
-    voids = []
-    for i in range(1, len(df)):
-        prev = df.iloc[i-1]
-        curr = df.iloc[i]
-        # gap up
-        if curr['low'] > prev['high'] + tol:
-            voids.append({'index': i, 'type': 'bullish', 'zone': (prev['high'], curr['low'])})
-        # gap down
-        if curr['high'] < prev['low'] - tol:
-            voids.append({'index': i, 'type': 'bearish', 'zone': (curr['high'], prev['low'])})
-    return voids
+    if len(df) < 2:
+        return event_table(*[np.array([])] * 4) if as_table else []
+    a = ohlc_arrays(df)
+    bullish, bearish = void_masks(a, _tol(df, tol))
+    pos, is_bear = interleave(bullish, bearish)
+    lower = np.where(is_bear, a.high[pos + 1], a.high[pos])
+    upper = np.where(is_bear, a.low[pos], a.low[pos + 1])
+    return _zone_events(df, 'detect_liquidity_voids', pos + 1, is_bear, lower, upper, as_table)
 
 
 def detect_stop_hunts(df: pd.DataFrame, wick_ratio: float = 0.5) -> List[int]:
-    hunts = []
-    for i in range(1, len(df)):
-        o, h, l, c = df.iloc[i][['open','high','low','close']]
-        rng = h - l
-        if rng == 0: continue
-        upper_wick = h - max(o, c)
-        lower_wick = min(o, c) - l
-        if lower_wick / rng > wick_ratio and c <= o: hunts.append(i)
-        if upper_wick / rng > wick_ratio and c >= o: hunts.append(i)
-    return hunts
-
-def detect_multi_fvg(df: pd.DataFrame, min_gaps: int = 2) -> List[tuple]:
+    if len(df) < 2:
+        return []
+    lower, upper = stop_hunt_masks(ohlc_arrays(df), wick_ratio)
+    # um candle com os dois pavios longos aparece duas vezes, como no loop original
+    pos, _ = interleave(lower, upper)
+    return (pos + 1).tolist()
+
+def detect_multi_fvg(df: pd.DataFrame, min_gaps: int = 2,
+                     gaps: Optional[List[Dict[str, Any]]] = None, as_table: bool = False) -> List[tuple]:
     """
     Fair Value Gaps Múltiplos: detecta quando existem pelo menos `min_gaps` gaps.
-    Usa detect_fvg internamente.
+    Usa detect_fvg internamente (ou `gaps`, se já calculado; aceita a tabela de core.events).
     Retorna lista de gaps (low, high).
     """
-    gaps = detect_fvg(df)
-    return gaps if len(gaps) >= min_gaps else []
+    if gaps is None:
+        gaps = detect_fvg(df, as_table=as_table)
+    if len(gaps) >= min_gaps:
+        return gaps
+    return gaps[:0] if is_event_table(gaps) else []
 
 def detect_order_flow_imbalance(df: pd.DataFrame, factor: float = 2.0) -> List[int]:
     """
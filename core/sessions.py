@@ -0,0 +1,200 @@
+# core/sessions.py
+
+"""
+Sessões de mercado e killzones vetorizadas.
+Uma sessão é uma janela de horário local (com fuso IANA, então o horário de
+verão de Londres/Nova York é respeitado) e as máscaras são calculadas para o
+índice inteiro de uma vez: o índice é convertido uma vez por fuso para minutos
+do dia e cada sessão vira uma comparação de arrays.
+
+    mask = session_mask(df.index, 'london')            # np.ndarray bool
+    labels = session_labels(df.index)                  # Categorical asia/london/new_york
+    kills = killzone_mask(df.index, [(8, 10), (13, 15)])   # tuplas: horas do próprio índice
+    fvgs = filter_events(detect_fvg(df, as_table=True), kills)
+
+Índices sem fuso são tratados como UTC.
+"""
+
+from math import ceil
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from core.events import is_event_table
+
+NS_PER_MINUTE = 60 * 10**9
+MINUTES_PER_DAY = 24 * 60
+
+
+class Session(NamedTuple):
+    """
+    Janela [start, end) em horário local 'HH:MM' no fuso `tz`. end <= start
+    atravessa a meia-noite. tz=None usa o horário do próprio índice.
+    weekdays: dias locais da semana em que a sessão vale (0 = segunda); None = todos, () = nenhum.
+    """
+    name: str
+    tz: Optional[str]
+    start: str
+    end: str
+    weekdays: Optional[Tuple[int, ...]] = None
+
+    @property
+    def start_minute(self) -> int:
+        return _minute_of_day(self.start)
+
+    @property
+    def end_minute(self) -> int:
+        return _minute_of_day(self.end)
+
+
+# sessões de negociação (horário local de cada praça)
+SESSIONS: Dict[str, Session] = {
+    'asia': Session('asia', 'Asia/Tokyo', '09:00', '18:00'),
+    'london': Session('london', 'Europe/London', '08:00', '17:00'),
+    'new_york': Session('new_york', 'America/New_York', '08:00', '17:00'),
+}
+
+# killzones: as duas primeiras horas de Londres e Nova York. No inverno
+# coincidem com as faixas UTC (8, 10) e (13, 15) usadas por detect_killzones.
+KILLZONES: Dict[str, Session] = {
+    'london_open': Session('london_open', 'Europe/London', '08:00', '10:00'),
+    'new_york_open': Session('new_york_open', 'America/New_York', '08:00', '10:00'),
+}
+
+SessionLike = Union[Session, str, Tuple[float, float]]
+
+
+def _minute_of_day(hhmm: str) -> int:
+    hours, minutes = hhmm.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def resolve_session(session: SessionLike) -> Session:
+    """
+    Session, nome em SESSIONS/KILLZONES ou tupla (hora_início, hora_fim) no
+    horário do índice (formato legado de detect_killzones: start <= hora < end).
+    Diferente do laço legado, tuplas com fim antes do início atravessam a
+    meia-noite: (22, 2) pega 22h, 23h, 0h e 1h (antes não pegava nada). Início
+    e fim na mesma hora, como (8, 8), continuam sem pegar candle nenhum (uma
+    Session com start == end valeria o dia inteiro).
+    """
+    if isinstance(session, Session):
+        return session
+    if isinstance(session, str):
+        if session in SESSIONS:
+            return SESSIONS[session]
+        if session in KILLZONES:
+            return KILLZONES[session]
+        raise ValueError(f"Sessão desconhecida: {session} (use {sorted({**SESSIONS, **KILLZONES})})")
+    start, end = session
+    # hora inteira >= start equivale a hora >= ceil(start)
+    start_h, end_h = ceil(start), ceil(end)
+    # weekdays=() deixa a janela vazia
+    return Session(f"{start}-{end}h", None, f"{start_h:02d}:00", f"{end_h:02d}:00",
+                   () if start_h == end_h else None)
+
+
+def _datetime_index(index) -> pd.DatetimeIndex:
+    if not isinstance(index, pd.DatetimeIndex):
+        if index is None or not pd.api.types.is_datetime64_any_dtype(index):
+            raise ValueError("Sessões exigem índice datetime")
+        index = pd.DatetimeIndex(index)
+    # asi8 segue a unidade do índice (s, ms, us...); as contas usam ns
+    return index if index.unit == 'ns' else index.as_unit('ns')
+
+
+def _wall_nanoseconds(index: pd.DatetimeIndex, tz: Optional[str]) -> np.ndarray:
+    """Horário de parede (ns desde a época) do índice no fuso tz."""
+    if tz is None:
+        return index.asi8 if index.tz is None else index.tz_localize(None).asi8
+    if tz == 'UTC':
+        # asi8 de índice com fuso já é UTC; sem fuso, tratado como UTC
+        return index.asi8
+    utc = index.tz_localize('UTC') if index.tz is None else index
+    return utc.tz_convert(tz).tz_localize(None).asi8
+
+
+def _local_clock(index: pd.DatetimeIndex, tz: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(minuto do dia, dia da semana) locais, como int16/int8."""
+    minutes = _wall_nanoseconds(index, tz) // NS_PER_MINUTE
+    minute_of_day = (minutes % MINUTES_PER_DAY).astype(np.int16)
+    # 1970-01-01 foi quinta-feira (3, com segunda = 0)
+    weekday = ((minutes // MINUTES_PER_DAY + 3) % 7).astype(np.int8)
+    return minute_of_day, weekday
+
+
+def _window(session: Session, minute_of_day: np.ndarray, weekday: np.ndarray) -> np.ndarray:
+    start, end = session.start_minute, session.end_minute
+    if start < end:
+        mask = (minute_of_day >= start) & (minute_of_day < end)
+    else:
+        mask = (minute_of_day >= start) | (minute_of_day < end)
+    if session.weekdays is not None:
+        mask &= np.isin(weekday, session.weekdays)
+    return mask
+
+
+def session_masks(index, sessions: Iterable[SessionLike] = tuple(SESSIONS)) -> Dict[str, np.ndarray]:
+    """{nome da sessão: máscara bool}; cada fuso é convertido uma única vez."""
+    index = _datetime_index(index)
+    clocks: Dict[Optional[str], Tuple[np.ndarray, np.ndarray]] = {}
+    masks: Dict[str, np.ndarray] = {}
+    for s in map(resolve_session, sessions):
+        if s.tz not in clocks:
+            clocks[s.tz] = _local_clock(index, s.tz)
+        masks[s.name] = _window(s, *clocks[s.tz])
+    return masks
+
+
+def session_mask(index, session: SessionLike) -> np.ndarray:
+    """Máscara bool dos candles dentro de uma sessão."""
+    return next(iter(session_masks(index, [session]).values()))
+
+
+def killzone_mask(index, sessions: Iterable[SessionLike] = ((8, 10), (13, 15))) -> np.ndarray:
+    """Máscara bool dos candles em qualquer uma das sessões (união)."""
+    index = _datetime_index(index)
+    mask = np.zeros(len(index), dtype=bool)
+    for m in session_masks(index, sessions).values():
+        mask |= m
+    return mask
+
+
+def session_labels(index, sessions: Sequence[SessionLike] = tuple(SESSIONS)) -> pd.Categorical:
+    """
+    Rótulo da sessão de cada candle (NaN fora de todas). Em sobreposições
+    (ex.: Londres/Nova York) vale a sessão que vem primeiro em `sessions`.
+    """
+    masks = session_masks(index, sessions)
+    names = list(masks)
+    codes = np.full(len(_datetime_index(index)), -1, dtype=np.int8)
+    for code in range(len(names) - 1, -1, -1):
+        codes[masks[names[code]]] = code
+    return pd.Categorical.from_codes(codes, categories=names)
+
+
+def in_sessions(ts, sessions: Iterable[SessionLike] = ((8, 10), (13, 15))) -> bool:
+    """Versão escalar de killzone_mask para um único horário (streaming)."""
+    ts = pd.Timestamp(ts)
+    for s in map(resolve_session, sessions):
+        local = ts
+        if s.tz is not None:
+            local = (ts.tz_localize('UTC') if ts.tz is None else ts).tz_convert(s.tz)
+        minute = local.hour * 60 + local.minute
+        start, end = s.start_minute, s.end_minute
+        inside = start <= minute < end if start < end else (minute >= start or minute < end)
+        if inside and (s.weekdays is None or local.dayofweek in s.weekdays):
+            return True
+    return False
+
+
+def filter_events(events, mask: np.ndarray):
+    """
+    Mantém só os eventos cujo candle ('index') está na máscara. Aceita tabelas
+    de core.events (filtro vetorizado) ou listas de dicts com 'index'.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if is_event_table(events):
+        return events[mask[events['index']]]
+    return [ev for ev in events if mask[ev['index']]]
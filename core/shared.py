@@ -0,0 +1,142 @@
+# core/shared.py
+
+"""
+OHLC em memória compartilhada (multiprocessing.shared_memory).
+O processo dono copia as colunas uma vez para um bloco compartilhado e passa
+aos workers apenas o SharedOHLCSpec (nome do bloco + formato). Os workers se
+anexam sem cópia e recebem views NumPy somente-leitura, como OHLCArrays ou
+como DataFrame montado sobre o mesmo buffer, então as assinaturas
+baseadas em DataFrame de core.patterns continuam funcionando.
+"""
+
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.kernels import OHLC_COLUMNS, OHLCArrays
+
+
+class SharedOHLCSpec(NamedTuple):
+    name: str
+    length: int
+    dtype: str = 'float64'
+    has_index: bool = False
+    tz: Optional[str] = None
+
+
+# blocos anexados neste processo; a referência mantém o mmap vivo enquanto houver views
+_ATTACHED: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _layout(spec: SharedOHLCSpec) -> Tuple[int, int]:
+    itemsize = np.dtype(spec.dtype).itemsize
+    values = len(OHLC_COLUMNS) * spec.length * itemsize
+    index = spec.length * 8 if spec.has_index else 0
+    return values, index
+
+
+def _views(buf, spec: SharedOHLCSpec) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    values_size, _ = _layout(spec)
+    values = np.ndarray((len(OHLC_COLUMNS), spec.length), dtype=spec.dtype, buffer=buf)
+    index = None
+    if spec.has_index:
+        index = np.ndarray((spec.length,), dtype=np.int64, buffer=buf, offset=values_size)
+    return values, index
+
+
+class SharedOHLC:
+    """
+    Dono do bloco compartilhado. Uso:
+        with SharedOHLC(df) as shm:
+            pool.submit(worker, shm.spec)
+    O bloco é liberado (unlink) ao sair do with ou em close().
+    """
+
+    def __init__(self, df: pd.DataFrame, dtype: str = 'float64'):
+        n = len(df)
+        has_index = isinstance(df.index, pd.DatetimeIndex)
+        tz = str(df.index.tz) if has_index and df.index.tz is not None else None
+        probe = SharedOHLCSpec('', n, dtype, has_index, tz)
+        size = max(sum(_layout(probe)), 1)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self.spec = probe._replace(name=self._shm.name)
+        values, index = _views(self._shm.buf, self.spec)
+        try:
+            for row, col in enumerate(OHLC_COLUMNS):
+                values[row] = df[col].to_numpy(dtype=dtype)
+            if index is not None:
+                index[:] = df.index.as_unit('ns').asi8
+        except BaseException:
+            # coluna ausente ou dtype inconvertível: libera o bloco antes de propagar
+            del values, index
+            self.close()
+            raise
+        del values, index
+
+    def close(self):
+        if self._shm is None:
+            return
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self) -> "SharedOHLC":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach_block(spec: SharedOHLCSpec) -> shared_memory.SharedMemory:
+    shm = _ATTACHED.get(spec.name)
+    if shm is None:
+        # track=False (3.13+) evita que o resource_tracker do worker remova o bloco do dono
+        try:
+            shm = shared_memory.SharedMemory(name=spec.name, track=False)
+        except TypeError:
+            # versões antigas: anexa sem registrar o bloco no resource_tracker
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                shm = shared_memory.SharedMemory(name=spec.name)
+            finally:
+                resource_tracker.register = register
+        _ATTACHED[spec.name] = shm
+    return shm
+
+
+def attach_arrays(spec: SharedOHLCSpec) -> OHLCArrays:
+    """Views somente-leitura das colunas OHLC do bloco (sem cópia)."""
+    values, _ = _views(_attach_block(spec).buf, spec)
+    values.flags.writeable = False
+    return OHLCArrays(*values)
+
+
+def attach_frame(spec: SharedOHLCSpec) -> pd.DataFrame:
+    """DataFrame OHLC montado sobre o bloco compartilhado, sem copiar os preços."""
+    values, index = _views(_attach_block(spec).buf, spec)
+    values.flags.writeable = False
+    idx = None
+    if index is not None:
+        idx = pd.DatetimeIndex(index.view('M8[ns]'))
+        if spec.tz is not None:
+            idx = idx.tz_localize('UTC').tz_convert(spec.tz)
+    # o bloco (4, n) vira a matriz de valores do DataFrame sem cópia
+    return pd.DataFrame(values.T, columns=list(OHLC_COLUMNS), index=idx, copy=False)
+
+
+def detach(spec: SharedOHLCSpec):
+    """
+    Fecha o bloco neste processo. As views anexadas precisam ter sido
+    descartadas antes; se ainda existirem, o bloco continua anexado.
+    """
+    shm = _ATTACHED.get(spec.name)
+    if shm is None:
+        return
+    try:
+        shm.close()
+    except BufferError:
+        return
+    del _ATTACHED[spec.name]
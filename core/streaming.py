@@ -0,0 +1,719 @@
+# core/streaming.py
+
+"""
+Detectores SMC incrementais (streaming).
+Cada detector de DETECTORS_BY_LEVEL tem uma contraparte com estado que recebe
+um candle por vez via update(bar) e devolve apenas os eventos novos.
+O estado por candle fica em buffers circulares de tamanho fixo (deque com maxlen)
+ou em extremos acumulados, então o custo por candle não cresce com o histórico.
+
+Modo replay: replay(df, stream) alimenta o DataFrame candle a candle e
+verify_replay(df, nome) confere, a cada prefixo, que stream.snapshot(eventos)
+é igual à função batch aplicada ao mesmo prefixo.
+"""
+
+import heapq
+import math
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core import patterns
+from core.incremental import ConfluenceLevels, LiquidityClusters
+from core.kernels import cluster_levels
+from core.sessions import in_sessions
+
+
+def _bar_values(bar) -> Tuple[float, float, float, float, Any]:
+    """
+    Normaliza um candle para (open, high, low, close, time).
+    Aceita dict/Series com chaves open/high/low/close (tempo em 'time',
+    'datetime', 'timestamp' ou no .name da Series) ou tupla (o, h, l, c[, time]).
+    """
+    if isinstance(bar, (tuple, list)):
+        o, h, l, c = bar[:4]
+        return o, h, l, c, (bar[4] if len(bar) > 4 else None)
+    t = None
+    for key in ('time', 'datetime', 'timestamp'):
+        if key in bar:
+            t = bar[key]
+            break
+    if t is None and isinstance(bar, pd.Series):
+        t = bar.name
+    return bar['open'], bar['high'], bar['low'], bar['close'], t
+
+
+def _fmax(values: Iterable[float]) -> float:
+    return np.fmax.reduce(np.asarray(list(values), dtype=float))
+
+
+def _fmin(values: Iterable[float]) -> float:
+    return np.fmin.reduce(np.asarray(list(values), dtype=float))
+
+
+class StreamingDetector:
+    """
+    Base dos detectores incrementais.
+    Subclasses implementam _step(o, h, l, c, t) usando self.n como índice do candle
+    atual e snapshot(events) com o resultado no formato da função batch.
+    """
+    batch = None  # função equivalente em core.patterns
+
+    def __init__(self):
+        self.n = 0
+
+    def update(self, bar) -> List[Any]:
+        o, h, l, c, t = _bar_values(bar)
+        events = self._step(o, h, l, c, t)
+        self.n += 1
+        return events
+
+    def _step(self, o, h, l, c, t) -> List[Any]:
+        raise NotImplementedError
+
+    def snapshot(self, events: List[Any]) -> Any:
+        """Resultado batch equivalente ao prefixo já processado (None se não houver)."""
+        return None
+
+    def batch_kwargs(self) -> Dict[str, Any]:
+        """Parâmetros a repassar para a função batch no replay."""
+        return {}
+
+
+# ------------------- NÍVEL BÁSICO -------------------
+
+class StreamingBOS(StreamingDetector):
+    """BOS do candle atual contra os `lookback` candles anteriores. Evento: {'index', 'direction'}."""
+    batch = staticmethod(patterns.detect_bos)
+
+    def __init__(self, lookback: int = 2):
+        super().__init__()
+        self.lookback = lookback
+        self.highs = deque(maxlen=lookback)
+        self.lows = deque(maxlen=lookback)
+        self.last_break = -1
+
+    def _step(self, o, h, l, c, t):
+        events = []
+        if self.n >= self.lookback:
+            if c > _fmax(self.highs):
+                events.append({'index': self.n, 'direction': 'up'})
+            elif c < _fmin(self.lows):
+                events.append({'index': self.n, 'direction': 'down'})
+        if events:
+            self.last_break = self.n
+        if self.lookback:
+            self.highs.append(h)
+            self.lows.append(l)
+        return events
+
+    def snapshot(self, events):
+        return self.last_break == self.n - 1
+
+    def batch_kwargs(self):
+        return {'lookback': self.lookback}
+
+
+class StreamingCHoCH(StreamingDetector):
+    """Rompimentos do CHoCH com máximo/mínimo acumulados. Evento: {'index', 'direction': +1/-1}."""
+    batch = staticmethod(patterns.detect_choch)
+
+    def __init__(self):
+        super().__init__()
+        self.max_high = math.nan
+        self.min_low = math.nan
+        self.has_up = False
+        self.has_down = False
+
+    @property
+    def choch(self) -> bool:
+        return self.has_up and self.has_down
+
+    def _step(self, o, h, l, c, t):
+        events = []
+        if self.n >= 1:
+            if c > self.max_high:
+                events.append({'index': self.n, 'direction': 1})
+                self.has_up = True
+            if c < self.min_low:
+                events.append({'index': self.n, 'direction': -1})
+                self.has_down = True
+        self.max_high = np.fmax(self.max_high, h)
+        self.min_low = np.fmin(self.min_low, l)
+        return events
+
+    def snapshot(self, events):
+        return self.choch
+
+
+class StreamingFVG(StreamingDetector):
+    """FVG na janela dos três últimos candles; emite o gap com o índice do primeiro candle."""
+    batch = staticmethod(patterns.detect_fvg)
+
+    def __init__(self, lookback: int = 3):
+        super().__init__()
+        self.lookback = lookback
+        self.window = deque(maxlen=3)
+
+    def _step(self, o, h, l, c, t):
+        self.window.append((h, l))
+        if len(self.window) < 3:
+            return []
+        (h0, l0), _, (h2, l2) = self.window
+        i = self.n - 2
+        if h0 < l2:
+            return [{'side': 'bull', 'lower': h0, 'upper': l2, 'index': i}]
+        if l0 > h2:
+            return [{'side': 'bear', 'lower': h2, 'upper': l0, 'index': i}]
+        return []
+
+    def snapshot(self, events):
+        return list(events) if self.n >= self.lookback else []
+
+    def batch_kwargs(self):
+        return {'lookback': self.lookback}
+
+
+class StreamingOrderBlocks(StreamingDetector):
+    """Order Blocks confirmados dois candles depois; como no batch, só nos primeiros `lookback` candles."""
+    batch = staticmethod(patterns.detect_order_blocks)
+
+    def __init__(self, min_range: float = 0, lookback: int = 50):
+        super().__init__()
+        self.min_range = min_range
+        self.lookback = lookback
+        self.window = deque(maxlen=3)
+
+    def _step(self, o, h, l, c, t):
+        self.window.append((o, h, l, c))
+        j = self.n - 2
+        if len(self.window) < 3 or j > self.lookback - 2:
+            return []
+        po, ph, pl, pc = self.window[0]
+        nc = c
+        if ph - pl < self.min_range:
+            return []
+        if pc < po and nc > ph:
+            return [{'side': 'bull', 'zone': (pl, ph), 'index': j}]
+        if pc > po and nc < pl:
+            return [{'side': 'bear', 'zone': (pl, ph), 'index': j}]
+        return []
+
+    def snapshot(self, events):
+        return list(events)
+
+    def batch_kwargs(self):
+        return {'min_range': self.min_range, 'lookback': self.lookback}
+
+
+class StreamingLiquidityZones(StreamingDetector):
+    """
+    Contagem incremental de toques por nível (high e low de cada candle) com o
+    agrupamento do batch (incremental.LiquidityClusters: âncora mais antiga a até
+    `tol`, highs antes de lows), busca O(log k) por candle.
+    Evento quando uma zona passa a existir: {'index', 'level', 'touches'}.
+    `capacity` limita as âncoras mantidas (descarta a tocada há mais tempo);
+    o snapshot é exato enquanto o limite não é atingido.
+    """
+    batch = staticmethod(patterns.detect_liquidity_zones)
+    DEFAULT_CAPACITY = 10_000
+
+    def __init__(self, min_touches: int = 2, tol: float = 1e-5,
+                 capacity: Optional[int] = DEFAULT_CAPACITY):
+        super().__init__()
+        self.min_touches = min_touches
+        self.tol = tol
+        self.capacity = capacity
+        self.clusters = LiquidityClusters(tol, min_touches, capacity)
+        self.changes: Tuple[list, list] = ([], [])   # (entraram, saíram) no último candle
+
+    def _step(self, o, h, l, c, t):
+        added, removed = self.changes = self.clusters.update(h, l, self.n)
+        gone = {lvl for lvl, _ in removed}
+        anchors = self.clusters.anchors
+        return [{'index': self.n, 'level': lvl, 'touches': anchors[lvl][0]}
+                for lvl, _ in added if lvl not in gone]
+
+    @property
+    def zones(self) -> Dict[float, int]:
+        """Níveis com toques >= min_touches, na ordem do batch."""
+        return self.clusters.zones()
+
+    def snapshot(self, events):
+        return self.zones
+
+    def batch_kwargs(self):
+        return {'min_touches': self.min_touches, 'tol': self.tol}
+
+
+class StreamingLiquiditySweep(StreamingDetector):
+    """
+    Sweeps do candle atual contra zonas fixas (índice ordenado + busca binária).
+    Sem `zones`, usa as zonas dos últimos `lookback` candles (buffer circular),
+    versão causal que não tem equivalente batch exato.
+    """
+    batch = staticmethod(patterns.detect_liquidity_sweep)
+
+    def __init__(self, zones: Optional[List[float]] = None, lookback: int = 10,
+                 body_ratio: float = 0.5, tol: float = 1e-5):
+        super().__init__()
+        self.zones = None if zones is None else list(zones)
+        self.lookback = lookback
+        self.body_ratio = body_ratio
+        self.tol = tol
+        self.window = deque(maxlen=lookback)
+        if self.zones is not None:
+            self._index(self.zones)
+
+    def _index(self, zones: List[float]):
+        z = np.asarray(zones, dtype=float)
+        levels, first = np.unique(z, return_index=True)
+        keep = ~np.isnan(levels)
+        self._levels, self._first = levels[keep], first[keep]
+        self._zone_list = zones
+
+    def _step(self, o, h, l, c, t):
+        if self.zones is None:
+            self.window.append((h, l))
+            # mesmas zonas de detect_liquidity_zones sobre a janela (highs antes de lows)
+            highs, lows = zip(*self.window)
+            levels, touches = cluster_levels(np.array(highs + lows, dtype=float), 1e-5)
+            self._index(levels[touches >= 2].tolist())
+        if self.n == 0:
+            return []
+        rng = h - l
+        if rng == 0 or abs(c - o) / rng > self.body_ratio:
+            return []
+        lo = np.searchsorted(self._levels, l, side='left')
+        hi = np.searchsorted(self._levels, h, side='right')
+        hits = []
+        tol = self.tol
+        for k in range(lo, hi):
+            z = self._levels[k]
+            if h > z + tol and c < z - tol:
+                hits.append((self._first[k], 'up'))
+            elif l < z - tol and c > z + tol:
+                hits.append((self._first[k], 'down'))
+        hits.sort()
+        return [{'index': self.n, 'level': self._zone_list[p], 'direction': d} for p, d in hits]
+
+    def snapshot(self, events):
+        return list(events) if self.zones is not None else None
+
+    def batch_kwargs(self):
+        return {'zones': self.zones, 'lookback': self.lookback,
+                'body_ratio': self.body_ratio, 'tol': self.tol}
+
+
+# ------------------- NÍVEL INTERMEDIÁRIO -------------------
+
+class StreamingInducement(StreamingDetector):
+    """Sweep do candle anterior confirmado pelo close do candle atual."""
+    batch = staticmethod(patterns.detect_inducement)
+
+    def __init__(self, zones: Optional[List[float]] = None):
+        super().__init__()
+        self.sweep = StreamingLiquiditySweep(zones)
+        self.pending: List[Dict[str, Any]] = []
+
+    def _step(self, o, h, l, c, t):
+        events = []
+        for sw in self.pending:
+            z = sw['level']
+            if (sw['direction'] == 'up' and c > z) or (sw['direction'] == 'down' and c < z):
+                events.append({'sweep': sw, 'confirm_idx': self.n})
+        self.pending = self.sweep.update((o, h, l, c, t))
+        return events
+
+    def snapshot(self, events):
+        return list(events) if self.sweep.zones is not None else None
+
+    def batch_kwargs(self):
+        return {'zones': self.sweep.zones}
+
+
+class StreamingEquilibrium(StreamingDetector):
+    """Premium/Discount com máximo e mínimo acumulados; evento quando a faixa muda."""
+    batch = staticmethod(patterns.compute_equilibrium_zone)
+
+    def __init__(self):
+        super().__init__()
+        self.swing_high = math.nan
+        self.swing_low = math.nan
+        self.zone: Optional[Dict[str, tuple]] = None
+
+    def _step(self, o, h, l, c, t):
+        hi, lo = np.fmax(self.swing_high, h), np.fmin(self.swing_low, l)
+        changed = self.zone is None or hi != self.swing_high or lo != self.swing_low
+        self.swing_high, self.swing_low = hi, lo
+        if not changed:
+            return []
+        mid = (hi + lo) / 2
+        self.zone = {'premium': (mid, hi), 'discount': (lo, mid)}
+        return [{'index': self.n, **self.zone}]
+
+    def snapshot(self, events):
+        return self.zone
+
+
+class StreamingKillzones(StreamingDetector):
+    """Candles cujo horário cai nas sessões (ver core.sessions). Evento: {'index', 'time'}."""
+    batch = staticmethod(patterns.detect_killzones)
+
+    def __init__(self, sessions: Optional[Sequence[tuple]] = None):
+        super().__init__()
+        self.sessions = tuple(sessions) if sessions is not None else ((8, 10), (13, 15))
+
+    def _step(self, o, h, l, c, t):
+        if t is None:
+            raise ValueError("Candle sem horário: killzones exigem 'time' ou índice datetime")
+        ts = pd.Timestamp(t)
+        if in_sessions(ts, self.sessions):
+            return [{'index': self.n, 'time': ts}]
+        return []
+
+    def snapshot(self, events):
+        return [e['time'] for e in events]
+
+    def batch_kwargs(self):
+        return {'sessions': self.sessions}
+
+
+# ------------------- NÍVEL AVANÇADO -------------------
+
+class StreamingMSS(StreamingDetector):
+    """MSS no candle atual: BOS neste candle com CHoCH já ocorrido no histórico."""
+    batch = staticmethod(patterns.detect_mss)
+
+    def __init__(self):
+        super().__init__()
+        self.bos = StreamingBOS()
+        self.choch = StreamingCHoCH()
+        self.last = -1
+
+    def _step(self, o, h, l, c, t):
+        bos = self.bos.update((o, h, l, c, t))
+        self.choch.update((o, h, l, c, t))
+        if bos and self.choch.choch:
+            self.last = self.n
+            return [{'index': self.n, 'direction': bos[0]['direction']}]
+        return []
+
+    def snapshot(self, events):
+        return self.last == self.n - 1
+
+
+class StreamingBreakerBlocks(StreamingDetector):
+    """Breaker Blocks do candle anterior, confirmados pelo close do atual."""
+    batch = staticmethod(patterns.detect_breaker_blocks)
+
+    def __init__(self, min_range: float = 0):
+        super().__init__()
+        self.min_range = min_range
+        self.window = deque(maxlen=3)
+
+    def _step(self, o, h, l, c, t):
+        self.window.append((h, l))
+        if len(self.window) < 3:
+            return []
+        (ph, pl), (h1, l1), _ = self.window
+        if h1 - l1 < self.min_range:
+            return []
+        if l1 < pl and c > h1:
+            return [{'index': self.n - 1, 'type': 'bearish', 'zone': (l1, h1)}]
+        if h1 > ph and c < l1:
+            return [{'index': self.n - 1, 'type': 'bullish', 'zone': (l1, h1)}]
+        return []
+
+    def snapshot(self, events):
+        return list(events)
+
+    def batch_kwargs(self):
+        return {'min_range': self.min_range}
+
+
+class StreamingConfluence(StreamingDetector):
+    """
+    Confluência incremental: níveis novos de OB e FVG e as mudanças nas zonas
+    de liquidez atualizam incremental.ConfluenceLevels, que mantém a seleção do
+    batch refazendo só os níveis a até `tolerance` da mudança. Evento quando
+    um nível passa a ser confluência: {'index', 'level'}.
+    `capacity` limita os níveis de OB/FVG mantidos (saem os mais antigos; as
+    zonas de liquidez têm o limite de StreamingLiquidityZones); o snapshot é
+    exato enquanto nenhum nível foi descartado.
+    """
+    batch = staticmethod(patterns.detect_confluence_zones)
+    DEFAULT_CAPACITY = 10_000
+
+    def __init__(self, tolerance: float = 1e-5, capacity: Optional[int] = DEFAULT_CAPACITY):
+        super().__init__()
+        self.tolerance = tolerance
+        self.capacity = capacity
+        self.ob = StreamingOrderBlocks()
+        self.fvg = StreamingFVG()
+        self.liq = StreamingLiquidityZones()
+        self.levels = ConfluenceLevels(tolerance)
+        self.zone_levels: deque = deque()   # (nível, key) de OB/FVG, do mais antigo
+
+    def _step(self, o, h, l, c, t):
+        bar = (o, h, l, c, t)
+        items = [(lvl, (0, ob['index'], k))
+                 for ob in self.ob.update(bar) for k, lvl in enumerate(ob['zone'])]
+        items += [(lvl, (1, gap['index'], k))
+                  for gap in self.fvg.update(bar) for k, lvl in enumerate((gap['lower'], gap['upper']))]
+        self.liq.update(bar)
+        added, removed = self.liq.changes
+        new = []
+        for lvl, key in removed:
+            new += self.levels.remove(lvl, (2,) + key)
+        for lvl, key in added:
+            new += self.levels.add(lvl, (2,) + key)
+        for item in items:
+            new += self.levels.add(*item)
+            self.zone_levels.append(item)
+        while self.capacity is not None and len(self.zone_levels) > self.capacity:
+            new += self.levels.remove(*self.zone_levels.popleft())
+        accepted = self.levels.accepted
+        return [{'index': self.n, 'level': lvl}
+                for lvl, key in sorted(set(new), key=lambda it: it[1]) if (lvl, key) in accepted]
+
+    def snapshot(self, events):
+        return self.levels.selected()
+
+    def batch_kwargs(self):
+        return {'tolerance': self.tolerance}
+
+
+class StreamingMitigationBlocks(StreamingDetector):
+    """Mitigation Blocks no candle atual contra os dois anteriores."""
+    batch = staticmethod(patterns.detect_mitigation_blocks)
+
+    def __init__(self):
+        super().__init__()
+        self.window = deque(maxlen=2)
+
+    def _step(self, o, h, l, c, t):
+        events = []
+        if len(self.window) == 2:
+            (h2, l2), (h1, l1) = self.window
+            if h1 > h2 and c <= h2:
+                events.append({'index': self.n, 'type': 'bullish', 'zone': (l2, h2)})
+            if l1 < l2 and c >= l2:
+                events.append({'index': self.n, 'type': 'bearish', 'zone': (l2, h2)})
+        self.window.append((h, l))
+        return events
+
+    def snapshot(self, events):
+        return list(events)
+
+
+class StreamingLiquidityVoids(StreamingDetector):
+    """Gaps entre o candle anterior e o atual."""
+    batch = staticmethod(patterns.detect_liquidity_voids)
+
+    def __init__(self, tol: float = 0.0):
+        super().__init__()
+        self.tol = tol
+        self.prev: Optional[Tuple[float, float]] = None
+
+    def _step(self, o, h, l, c, t):
+        events = []
+        if self.prev is not None:
+            ph, pl = self.prev
+            if l > ph + self.tol:
+                events.append({'index': self.n, 'type': 'bullish', 'zone': (ph, l)})
+            if h < pl - self.tol:
+                events.append({'index': self.n, 'type': 'bearish', 'zone': (h, pl)})
+        self.prev = (h, l)
+        return events
+
+    def snapshot(self, events):
+        return list(events)
+
+    def batch_kwargs(self):
+        return {'tol': self.tol}
+
+
+class StreamingStopHunts(StreamingDetector):
+    """Stop Hunts do candle atual (pavio longo). Evento: {'index', 'wick': 'lower'/'upper'}."""
+    batch = staticmethod(patterns.detect_stop_hunts)
+
+    def __init__(self, wick_ratio: float = 0.5):
+        super().__init__()
+        self.wick_ratio = wick_ratio
+
+    def _step(self, o, h, l, c, t):
+        rng = h - l
+        if self.n == 0 or rng == 0:
+            return []
+        events = []
+        if (min(o, c) - l) / rng > self.wick_ratio and c <= o:
+            events.append({'index': self.n, 'wick': 'lower'})
+        if (h - max(o, c)) / rng > self.wick_ratio and c >= o:
+            events.append({'index': self.n, 'wick': 'upper'})
+        return events
+
+    def snapshot(self, events):
+        return [e['index'] for e in events]
+
+    def batch_kwargs(self):
+        return {'wick_ratio': self.wick_ratio}
+
+
+class StreamingMultiFVG(StreamingDetector):
+    """FVGs liberados a partir do `min_gaps`-ésimo gap (os anteriores saem juntos)."""
+    batch = staticmethod(patterns.detect_multi_fvg)
+
+    def __init__(self, min_gaps: int = 2):
+        super().__init__()
+        self.min_gaps = min_gaps
+        self.fvg = StreamingFVG()
+        self.pending: deque = deque(maxlen=max(min_gaps - 1, 1))
+        self.count = 0
+
+    def _step(self, o, h, l, c, t):
+        gaps = self.fvg.update((o, h, l, c, t))
+        events = []
+        for gap in gaps:
+            self.count += 1
+            if self.count < self.min_gaps:
+                self.pending.append(gap)
+                continue
+            events.extend(self.pending)
+            self.pending.clear()
+            events.append(gap)
+        return events
+
+    def snapshot(self, events):
+        return list(events)
+
+    def batch_kwargs(self):
+        return {'min_gaps': self.min_gaps}
+
+
+class StreamingOrderFlowImbalance(StreamingDetector):
+    """
+    Ranges acima de factor * maior range até agora.
+    Evento quando o candle atual passa o limiar; candidatos antigos saem de um
+    heap por range quando o máximo sobe, então o snapshot bate com o batch do prefixo.
+    """
+    batch = staticmethod(patterns.detect_order_flow_imbalance)
+
+    def __init__(self, factor: float = 2.0):
+        super().__init__()
+        self.factor = factor
+        self.max_range = math.nan
+        self.heap: List[Tuple[float, int]] = []
+
+    def _step(self, o, h, l, c, t):
+        r = h - l
+        self.max_range = np.fmax(self.max_range, r)
+        threshold = self.factor * self.max_range
+        events = []
+        if r > threshold:
+            heapq.heappush(self.heap, (r, self.n))
+            events.append({'index': self.n, 'range': r})
+        while self.heap and not self.heap[0][0] > threshold:
+            heapq.heappop(self.heap)
+        return events
+
+    def snapshot(self, events):
+        return sorted(i for _, i in self.heap)
+
+    def batch_kwargs(self):
+        return {'factor': self.factor}
+
+
+STREAMING_DETECTORS: Dict[str, type] = {
+    cls.batch.__name__: cls for cls in (
+        StreamingBOS,
+        StreamingCHoCH,
+        StreamingFVG,
+        StreamingOrderBlocks,
+        StreamingLiquidityZones,
+        StreamingLiquiditySweep,
+        StreamingInducement,
+        StreamingEquilibrium,
+        StreamingKillzones,
+        StreamingMSS,
+        StreamingBreakerBlocks,
+        StreamingConfluence,
+        StreamingMitigationBlocks,
+        StreamingLiquidityVoids,
+        StreamingStopHunts,
+        StreamingMultiFVG,
+        StreamingOrderFlowImbalance,
+    )
+}
+
+
+def make_streaming(detector, **params) -> StreamingDetector:
+    """Cria o detector incremental a partir da função batch (ou do seu nome)."""
+    name = detector if isinstance(detector, str) else detector.__name__
+    try:
+        cls = STREAMING_DETECTORS[name]
+    except KeyError:
+        raise ValueError(f"Sem versão streaming para: {name}")
+    return cls(**params)
+
+
+class StreamingPipeline:
+    """Conjunto de detectores incrementais alimentados pelo mesmo candle."""
+
+    def __init__(self, detectors: Iterable):
+        self.streams: Dict[str, StreamingDetector] = {}
+        for det in detectors:
+            stream = det if isinstance(det, StreamingDetector) else make_streaming(det)
+            self.streams[type(stream).batch.__name__] = stream
+
+    def update(self, bar) -> Dict[str, List[Any]]:
+        """Retorna {nome do detector: eventos novos}, só com detectores que emitiram."""
+        values = _bar_values(bar)
+        out = {}
+        for name, stream in self.streams.items():
+            events = stream.update(values)
+            if events:
+                out[name] = events
+        return out
+
+
+def iter_bars(df: pd.DataFrame):
+    """Candles do DataFrame como tuplas (o, h, l, c, time) sem criar Series por linha."""
+    times = df.index if isinstance(df.index, pd.DatetimeIndex) else [None] * len(df)
+    cols = [df[c].tolist() for c in ('open', 'high', 'low', 'close')]
+    return zip(*cols, times)
+
+
+def replay(df: pd.DataFrame, stream: StreamingDetector) -> List[Any]:
+    """Alimenta o detector com todos os candles de df e retorna todos os eventos emitidos."""
+    events: List[Any] = []
+    for bar in iter_bars(df):
+        events.extend(stream.update(bar))
+    return events
+
+
+def verify_replay(df: pd.DataFrame, detector, every: int = 1, **params) -> bool:
+    """
+    Prova de equivalência: a cada `every` candles (e no último) compara
+    stream.snapshot(eventos) com a função batch aplicada ao mesmo prefixo.
+    Levanta AssertionError no primeiro prefixo divergente e ValueError se o
+    detector não tiver equivalente batch exato com esses parâmetros.
+    """
+    stream = make_streaming(detector, **params)
+    events: List[Any] = []
+    n = len(df)
+    for i, bar in enumerate(iter_bars(df)):
+        events.extend(stream.update(bar))
+        if (i + 1) % every and i != n - 1:
+            continue
+        got = stream.snapshot(events)
+        if got is None:
+            raise ValueError(f"{type(stream).__name__} não tem equivalente batch com esses parâmetros")
+        expected = stream.batch(df.iloc[:i + 1], **stream.batch_kwargs())
+        if isinstance(expected, pd.Index):
+            expected = list(expected)
+        if got != expected:
+            raise AssertionError(f"{type(stream).__name__}: divergência no candle {i}: {got!r} != {expected!r}")
+    return True
@@ -0,0 +1,194 @@
+# data/async_provider.py
+
+"""
+Download assíncrono de vários tickers/timeframes ao mesmo tempo.
+Todos os pedidos compartilham uma única aiohttp.ClientSession (pool de
+conexões), limitados por um semáforo de concorrência, com retry e backoff
+exponencial para erros de rede, 429 e 5xx. O tempo total de um lote fica
+próximo do pedido mais lento em vez da soma de todos.
+
+Provedores assíncronos só montam a requisição e interpretam a resposta;
+AsyncFetcher cuida de sessão, concorrência e retries.
+"""
+
+import asyncio
+import random
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple, Union
+
+import aiohttp
+import pandas as pd
+
+from data.cache import CachedProvider, format_timestamp
+from data.store import normalize_ohlc
+
+Job = Tuple[str, str]
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart"
+# timeframes do projeto (core.config.TIMEFRAMES) -> intervalos do Yahoo
+YAHOO_INTERVALS = {"M1": "1m", "M5": "5m", "M15": "15m", "M30": "30m", "H1": "60m", "D1": "1d"}
+
+ALPHA_URL = "https://www.alphavantage.co/query"
+ALPHA_INTERVALS = {"M1": "1min", "M5": "5min", "M15": "15min", "M30": "30min", "H1": "60min",
+                   "1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min", "1h": "60min", "60m": "60min"}
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status} em {url}")
+        self.status = status
+
+
+class AsyncDataProvider(Protocol):
+    def request(self, ticker: str, timeframe: str, start: str, end: str) -> Tuple[str, Dict[str, Any]]:
+        ...
+
+    def parse(self, payload: Any) -> pd.DataFrame:
+        ...
+
+
+def _utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+
+
+def _epoch(ts) -> int:
+    return int(_utc(ts).timestamp())
+
+
+class AsyncYahooProvider:
+    """Yahoo Finance via endpoint JSON de chart (v8)."""
+
+    def __init__(self, base_url: str = YAHOO_CHART_URL):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, ticker: str, timeframe: str, start: str, end: str) -> Tuple[str, Dict[str, Any]]:
+        params = {
+            'period1': _epoch(start),
+            'period2': _epoch(end),
+            'interval': YAHOO_INTERVALS.get(timeframe, timeframe),
+            'includePrePost': 'false',
+        }
+        return f"{self.base_url}/{ticker}", params
+
+    def parse(self, payload: Any) -> pd.DataFrame:
+        chart = payload.get('chart', {})
+        if chart.get('error'):
+            raise ValueError(f"Yahoo: {chart['error']}")
+        result = (chart.get('result') or [{}])[0]
+        quote = (result.get('indicators', {}).get('quote') or [{}])[0]
+        idx = pd.to_datetime(result.get('timestamp', []), unit='s', utc=True)
+        df = pd.DataFrame({col: quote.get(col, [None] * len(idx))
+                           for col in ('open', 'high', 'low', 'close', 'volume')}, index=idx, dtype='float64')
+        return normalize_ohlc(df.dropna(subset=['open', 'high', 'low', 'close']))
+
+
+class AsyncAlphaProvider:
+    """Alpha Vantage (séries diárias e intraday em JSON)."""
+
+    def __init__(self, api_key: str, base_url: str = ALPHA_URL):
+        if not api_key:
+            raise ValueError("API key is required for Alpha Vantage")
+        self.api_key = api_key
+        self.base_url = base_url
+
+    def request(self, ticker: str, timeframe: str, start: str, end: str) -> Tuple[str, Dict[str, Any]]:
+        params = {'symbol': ticker, 'apikey': self.api_key, 'outputsize': 'full', 'datatype': 'json'}
+        if timeframe in ALPHA_INTERVALS:
+            params.update(function='TIME_SERIES_INTRADAY', interval=ALPHA_INTERVALS[timeframe])
+        else:
+            params['function'] = 'TIME_SERIES_DAILY'
+        # a API não filtra por data; AsyncFetcher recorta o intervalo depois do parse
+        return self.base_url, params
+
+    def parse(self, payload: Any) -> pd.DataFrame:
+        if 'Error Message' in payload or 'Note' in payload:
+            raise ValueError(f"Alpha Vantage: {payload.get('Error Message') or payload.get('Note')}")
+        key = next((k for k in payload if k.startswith('Time Series')), None)
+        if key is None:
+            return normalize_ohlc(pd.DataFrame(columns=['time', 'open', 'high', 'low', 'close']))
+        df = pd.DataFrame.from_dict(payload[key], orient='index', dtype='float64')
+        df.columns = [c.split('. ', 1)[-1] for c in df.columns]
+        df.index = pd.to_datetime(df.index)
+        return normalize_ohlc(df)
+
+
+class AsyncFetcher:
+    """
+    Executa lotes de downloads com um provedor assíncrono.
+    - max_concurrency: pedidos simultâneos (também o tamanho do pool de conexões)
+    - retries / backoff: novas tentativas com espera backoff * 2**tentativa (+ jitter)
+    - timeout: tempo máximo por requisição, em segundos
+    """
+
+    def __init__(self, provider: AsyncDataProvider, max_concurrency: int = 10, retries: int = 3,
+                 backoff: float = 0.5, timeout: float = 30.0):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    def _session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+        return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def _get(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                   ticker: str, timeframe: str, start: str, end: str) -> pd.DataFrame:
+        url, params = self.provider.request(ticker, timeframe, start, end)
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    async with session.get(url, params=params) as resp:
+                        if resp.status != 200:
+                            raise HTTPStatusError(resp.status, url)
+                        payload = await resp.json(content_type=None)
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError, HTTPStatusError) as e:
+                retryable = not isinstance(e, HTTPStatusError) or e.status in RETRY_STATUS
+                if not retryable or attempt == self.retries:
+                    raise
+                # espera fora do semáforo para não segurar vaga de outro pedido
+                await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random() / 2))
+        df = self.provider.parse(payload)
+        return df[(df.index >= _utc(start)) & (df.index <= _utc(end))]
+
+    async def fetch_many(self, jobs: Iterable[Job], start, end,
+                         cache: Optional[CachedProvider] = None) -> Dict[Job, Union[pd.DataFrame, Exception]]:
+        """
+        Baixa todos os (ticker, timeframe) de `jobs` para [start, end] em paralelo.
+        Com `cache`, só os trechos ausentes do cache vão para a rede e o resultado
+        é lido do cache. Falhas de um job voltam como a exceção no lugar do DataFrame.
+        """
+        jobs = list(dict.fromkeys(jobs))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: Dict[Job, Union[pd.DataFrame, Exception]] = {}
+
+        async with self._session() as session:
+            if cache is None:
+                frames = await asyncio.gather(
+                    *(self._get(session, semaphore, t, tf, str(start), str(end)) for t, tf in jobs),
+                    return_exceptions=True)
+                return dict(zip(jobs, frames))
+
+            gaps: List[Tuple[Job, pd.Timestamp, pd.Timestamp]] = [
+                (job, lo, hi) for job in jobs for lo, hi in cache.missing(*job, start, end)]
+            frames = await asyncio.gather(
+                *(self._get(session, semaphore, t, tf, format_timestamp(lo), format_timestamp(hi))
+                  for (t, tf), lo, hi in gaps),
+                return_exceptions=True)
+
+        for (job, lo, hi), df in zip(gaps, frames):
+            if isinstance(df, Exception):
+                results[job] = df
+            else:
+                cache.add(*job, lo, hi, df)
+        for job in jobs:
+            if job not in results:
+                results[job] = cache.read(*job, start, end)
+        return results
+
+    def fetch_all(self, jobs: Iterable[Job], start, end,
+                  cache: Optional[CachedProvider] = None) -> Dict[Job, Union[pd.DataFrame, Exception]]:
+        """Versão síncrona de fetch_many (abre e fecha o próprio event loop)."""
+        return asyncio.run(self.fetch_many(jobs, start, end, cache=cache))
@@ -0,0 +1,187 @@
+# data/cache.py
+
+"""
+Cache em disco na frente de qualquer DataProvider (core.data_provider).
+Os candles baixados vão para um ParquetStore local e um índice JSON guarda,
+por (ticker, timeframe), os intervalos de datas já cobertos. Um fetch pede ao
+provedor só os trechos que faltam, grava-os e devolve o intervalo pedido lido
+do disco. Séries inteiras são despejadas por LRU quando o cache passa de
+max_bytes ou max_series.
+"""
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from core.data_provider import DataProvider
+from data.store import ParquetStore, normalize_ohlc
+
+Interval = Tuple[pd.Timestamp, pd.Timestamp]
+INDEX_FILE = "_coverage.json"
+
+
+def _utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+
+
+def format_timestamp(ts: pd.Timestamp) -> str:
+    # provedores diários esperam 'YYYY-MM-DD'; intraday recebe o timestamp completo
+    if ts == ts.normalize():
+        return ts.strftime('%Y-%m-%d')
+    return ts.tz_localize(None).isoformat(sep=' ')
+
+
+def merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Une intervalos sobrepostos ou encostados; retorna ordenado."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_intervals(covered: List[Interval], start: pd.Timestamp, end: pd.Timestamp) -> List[Interval]:
+    """Trechos de [start, end] que não estão em `covered` (já mesclado)."""
+    gaps: List[Interval] = []
+    cursor = start
+    for lo, hi in covered:
+        if hi <= cursor:
+            continue
+        if lo >= end:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo))
+        cursor = max(cursor, hi)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class CachedProvider:
+    """
+    DataProvider com cache local e preenchimento incremental de lacunas.
+    - provider: provedor real (YahooProvider, AlphaProvider, ...)
+    - cache_dir: diretório do cache (ParquetStore + índice de cobertura)
+    - max_bytes / max_series: limites para despejo LRU por série
+    `requests` registra cada chamada feita ao provedor: (ticker, timeframe, start, end).
+    """
+
+    def __init__(self, provider: DataProvider, cache_dir: Union[str, Path],
+                 max_bytes: Optional[int] = None, max_series: Optional[int] = None):
+        self.provider = provider
+        self.store = ParquetStore(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_series = max_series
+        self.requests: List[Tuple[str, str, str, str]] = []
+        self._index_path = Path(cache_dir) / INDEX_FILE
+        self._index: Dict[str, Dict] = self._load_index()
+
+    @staticmethod
+    def _key(ticker: str, timeframe: str) -> str:
+        return f"{ticker}|{timeframe}"
+
+    def _load_index(self) -> Dict[str, Dict]:
+        if not self._index_path.exists():
+            return {}
+        with open(self._index_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_index(self):
+        self._index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._index_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, indent=1)
+        os.replace(tmp, self._index_path)
+
+    def coverage(self, ticker: str, timeframe: str) -> List[Interval]:
+        entry = self._index.get(self._key(ticker, timeframe), {})
+        return [(pd.Timestamp(lo), pd.Timestamp(hi)) for lo, hi in entry.get('intervals', [])]
+
+    def missing(self, ticker: str, timeframe: str, start, end) -> List[Interval]:
+        """Trechos de [start, end] ainda não cacheados para a série."""
+        return missing_intervals(self.coverage(ticker, timeframe), _utc(start), _utc(end))
+
+    def add(self, ticker: str, timeframe: str, lo: pd.Timestamp, hi: pd.Timestamp, df: Optional[pd.DataFrame]):
+        """Grava os candles baixados para [lo, hi] e marca o trecho como coberto."""
+        if df is not None and len(df):
+            self.store.write(ticker, timeframe, normalize_ohlc(df))
+        covered = self.coverage(ticker, timeframe)
+        # o trecho ainda em formação (depois de agora) nunca conta como coberto
+        now = pd.Timestamp.now(tz='UTC')
+        if lo < now:
+            covered.append((lo, min(hi, now)))
+        key = self._key(ticker, timeframe)
+        entry = self._index.setdefault(key, {'last_access': self._tick()})
+        entry['intervals'] = [[a.isoformat(), b.isoformat()] for a, b in merge_intervals(covered)]
+        # tamanho em disco guardado no índice: o despejo não varre os arquivos
+        entry['bytes'] = self._series_bytes(key)
+        self._save_index()
+
+    def read(self, ticker: str, timeframe: str, start, end) -> pd.DataFrame:
+        """Lê [start, end] do cache (sem rede), atualizando o LRU."""
+        key = self._key(ticker, timeframe)
+        self._index.setdefault(key, {'intervals': []})['last_access'] = self._tick()
+        self._evict(keep=key)
+        self._save_index()
+        return self.store.read(ticker, timeframe, _utc(start), _utc(end),
+                               columns=self.store.columns(ticker, timeframe))
+
+    def fetch(self, ticker: str, timeframe: str, start: str, end: str) -> pd.DataFrame:
+        for lo, hi in self.missing(ticker, timeframe, start, end):
+            request = (ticker, timeframe, format_timestamp(lo), format_timestamp(hi))
+            self.requests.append(request)
+            self.add(ticker, timeframe, lo, hi, self.provider.fetch(*request))
+        return self.read(ticker, timeframe, start, end)
+
+    def _tick(self) -> float:
+        # relógio de acesso estritamente crescente, mesmo com chamadas no mesmo instante
+        last = max((e['last_access'] for e in self._index.values()), default=0.0)
+        return max(time.time(), last + 1e-6)
+
+    def _series_bytes(self, key: str) -> int:
+        ticker, timeframe = key.split('|', 1)
+        root = self.store.series_dir(ticker, timeframe)
+        return sum(p.stat().st_size for p in root.rglob('*.parquet'))
+
+    def _indexed_bytes(self, key: str) -> int:
+        """Bytes da série guardados no índice (medidos uma vez se o índice é antigo)."""
+        entry = self._index[key]
+        if 'bytes' not in entry:
+            entry['bytes'] = self._series_bytes(key)
+        return entry['bytes']
+
+    def size_bytes(self) -> int:
+        return sum(self._series_bytes(k) for k in self._index)
+
+    def _evict(self, keep: str):
+        if self.max_bytes is None and self.max_series is None:
+            return
+        total = sum(self._indexed_bytes(k) for k in self._index) if self.max_bytes is not None else 0
+
+        def over_limit() -> bool:
+            if self.max_series is not None and len(self._index) > self.max_series:
+                return True
+            return self.max_bytes is not None and total > self.max_bytes
+
+        by_age = sorted((k for k in self._index if k != keep), key=lambda k: self._index[k]['last_access'])
+        while by_age and over_limit():
+            key = by_age.pop(0)
+            total -= self._indexed_bytes(key)
+            self.invalidate(*key.split('|', 1), save=False)
+
+    def invalidate(self, ticker: str, timeframe: str, save: bool = True):
+        """Remove uma série do cache (dados e cobertura)."""
+        self._index.pop(self._key(ticker, timeframe), None)
+        shutil.rmtree(self.store.series_dir(ticker, timeframe), ignore_errors=True)
+        if save:
+            self._save_index()
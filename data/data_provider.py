@@ -0,0 +1,55 @@
+# data/data_provider.py
+
+"""
+Ponto único de entrada de dados do backtest: get_data(source, ...).
+- source = diretório (ou ParquetStore): lê do store Parquet local (data.store)
+- source = 'local' / 'parquet': store padrão em data/data_assets/store
+  (timeframes não gravados no store são gerados a partir do M1, data.resample)
+- qualquer outro nome: provedor remoto de core.data_provider (yahoo, alpha, ...),
+  opcionalmente atrás do cache local de data.cache (cache_dir=...)
+O retorno é sempre um DataFrame OHLC com DatetimeIndex em UTC.
+"""
+
+import os
+from pathlib import Path
+from typing import Union
+
+import pandas as pd
+
+from core.data_provider import get_provider
+from data.cache import CachedProvider
+from data.resample import resample_ohlc
+from data.store import ParquetStore, normalize_ohlc
+
+DEFAULT_STORE_DIR = Path(__file__).parent / "data_assets" / "store"
+LOCAL_SOURCES = ("local", "parquet", "store")
+BASE_TIMEFRAME = "M1"
+
+
+def resolve_store(source: Union[str, Path, ParquetStore]) -> Union[ParquetStore, None]:
+    """Store Parquet correspondente a `source`, ou None se for um provedor remoto."""
+    if isinstance(source, ParquetStore):
+        return source
+    if isinstance(source, str) and source.lower() in LOCAL_SOURCES:
+        return ParquetStore(os.environ.get("SMC_DATA_DIR", DEFAULT_STORE_DIR))
+    if isinstance(source, Path) or os.path.isdir(source):
+        return ParquetStore(source)
+    return None
+
+
+def get_data(source, symbol: str, timeframe: str, start, end, cache_dir=None,
+             **provider_kwargs) -> pd.DataFrame:
+    """
+    Candles OHLC de `symbol`/`timeframe` entre start e end (inclusive).
+    Com cache_dir, provedores remotos só baixam os trechos ainda não cacheados.
+    """
+    store = resolve_store(source)
+    if store is not None:
+        if timeframe in store.timeframes(symbol) or BASE_TIMEFRAME not in store.timeframes(symbol):
+            return store.read(symbol, timeframe, start, end)
+        return resample_ohlc(store.read(symbol, BASE_TIMEFRAME, start, end), timeframe)
+    provider = get_provider(source, **provider_kwargs)
+    if cache_dir is not None:
+        provider = CachedProvider(provider, cache_dir)
+    df = provider.fetch(symbol, timeframe, str(start), str(end))
+    return normalize_ohlc(df)
@@ -0,0 +1,205 @@
+# data/ingest.py
+
+"""
+Leitura de CSVs de OHLC grandes sem travar a interface nem estourar memória.
+- read_ohlc_csv: lê em blocos só as colunas de tempo/OHLC/volume, com dtypes
+  explícitos e parser de datas de formato fixo (detectado na primeira linha),
+  reportando progresso pela posição no arquivo
+- load_ohlc: CSV ou Parquet; opcionalmente grava um Parquet ao lado do CSV no
+  primeiro carregamento e o reutiliza enquanto o CSV e as opções de leitura
+  não mudarem
+- load_in_background: o mesmo numa thread, com callbacks de progresso/fim/erro
+"""
+
+import inspect
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core.kernels import OHLC_COLUMNS
+from data.store import normalize_ohlc
+
+CHUNK_ROWS = 500_000
+PARQUET_SUFFIX = ".ohlc.parquet"
+# opções de read_ohlc_csv que mudam o resultado; ficam nos metadados do Parquet
+PARSE_OPTIONS = ('sep', 'dtype', 'time_format')
+_OPTIONS_KEY = b'ohlc_parse_options'
+_TIME_NAMES = ('datetime', 'time', 'timestamp', 'date', 'gmt time', 'local time')
+_EXTRA_COLUMNS = ('volume', 'tick_volume', 'tickvol', 'vol')
+# formatos comuns de exportação (MT4/MT5, Dukascopy, corretoras)
+DATETIME_FORMATS = (
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%SZ',
+    '%Y-%m-%d %H:%M:%S.%f', '%Y.%m.%d %H:%M:%S', '%Y.%m.%d %H:%M', '%d.%m.%Y %H:%M:%S.%f',
+    '%d.%m.%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%Y%m%d %H:%M:%S', '%Y-%m-%d',
+)
+
+
+def _header(path: Path, sep: str) -> List[str]:
+    with open(path, encoding='utf-8-sig') as f:
+        return [c.strip() for c in f.readline().rstrip('\r\n').split(sep)]
+
+
+def _first_value(path: Path, sep: str, position: int) -> str:
+    with open(path, encoding='utf-8-sig') as f:
+        f.readline()
+        line = f.readline().rstrip('\r\n')
+    return line.split(sep)[position].strip() if line else ''
+
+
+def detect_datetime_format(sample: str) -> Optional[str]:
+    """Formato de DATETIME_FORMATS que casa com `sample`; None para epoch numérico."""
+    if sample.replace('.', '', 1).isdigit():
+        return None
+    for fmt in DATETIME_FORMATS:
+        try:
+            datetime.strptime(sample, fmt)
+            return fmt
+        except ValueError:
+            continue
+    raise ValueError(f"Formato de data não reconhecido: {sample!r}")
+
+
+def _parse_times(values: pd.Series, fmt: Optional[str]) -> pd.DatetimeIndex:
+    if fmt is None:
+        # epoch: segundos, ou milissegundos quando grande demais para segundos
+        nums = values.astype('float64').to_numpy()
+        unit = 'ms' if len(nums) and np.nanmax(nums) > 1e11 else 's'
+        return pd.DatetimeIndex(pd.to_datetime(nums, unit=unit, utc=True))
+    return pd.DatetimeIndex(pd.to_datetime(values, format=fmt, utc=True))
+
+
+def read_ohlc_csv(path: Union[str, Path], chunksize: int = CHUNK_ROWS, sep: str = ',',
+                  dtype: str = 'float64', time_format: Optional[str] = None,
+                  progress_callback: Optional[Callable[[int], None]] = None,
+                  cancel: Optional[threading.Event] = None) -> pd.DataFrame:
+    """
+    CSV de OHLC -> DataFrame normalizado (data.store.normalize_ohlc).
+    - chunksize: linhas por bloco
+    - dtype: dtype das colunas de preço/volume
+    - time_format: formato strftime da coluna de tempo (padrão: detectado)
+    - progress_callback(pct): 0..100 conforme a leitura avança no arquivo
+    - cancel: Event que interrompe a leitura (levanta InterruptedError)
+    """
+    path = Path(path)
+    header = _header(path, sep)
+    lower = {c.lower(): c for c in header}
+    time_col = next((lower[n] for n in _TIME_NAMES if n in lower), None)
+    if time_col is None:
+        raise ValueError(f"CSV sem coluna de tempo ({', '.join(_TIME_NAMES)}): {path.name}")
+    missing = [c for c in OHLC_COLUMNS if c not in lower]
+    if missing:
+        raise ValueError(f"CSV sem colunas {missing}: {path.name}")
+    value_cols: Dict[str, str] = {lower[c]: c for c in OHLC_COLUMNS}
+    volume_col = next((lower[c] for c in _EXTRA_COLUMNS if c in lower), None)
+    if volume_col is not None:
+        value_cols[volume_col] = 'volume'
+    if time_format is None:
+        time_format = detect_datetime_format(_first_value(path, sep, header.index(time_col)))
+
+    total = max(os.path.getsize(path), 1)
+    parts: List[pd.DataFrame] = []
+    with open(path, 'rb') as f:
+        reader = pd.read_csv(
+            f, sep=sep, usecols=[time_col, *value_cols], chunksize=chunksize, engine='c',
+            dtype={time_col: str, **{c: dtype for c in value_cols}}, encoding='utf-8-sig',
+        )
+        for chunk in reader:
+            if cancel is not None and cancel.is_set():
+                raise InterruptedError("Leitura cancelada")
+            index = _parse_times(chunk[time_col], time_format)
+            part = chunk.drop(columns=time_col).rename(columns=value_cols)
+            part.index = index
+            parts.append(part)
+            if progress_callback:
+                progress_callback(min(99, int(f.tell() / total * 100)))
+    df = pd.concat(parts) if parts else pd.DataFrame(columns=list(value_cols.values()), dtype=dtype)
+    if df.empty:
+        df.index = pd.DatetimeIndex([], tz='UTC')
+    df = normalize_ohlc(df)
+    if progress_callback:
+        progress_callback(100)
+    return df
+
+
+def parquet_cache_path(path: Union[str, Path]) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + PARQUET_SUFFIX)
+
+
+def _parse_options(csv_kwargs: Dict) -> bytes:
+    defaults = inspect.signature(read_ohlc_csv).parameters
+    options = {k: str(csv_kwargs.get(k, defaults[k].default)) for k in PARSE_OPTIONS}
+    return json.dumps(options, sort_keys=True).encode()
+
+
+def _cache_is_fresh(cached: Path, path: Path, options: bytes) -> bool:
+    if not cached.exists() or cached.stat().st_mtime < path.stat().st_mtime:
+        return False
+    metadata = pq.read_schema(cached).metadata or {}
+    return metadata.get(_OPTIONS_KEY) == options
+
+
+def load_ohlc(path: Union[str, Path], to_parquet: bool = False,
+              progress_callback: Optional[Callable[[int], None]] = None,
+              cancel: Optional[threading.Event] = None, **csv_kwargs) -> pd.DataFrame:
+    """
+    Carrega um arquivo de candles (CSV ou Parquet) como DataFrame normalizado.
+    Com to_parquet=True, o CSV é convertido para '<arquivo>.ohlc.parquet' na
+    primeira leitura; as seguintes (também com to_parquet=True) usam o Parquet
+    enquanto ele for mais novo que o CSV e tiver sido gerado com as mesmas
+    opções de leitura (sep, dtype, time_format). Sem to_parquet o CSV é sempre lido.
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.parquet':
+        df = normalize_ohlc(pd.read_parquet(path))
+        if progress_callback:
+            progress_callback(100)
+        return df
+
+    cached = parquet_cache_path(path)
+    options = _parse_options(csv_kwargs)
+    if to_parquet and _cache_is_fresh(cached, path, options):
+        df = pd.read_parquet(cached)
+        if progress_callback:
+            progress_callback(100)
+        return df
+
+    df = read_ohlc_csv(path, progress_callback=progress_callback, cancel=cancel, **csv_kwargs)
+    if to_parquet:
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), _OPTIONS_KEY: options})
+        tmp = cached.with_suffix('.tmp')
+        pq.write_table(table, tmp)
+        os.replace(tmp, cached)
+    return df
+
+
+def load_in_background(path: Union[str, Path], on_done: Callable[[pd.DataFrame], None],
+                       on_error: Optional[Callable[[Exception], None]] = None,
+                       progress_callback: Optional[Callable[[int], None]] = None,
+                       cancel: Optional[threading.Event] = None, **kwargs) -> threading.Thread:
+    """
+    Roda load_ohlc numa thread daemon. Os callbacks são chamados na thread de
+    leitura; interfaces gráficas devem repassá-los à thread principal.
+    """
+    def work():
+        try:
+            df = load_ohlc(path, progress_callback=progress_callback, cancel=cancel, **kwargs)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(e)
+            return
+        on_done(df)
+
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,238 @@
+# data/resample.py
+
+"""
+Timeframes maiores construídos a partir da base M1.
+- resample_ohlc: agregação OHLC vetorizada (buckets inteiros em ns + reduceat)
+- MultiTimeframe: base M1 lida uma vez, timeframes derivados em cache LRU e
+  atualizados incrementalmente (só o último bucket) quando chegam novos candles M1
+- BarAggregator: monta o candle do timeframe maior candle a candle (tempo real)
+Buckets são alinhados à época Unix em UTC (D1 = dia UTC).
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.config import TIMEFRAME_MINUTES
+from core.kernels import OHLC_COLUMNS
+
+_NS_PER_MINUTE = 60 * 10**9
+
+
+def timeframe_minutes(timeframe: str) -> int:
+    """Minutos de um timeframe ('M5', 'H1', 'D1', ...)."""
+    if timeframe in TIMEFRAME_MINUTES:
+        return TIMEFRAME_MINUTES[timeframe]
+    unit, count = timeframe[:1].upper(), timeframe[1:]
+    if unit in ('M', 'H', 'D') and count.isdigit() and int(count) > 0:
+        return int(count) * {'M': 1, 'H': 60, 'D': 1440}[unit]
+    raise ValueError(f"Timeframe desconhecido: {timeframe}")
+
+
+def _bucket_ns(index: pd.DatetimeIndex, step: int) -> np.ndarray:
+    ns = index.as_unit('ns').asi8
+    return ns - ns % step
+
+
+def _bucket_start(ts: pd.Timestamp, step: int) -> pd.Timestamp:
+    ns = ts.as_unit('ns').value
+    start = pd.Timestamp(ns - ns % step, tz='UTC')
+    return start.tz_convert(ts.tz) if ts.tz is not None else start.tz_localize(None)
+
+
+def resample_ohlc(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Agrega candles (índice DatetimeIndex ordenado) no `timeframe` pedido:
+    open do primeiro, high máximo, low mínimo, close do último e soma das
+    demais colunas numéricas (ex.: volume). Buckets sem candles não aparecem.
+    """
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise TypeError("resample_ohlc precisa de DatetimeIndex")
+    extra = [c for c in df.columns if c not in OHLC_COLUMNS and pd.api.types.is_numeric_dtype(df[c])]
+    if df.empty:
+        return df[list(OHLC_COLUMNS) + extra].copy()
+
+    buckets = _bucket_ns(df.index, timeframe_minutes(timeframe) * _NS_PER_MINUTE)
+    starts = np.r_[0, np.flatnonzero(np.diff(buckets)) + 1]
+    ends = np.r_[starts[1:], len(df)] - 1
+
+    out = {
+        'open': df['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(), starts),
+        'close': df['close'].to_numpy()[ends],
+    }
+    for col in extra:
+        out[col] = np.add.reduceat(df[col].to_numpy(), starts)
+    index = pd.DatetimeIndex(buckets[starts].view('M8[ns]'), name=df.index.name)
+    if df.index.tz is not None:
+        index = index.tz_localize('UTC').tz_convert(df.index.tz)
+    return pd.DataFrame(out, index=index)
+
+
+class _FrameBuffer:
+    """
+    Candles em arrays numpy com folga (capacidade dobra quando enche), para
+    que acrescentar ou reescrever o fim custe O(linhas novas) e não O(N).
+    Os horários ficam num array int64 (ns) próprio; frame() monta um
+    DataFrame sobre fatias dos arrays e o reaproveita até a próxima escrita.
+    A primeira escrita copia o frame inicial.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self._frame: Optional[pd.DataFrame] = frame
+        self._tz = frame.index.tz
+        self._name = frame.index.name
+        self._times: Optional[np.ndarray] = None
+        self._columns: Dict[str, np.ndarray] = {}
+        self._n = len(frame)
+
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            n = self._n
+            index = pd.DatetimeIndex(self._times[:n].view('M8[ns]'), name=self._name, copy=False)
+            if self._tz is not None:
+                index = index.tz_localize('UTC').tz_convert(self._tz)
+            self._frame = pd.DataFrame({c: v[:n] for c, v in self._columns.items()},
+                                       index=index, copy=False)
+        return self._frame
+
+    def _reserve(self, size: int):
+        if self._times is not None and size <= len(self._times):
+            return
+        old = self.frame()
+        capacity = max(size, 2 * (len(self._times) if self._times is not None else self._n), 1024)
+        times = np.empty(capacity, np.int64)
+        times[:self._n] = old.index.as_unit('ns').asi8
+        columns = {}
+        for col in old.columns:
+            values = old[col].to_numpy()
+            columns[col] = np.empty(capacity, values.dtype)
+            columns[col][:self._n] = values
+        self._times, self._columns = times, columns
+
+    def _rows(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """`rows` nas colunas do buffer: OHLC obrigatórias, extras ausentes viram NaN."""
+        columns = list(self.frame().columns)
+        missing = [c for c in OHLC_COLUMNS if c in columns and c not in rows.columns]
+        if missing:
+            raise ValueError(f"Candles sem as colunas {missing}")
+        return rows.reindex(columns=columns)
+
+    def write(self, rows: pd.DataFrame):
+        """Descarta os candles a partir de rows.index[0] e grava `rows` no lugar."""
+        if rows.empty:
+            return
+        rows = self._rows(rows)
+        ns = rows.index.as_unit('ns').asi8
+        if self._times is None:
+            start = int(np.searchsorted(self.frame().index.as_unit('ns').asi8, ns[0]))
+        else:
+            start = int(np.searchsorted(self._times[:self._n], ns[0]))
+        self._reserve(start + len(rows))
+        end = start + len(rows)
+        self._times[start:end] = ns
+        for col in list(self._columns):
+            values = rows[col].to_numpy()
+            if not np.can_cast(values.dtype, self._columns[col].dtype, casting='same_kind'):
+                # ex.: volume inteiro e candles novos sem volume (NaN)
+                self._columns[col] = self._columns[col].astype(np.result_type(self._columns[col], values))
+            self._columns[col][start:end] = values
+        self._n = end
+        self._frame = None
+
+
+class MultiTimeframe:
+    """
+    Base M1 em memória e timeframes derivados sob demanda.
+    - get(tf): candles do timeframe, do cache LRU (até `maxsize` timeframes)
+    - append(bars): novos candles da base; em cada timeframe em cache só o
+      bucket afetado (normalmente o último, ainda em formação) é recalculado e
+      os buckets novos são gravados no fim de arrays com folga, em
+      O(candles novos + tamanho do bucket) em vez de copiar a série inteira.
+      Frames devolvidos antes de um append compartilham as colunas com o cache:
+      a última linha (bucket em formação) pode mudar; copie para guardar.
+      Colunas extras da base (ex.: volume) ausentes nos candles novos ficam NaN.
+    """
+
+    def __init__(self, base: pd.DataFrame, base_timeframe: str = 'M1', maxsize: int = 8):
+        if not isinstance(base.index, pd.DatetimeIndex):
+            raise TypeError("MultiTimeframe precisa de DatetimeIndex")
+        self._base = _FrameBuffer(base)
+        self.base_timeframe = base_timeframe
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[str, _FrameBuffer]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def base(self) -> pd.DataFrame:
+        return self._base.frame()
+
+    def _check(self, timeframe: str) -> int:
+        minutes, base = timeframe_minutes(timeframe), timeframe_minutes(self.base_timeframe)
+        if minutes % base:
+            raise ValueError(f"{timeframe} não é múltiplo de {self.base_timeframe}")
+        return minutes
+
+    def get(self, timeframe: str) -> pd.DataFrame:
+        if self._check(timeframe) == timeframe_minutes(self.base_timeframe):
+            return self.base
+        if timeframe in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(timeframe)
+            return self._cache[timeframe].frame()
+        self.misses += 1
+        result = resample_ohlc(self.base, timeframe)
+        self._cache[timeframe] = _FrameBuffer(result)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return result
+
+    def cached(self) -> list:
+        return list(self._cache)
+
+    def append(self, bars: pd.DataFrame):
+        """
+        Acrescenta candles da base (podem reescrever candles a partir do
+        primeiro timestamp recebido, ex.: o último M1 ainda em formação).
+        """
+        if bars.empty:
+            return
+        self._base.write(bars)
+        base = self.base
+        times = base.index.as_unit('ns').asi8
+        first = bars.index[:1].as_unit('ns').asi8[0]
+        for tf, buffer in self._cache.items():
+            step = timeframe_minutes(tf) * _NS_PER_MINUTE
+            cut = int(np.searchsorted(times, first - first % step))
+            buffer.write(resample_ohlc(base.iloc[cut:], tf))
+
+
+class BarAggregator:
+    """
+    Candle do timeframe maior montado candle a candle.
+    update(time, open, high, low, close, volume) devolve o candle fechado
+    quando o bucket muda (ou None); `current` é o candle em formação.
+    """
+
+    def __init__(self, timeframe: str):
+        self.timeframe = timeframe
+        self._step = timeframe_minutes(timeframe) * _NS_PER_MINUTE
+        self.current: Optional[Dict] = None
+
+    def update(self, time, open_: float, high: float, low: float, close: float,
+               volume: float = 0.0) -> Optional[Dict]:
+        bucket = _bucket_start(pd.Timestamp(time), self._step)
+        cur = self.current
+        if cur is not None and cur['time'] == bucket:
+            cur['high'] = max(cur['high'], high)
+            cur['low'] = min(cur['low'], low)
+            cur['close'] = close
+            cur['volume'] += volume
+            return None
+        self.current = {'time': bucket, 'open': open_, 'high': high, 'low': low,
+                        'close': close, 'volume': volume}
+        return cur
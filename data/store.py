@@ -0,0 +1,167 @@
+# data/store.py
+
+"""
+Armazenamento local de OHLC em Parquet particionado:
+
+    <root>/symbol=BTCUSD/timeframe=M1/month=2024-03/data.parquet
+
+Cada partição guarda um mês, ordenado por tempo, em row groups de tamanho
+fixo (padrão: um dia de M1, para que leituras dentro do mês pulem os demais). A leitura por intervalo de datas abre só as partições dos meses pedidos,
+lê só a coluna de tempo e as colunas OHLC e deixa o pyarrow descartar os row
+groups fora do intervalo pelas estatísticas de min/max. As tabelas são
+concatenadas em Arrow (sem cópia) e convertidas para pandas uma única vez.
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core.kernels import OHLC_COLUMNS
+
+TIME_COLUMN = 'time'
+ROW_GROUP_SIZE = 1_440     # um dia de M1: um mês (~44k candles) vira ~31 row groups
+_TIME_ALIASES = ('time', 'datetime', 'timestamp', 'date')
+
+
+def normalize_ohlc(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Padroniza um DataFrame de candles: colunas minúsculas, índice DatetimeIndex
+    em UTC (vindo do índice ou de uma coluna time/datetime/timestamp/date),
+    ordenado e sem timestamps duplicados (fica o último).
+    """
+    df = df.rename(columns=str.lower)
+    if not isinstance(df.index, pd.DatetimeIndex):
+        col = next((c for c in _TIME_ALIASES if c in df.columns), None)
+        if col is None:
+            raise ValueError("DataFrame sem índice de datas nem coluna de tempo")
+        df = df.set_index(col)
+        df.index = pd.to_datetime(df.index)
+    if df.index.tz is None:
+        df.index = df.index.tz_localize('UTC')
+    else:
+        df.index = df.index.tz_convert('UTC')
+    df.index.name = TIME_COLUMN
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind='stable')
+    if df.index.has_duplicates:
+        df = df[~df.index.duplicated(keep='last')]
+    return df
+
+
+def _month_keys(index: pd.DatetimeIndex) -> np.ndarray:
+    return (index.year * 100 + index.month).to_numpy()
+
+
+def _month_name(key: int) -> str:
+    return f"{key // 100:04d}-{key % 100:02d}"
+
+
+def _utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+
+
+class ParquetStore:
+    """
+    Store particionado por ativo, timeframe e mês.
+    - write(symbol, timeframe, df): grava/mescla os candles nas partições mensais
+    - read(symbol, timeframe, start, end): candles em [start, end], só OHLC
+    - partitions(symbol, timeframe, start, end): arquivos que uma leitura abriria
+    """
+
+    def __init__(self, root: Union[str, Path], row_group_size: int = ROW_GROUP_SIZE):
+        self.root = Path(root)
+        self.row_group_size = row_group_size
+
+    def series_dir(self, symbol: str, timeframe: str) -> Path:
+        return self.root / f"symbol={symbol}" / f"timeframe={timeframe}"
+
+    def partition_path(self, symbol: str, timeframe: str, month: str) -> Path:
+        return self.series_dir(symbol, timeframe) / f"month={month}" / "data.parquet"
+
+    def symbols(self) -> List[str]:
+        return sorted(p.name.split('=', 1)[1] for p in self.root.glob('symbol=*'))
+
+    def timeframes(self, symbol: str) -> List[str]:
+        return sorted(p.name.split('=', 1)[1] for p in (self.root / f"symbol={symbol}").glob('timeframe=*'))
+
+    def months(self, symbol: str, timeframe: str) -> List[str]:
+        return sorted(p.name.split('=', 1)[1] for p in self.series_dir(symbol, timeframe).glob('month=*')
+                      if (p / 'data.parquet').exists())
+
+    def columns(self, symbol: str, timeframe: str) -> List[str]:
+        """Colunas gravadas na série, sem a de tempo (OHLC se a série não existir)."""
+        paths = self.partitions(symbol, timeframe)
+        if not paths:
+            return list(OHLC_COLUMNS)
+        return [c for c in pq.read_schema(paths[-1]).names if c != TIME_COLUMN and not c.startswith('__')]
+
+    def partitions(self, symbol: str, timeframe: str, start=None, end=None) -> List[Path]:
+        """Partições que cobrem [start, end] (todas se start/end forem None)."""
+        lo = _month_name(_month_keys(pd.DatetimeIndex([_utc(start)]))[0]) if start is not None else None
+        hi = _month_name(_month_keys(pd.DatetimeIndex([_utc(end)]))[0]) if end is not None else None
+        return [self.partition_path(symbol, timeframe, m) for m in self.months(symbol, timeframe)
+                if (lo is None or m >= lo) and (hi is None or m <= hi)]
+
+    def write(self, symbol: str, timeframe: str, df: pd.DataFrame):
+        """
+        Grava os candles nas partições mensais. Meses já existentes são
+        mesclados (em timestamps repetidos prevalece o candle novo).
+        """
+        df = normalize_ohlc(df)
+        if df.empty:
+            return
+        keys = _month_keys(df.index)
+        bounds = np.flatnonzero(np.diff(keys)) + 1
+        for part in np.split(np.arange(len(df)), bounds):
+            month = _month_name(keys[part[0]])
+            chunk = df.iloc[part[0]:part[-1] + 1]
+            path = self.partition_path(symbol, timeframe, month)
+            if path.exists():
+                chunk = normalize_ohlc(pd.concat([self._read_file(path), chunk]))
+            self._write_file(path, chunk)
+
+    def import_files(self, symbol: str, timeframe: str, paths: Iterable[Union[str, Path]]):
+        """Migra arquivos Parquet/CSV soltos (ex.: btc_m1_part*.parquet) para o store."""
+        for path in paths:
+            path = Path(path)
+            df = pd.read_csv(path) if path.suffix.lower() == '.csv' else pd.read_parquet(path)
+            self.write(symbol, timeframe, df)
+
+    def _write_file(self, path: Path, df: pd.DataFrame):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        tmp = path.with_suffix('.tmp')
+        pq.write_table(table, tmp, row_group_size=self.row_group_size, write_statistics=True)
+        os.replace(tmp, path)
+
+    def _read_file(self, path: Path) -> pd.DataFrame:
+        return pq.read_table(path).to_pandas()
+
+    def read(self, symbol: str, timeframe: str, start=None, end=None,
+             columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Candles de `symbol`/`timeframe` com start <= tempo <= end, indexados por
+        tempo (UTC). Lê só as partições do intervalo, as colunas pedidas
+        (padrão: OHLC) e os row groups cujas estatísticas cruzam o intervalo.
+        """
+        columns = list(columns or OHLC_COLUMNS)
+        filters = []
+        if start is not None:
+            filters.append((TIME_COLUMN, '>=', _utc(start)))
+        if end is not None:
+            filters.append((TIME_COLUMN, '<=', _utc(end)))
+        tables = [pq.read_table(path, columns=[TIME_COLUMN] + columns, filters=filters or None)
+                  for path in self.partitions(symbol, timeframe, start, end)]
+        if not tables:
+            empty = pd.DataFrame({c: pd.Series(dtype='float64') for c in columns},
+                                 index=pd.DatetimeIndex([], tz='UTC', name=TIME_COLUMN))
+            return empty
+        table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        return df.set_index(TIME_COLUMN) if TIME_COLUMN in df.columns else df
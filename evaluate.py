@@ -1,4 +1,6 @@
-from data.fetchers.yf_fetcher import fetch_yf
+from core.data_provider import YahooProvider
+from data.async_provider import AsyncFetcher, AsyncYahooProvider
+from data.cache import CachedProvider
 import pandas as pd
 from datetime import datetime, timedelta
 
@@ -16,13 +18,17 @@ pesos = {
 }
 
 start = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
+end = datetime.now().strftime("%Y-%m-%d")
 metrics = []
 
+# todos os ativos baixados de uma vez; só os dias ainda não cacheados vão para a rede
+cache = CachedProvider(YahooProvider(), "data/data_assets/cache")
+frames = AsyncFetcher(AsyncYahooProvider()).fetch_all([(t, "1d") for t in ativos.values()], start, end, cache=cache)
+
 for nome, ticker in ativos.items():
-    try:
-        df = fetch_yf(ticker, "1d", start)
-    except Exception as e:
-        print(f"⚠️  Erro ao baixar {nome} ({ticker}): {e}")
+    df = frames[(ticker, "1d")]
+    if isinstance(df, Exception):
+        print(f"⚠️  Erro ao baixar {nome} ({ticker}): {df}")
         continue
 
     # Calcular range e ATR%
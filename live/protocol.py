@@ -0,0 +1,205 @@
+# live/protocol.py
+
+"""
+Protocolo binário de candles/ticks para o servidor de sinais (live.server).
+
+Cada frame = cabeçalho fixo de 12 bytes + payload:
+
+    magic   2s   b'SB'
+    version u8   1
+    kind    u8   KIND_BARS | KIND_TICKS | KIND_MESSAGE
+    count   u32  número de registros (KIND_MESSAGE: 0)
+    size    u32  bytes do payload
+
+Candles e ticks vão em lote, como registros de largura fixa little-endian
+(BAR_DTYPE, TICK_DTYPE): o payload inteiro vira um array estruturado NumPy
+com um único np.frombuffer, sem parsing por campo. KIND_MESSAGE carrega um
+JSON UTF-8 (hello, ping, sinais).
+
+    frames = encode_bars(df)                     # lista de frames (lotes de até max_records)
+    decoder = FrameDecoder()
+    for kind, payload in decoder.feed(chunk):    # chunk: bytes lidos do socket
+        ...
+"""
+
+import asyncio
+import json
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b'SB'
+VERSION = 1
+HEADER = struct.Struct('<2sBBII')
+
+KIND_BARS, KIND_TICKS, KIND_MESSAGE = 1, 2, 3
+
+# tempo em ns desde a época (UTC)
+BAR_DTYPE = np.dtype([('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+                      ('close', '<f8'), ('volume', '<f8')])
+TICK_DTYPE = np.dtype([('time', '<i8'), ('price', '<f8'), ('size', '<f8')])
+RECORD_DTYPES = {KIND_BARS: BAR_DTYPE, KIND_TICKS: TICK_DTYPE}
+
+MAX_RECORDS = 65_536          # registros por frame ao codificar
+MAX_FRAME_BYTES = 16 << 20    # frames maiores são recusados pelo decoder
+
+Frame = Tuple[int, Union[np.ndarray, Dict[str, Any]]]
+
+
+class ProtocolError(ValueError):
+    """Frame inválido (magic, versão, tipo ou tamanho)."""
+
+
+def json_default(obj: Any):
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"{type(obj).__name__} não serializável")
+
+
+def _utc_nanoseconds(index) -> np.ndarray:
+    index = pd.DatetimeIndex(index)
+    index = index.tz_localize('UTC') if index.tz is None else index
+    return index.as_unit('ns').asi8
+
+
+def bar_records(df: pd.DataFrame) -> np.ndarray:
+    """DataFrame OHLC(V) com índice datetime -> array BAR_DTYPE (volume ausente = 0)."""
+    records = np.zeros(len(df), dtype=BAR_DTYPE)
+    records['time'] = _utc_nanoseconds(df.index)
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        if col in df:
+            records[col] = df[col].to_numpy(dtype=np.float64)
+    return records
+
+
+def tick_records(times, prices, sizes=None) -> np.ndarray:
+    records = np.zeros(len(prices), dtype=TICK_DTYPE)
+    records['time'] = _utc_nanoseconds(times)
+    records['price'] = prices
+    if sizes is not None:
+        records['size'] = sizes
+    return records
+
+
+def records_frame(records: np.ndarray) -> pd.DataFrame:
+    """Registros decodificados -> DataFrame com índice UTC 'time' (sem copiar as colunas de preço)."""
+    index = pd.DatetimeIndex(records['time'].astype('datetime64[ns]'), name='time').tz_localize('UTC')
+    return pd.DataFrame({name: records[name] for name in records.dtype.names[1:]}, index=index)
+
+
+def encode_frame(kind: int, payload: bytes, count: int = 0) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, kind, count, len(payload)) + payload
+
+
+def encode_records(kind: int, records: np.ndarray, max_records: int = MAX_RECORDS) -> List[bytes]:
+    """Registros -> frames de até max_records cada."""
+    dtype = RECORD_DTYPES[kind]
+    records = np.ascontiguousarray(records, dtype=dtype)
+    return [encode_frame(kind, records[i:i + max_records].tobytes(), len(records[i:i + max_records]))
+            for i in range(0, len(records), max_records)]
+
+
+def encode_bars(bars: Union[pd.DataFrame, np.ndarray], max_records: int = MAX_RECORDS) -> List[bytes]:
+    records = bar_records(bars) if isinstance(bars, pd.DataFrame) else bars
+    return encode_records(KIND_BARS, records, max_records)
+
+
+def encode_ticks(records: np.ndarray, max_records: int = MAX_RECORDS) -> List[bytes]:
+    return encode_records(KIND_TICKS, records, max_records)
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    payload = json.dumps(message, default=json_default, separators=(',', ':')).encode()
+    return encode_frame(KIND_MESSAGE, payload)
+
+
+def _check_header(magic: bytes, version: int, kind: int, count: int, size: int):
+    if magic != MAGIC:
+        raise ProtocolError(f"magic inválido: {magic!r}")
+    if version != VERSION:
+        raise ProtocolError(f"versão não suportada: {version}")
+    if size > MAX_FRAME_BYTES:
+        raise ProtocolError(f"frame de {size} bytes excede o limite de {MAX_FRAME_BYTES}")
+    if kind in RECORD_DTYPES:
+        if count * RECORD_DTYPES[kind].itemsize != size:
+            raise ProtocolError(f"payload de {size} bytes não corresponde a {count} registros")
+    elif kind != KIND_MESSAGE:
+        raise ProtocolError(f"tipo de frame desconhecido: {kind}")
+
+
+def decode_payload(kind: int, payload: bytes) -> Union[np.ndarray, Dict[str, Any]]:
+    if kind == KIND_MESSAGE:
+        try:
+            return json.loads(payload)
+        except ValueError as e:
+            raise ProtocolError(f"mensagem JSON inválida: {e}") from None
+    return np.frombuffer(payload, dtype=RECORD_DTYPES[kind])
+
+
+class FrameDecoder:
+    """
+    Decoder incremental: feed(bytes) devolve os frames completos já recebidos
+    como (kind, payload); bytes de um frame incompleto ficam para o próximo feed.
+    Arrays de registros são somente leitura (apontam para o buffer recebido).
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def feed(self, data: bytes) -> List[Frame]:
+        self._buffer += data
+        buf = self._buffer
+        frames: List[Frame] = []
+        pos = 0
+        with memoryview(buf) as view:
+            while len(buf) - pos >= HEADER.size:
+                magic, version, kind, count, size = HEADER.unpack_from(buf, pos)
+                _check_header(magic, version, kind, count, size)
+                end = pos + HEADER.size + size
+                if len(buf) < end:
+                    break
+                # uma única cópia do payload, independente do buffer
+                frames.append((kind, decode_payload(kind, bytes(view[pos + HEADER.size:end]))))
+                pos = end
+        del buf[:pos]
+        return frames
+
+
+async def read_frame(reader: asyncio.StreamReader, prefix: bytes = b'') -> Optional[Frame]:
+    """
+    Próximo frame de um StreamReader; None no fim da conexão.
+    prefix: bytes iniciais do cabeçalho já consumidos (ex.: o magic).
+    """
+    try:
+        header = prefix + await reader.readexactly(HEADER.size - len(prefix))
+    except asyncio.IncompleteReadError as e:
+        if e.partial or prefix:
+            raise ProtocolError("conexão encerrada no meio do cabeçalho") from None
+        return None
+    magic, version, kind, count, size = HEADER.unpack(header)
+    _check_header(magic, version, kind, count, size)
+    try:
+        payload = await reader.readexactly(size)
+    except asyncio.IncompleteReadError:
+        raise ProtocolError("conexão encerrada no meio do frame") from None
+    return kind, decode_payload(kind, payload)
+
+
+def iter_frames(sock, chunk_size: int = 1 << 16) -> Iterator[Frame]:
+    """Frames de um socket bloqueante até o fim da conexão."""
+    decoder = FrameDecoder()
+    while True:
+        data = sock.recv(chunk_size)
+        if not data:
+            if decoder.pending:
+                raise ProtocolError("conexão encerrada no meio do frame")
+            return
+        yield from decoder.feed(data)
@@ -0,0 +1,422 @@
+# live/server.py
+
+"""
+Servidor asyncio de sinais ao vivo.
+Recebe candles fechados, roda os detectores incrementais (core.streaming)
+em cada candle e envia os sinais novos para todos os assinantes conectados.
+
+Cada conexão fala um de dois formatos, detectado pelos primeiros bytes:
+frames binários (live.protocol: candles/ticks em lote como registros de
+largura fixa, mensagens em frames KIND_MESSAGE) ou uma mensagem JSON por linha.
+Quem envia frames recebe frames (um assinante binário começa com um hello).
+Ticks (frames KIND_TICKS) são agregados em candles de tick_timeframe.
+
+Mensagens:
+- cliente -> servidor
+    {"type": "bar", "time": "...", "open": .., "high": .., "low": .., "close": ..}
+    {"type": "hello", "role": "feed"}   conexão só envia candles (não recebe sinais)
+    {"type": "ping"}                    responde {"type": "pong"}
+- servidor -> assinantes
+    {"type": "signals", "seq": n, "bar": i, "time": "...", "sent_at": epoch,
+     "signals": {"detect_fvg": [...], ...}}
+
+Cada assinante tem uma fila limitada (queue_size) esvaziada por uma tarefa
+própria; um cliente lento nunca segura o candle seguinte dos outros. Quando a
+fila enche vale a política `overflow`:
+- 'drop_oldest': descarta a mensagem mais antiga da fila (padrão)
+- 'drop_newest': descarta a mensagem nova
+- 'disconnect': derruba o cliente lento
+write_timeout (s) também derruba quem não esvazia o socket a tempo.
+Latência = do recebimento do candle até a mensagem sair para o socket do cliente.
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.config import DETECTORS_BY_LEVEL
+from core.streaming import StreamingPipeline
+from data.resample import BarAggregator, timeframe_minutes
+from live import protocol
+from live.protocol import json_default
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'disconnect')
+MAX_LINE = 1 << 16
+# candles (ou ticks x TICKS_PER_BAR) de um frame processados entre cessões do loop,
+# para os writers esvaziarem as filas no meio de frames grandes
+YIELD_BARS = 32
+TICKS_PER_BAR = 64
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """Mensagem como uma linha JSON."""
+    return json.dumps(message, default=json_default, separators=(',', ':')).encode() + b'\n'
+
+
+def decode_message(line: bytes) -> Dict[str, Any]:
+    return json.loads(line)
+
+
+def default_detectors() -> List:
+    return [d for dets in DETECTORS_BY_LEVEL.values() for d in dets]
+
+
+class LatencyStats:
+    """Amostras recentes de latência (s) com percentis em ms."""
+
+    def __init__(self, maxlen: int = 10_000):
+        self.samples: deque = deque(maxlen=maxlen)
+        self.count = 0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {'count': self.count}
+        ms = np.fromiter(self.samples, dtype=float) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        return {'count': self.count, 'mean_ms': float(ms.mean()), 'p50_ms': float(p50),
+                'p95_ms': float(p95), 'p99_ms': float(p99), 'max_ms': float(ms.max())}
+
+
+class Subscriber:
+    """Conexão de um cliente: fila limitada + contadores."""
+
+    def __init__(self, client_id: int, writer: asyncio.StreamWriter, queue_size: int):
+        self.id = client_id
+        self.writer = writer
+        self.peer = writer.get_extra_info('peername')
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.subscribed = True
+        self.binary = False
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+        self.task: Optional[asyncio.Task] = None
+
+    def offer(self, payload: bytes, t0: Optional[float], policy: str) -> bool:
+        """
+        Enfileira sem bloquear; False se o cliente deve ser desconectado.
+        t0=None marca mensagens de controle (fora das métricas de latência).
+        """
+        try:
+            self.queue.put_nowait((payload, t0))
+            return True
+        except asyncio.QueueFull:
+            pass
+        if policy == 'disconnect':
+            return False
+        self.dropped += 1
+        if policy == 'drop_oldest':
+            self.queue.get_nowait()
+            self.queue.put_nowait((payload, t0))
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {'id': self.id, 'peer': self.peer, 'sent': self.sent, 'dropped': self.dropped,
+                'queued': self.queue.qsize(), 'subscribed': self.subscribed, 'binary': self.binary}
+
+
+class SignalServer:
+    """
+    Servidor de sinais: `await start()` (ou `async with`), candles por conexões
+    'bar' ou por ingest(bar) no próprio processo, métricas em metrics().
+    port=0 escolhe uma porta livre (ver .port).
+    """
+
+    def __init__(self, detectors: Optional[Iterable] = None, host: str = '127.0.0.1', port: int = 5555,
+                 queue_size: int = 1000, overflow: str = 'drop_oldest',
+                 write_timeout: Optional[float] = None, tick_timeframe: str = 'M1'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política desconhecida: {overflow} (use {OVERFLOW_POLICIES})")
+        self.pipeline = StreamingPipeline(detectors if detectors is not None else default_detectors())
+        self.host, self._port = host, port
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.write_timeout = write_timeout
+        self.clients: Dict[int, Subscriber] = {}
+        self.latency = LatencyStats()
+        self.ticks = BarAggregator(tick_timeframe)
+        self._tick_step = timeframe_minutes(tick_timeframe) * 60 * 10**9
+        self.counters = {'bars': 0, 'ticks': 0, 'messages': 0, 'dropped': 0, 'slow_disconnects': 0,
+                         'connections': 0, 'bad_messages': 0}
+        self._ids = itertools.count(1)
+        self._seq = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # ------------------------------------------------------------------ ciclo de vida
+
+    async def start(self) -> "SignalServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self._port, limit=MAX_LINE)
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        for sub in list(self.clients.values()):
+            await self._disconnect(sub)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "SignalServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    @property
+    def port(self) -> int:
+        if self._server is None:
+            return self._port
+        return self._server.sockets[0].getsockname()[1]
+
+    # ------------------------------------------------------------------ candles e sinais
+
+    def ingest(self, bar: Dict[str, Any], t0: Optional[float] = None) -> Dict[str, List[Any]]:
+        """
+        Processa um candle fechado e envia os sinais novos aos assinantes.
+        Não bloqueia: só enfileira. Retorna {detector: eventos novos}.
+        O candle é validado antes de tocar o pipeline (horário presente e OHLC
+        numérico e finito): um candle inválido levanta ValueError/KeyError/
+        TypeError sem avançar nenhum detector, que continuam em sincronia.
+        """
+        t0 = time.perf_counter() if t0 is None else t0
+        time_ = bar.get('time')
+        if time_ is None:
+            raise ValueError("Candle sem 'time'")
+        if not isinstance(time_, pd.Timestamp):
+            time_ = pd.Timestamp(time_)
+        if pd.isna(time_):
+            raise ValueError("Candle com 'time' inválido")
+        o, h, l, c = (float(bar[k]) for k in ('open', 'high', 'low', 'close'))
+        if not np.isfinite([o, h, l, c]).all():
+            raise ValueError("Candle com OHLC não finito")
+        return self._process(o, h, l, c, time_, t0)
+
+    def ingest_records(self, records: np.ndarray, t0: Optional[float] = None) -> int:
+        """Lote de candles protocol.BAR_DTYPE (ex.: um frame); retorna quantos emitiram sinais."""
+        t0 = time.perf_counter() if t0 is None else t0
+        ok = (records['time'] != np.iinfo(np.int64).min)
+        for col in ('open', 'high', 'low', 'close'):
+            ok &= np.isfinite(records[col])
+        if not ok.all():
+            # candles sem horário ou com OHLC não finito não entram no pipeline
+            self.counters['bad_messages'] += int((~ok).sum())
+            records = records[ok]
+        times = pd.DatetimeIndex(records['time'].astype('datetime64[ns]')).tz_localize('UTC')
+        cols = [records[c].tolist() for c in ('open', 'high', 'low', 'close')]
+        emitted = 0
+        for o, h, l, c, ts in zip(*cols, times):
+            emitted += bool(self._process(o, h, l, c, ts, t0))
+        return emitted
+
+    def ingest_ticks(self, records: np.ndarray, t0: Optional[float] = None) -> int:
+        """
+        Lote de ticks protocol.TICK_DTYPE. Os ticks são agregados por bucket de
+        tick_timeframe de forma vetorizada (reduceat) e só os candles fechados
+        seguem para o pipeline; o candle em formação fica em self.ticks.
+        """
+        t0 = time.perf_counter() if t0 is None else t0
+        self.counters['ticks'] += len(records)
+        if not len(records):
+            return 0
+        ns, price, size = records['time'], records['price'], records['size']
+        buckets = ns - ns % self._tick_step
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(ns)] - 1
+        groups = zip(pd.DatetimeIndex(buckets[starts].astype('datetime64[ns]')).tz_localize('UTC'),
+                     price[starts].tolist(), np.maximum.reduceat(price, starts).tolist(),
+                     np.minimum.reduceat(price, starts).tolist(), price[ends].tolist(),
+                     np.add.reduceat(size, starts).tolist())
+        emitted = 0
+        for bucket, o, h, l, c, v in groups:
+            closed = self.ticks.update(bucket, o, h, l, c, v)
+            if closed is not None:
+                emitted += bool(self.ingest(closed, t0))
+        return emitted
+
+    def _process(self, o: float, h: float, l: float, c: float, time_, t0: float) -> Dict[str, List[Any]]:
+        signals = self.pipeline.update((o, h, l, c, time_))
+        index = self.counters['bars']
+        self.counters['bars'] += 1
+        if signals:
+            self._seq += 1
+            self.broadcast({'type': 'signals', 'seq': self._seq, 'bar': index, 'time': time_,
+                            'sent_at': time.time(), 'signals': signals}, t0)
+        return signals
+
+    def broadcast(self, message: Dict[str, Any], t0: Optional[float] = None):
+        """Codifica uma vez por formato e enfileira para todos os assinantes."""
+        encoded: Dict[bool, bytes] = {}
+        t0 = time.perf_counter() if t0 is None else t0
+        for sub in list(self.clients.values()):
+            if not sub.subscribed or sub.closed:
+                continue
+            if sub.binary not in encoded:
+                encoded[sub.binary] = (protocol.encode_message(message) if sub.binary
+                                       else encode_message(message))
+            before = sub.dropped
+            if sub.offer(encoded[sub.binary], t0, self.overflow):
+                self.counters['dropped'] += sub.dropped - before
+            else:
+                self.counters['slow_disconnects'] += 1
+                self._drop(sub)
+
+    # ------------------------------------------------------------------ conexões
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        sub = Subscriber(next(self._ids), writer, self.queue_size)
+        self.clients[sub.id] = sub
+        self.counters['connections'] += 1
+        sub.task = asyncio.ensure_future(self._write_loop(sub))
+        try:
+            prefix = await reader.read(len(protocol.MAGIC))
+            if len(prefix) == 1:
+                prefix += await reader.read(1)
+            if prefix == protocol.MAGIC:
+                await self._read_frames(sub, reader)
+            elif prefix:
+                await self._read_lines(sub, reader, prefix)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            # inclui protocol.ProtocolError: frame inválido encerra a conexão
+            self.counters['bad_messages'] += 1
+        finally:
+            await self._disconnect(sub)
+
+    async def _read_lines(self, sub: Subscriber, reader: asyncio.StreamReader, prefix: bytes):
+        line = prefix + await reader.readline()
+        while line and not sub.closed:
+            t0 = time.perf_counter()
+            try:
+                msg = decode_message(line)
+            except ValueError:
+                self.counters['bad_messages'] += 1
+            else:
+                self._dispatch(sub, msg, t0)
+            line = await reader.readline()
+
+    async def _read_frames(self, sub: Subscriber, reader: asyncio.StreamReader):
+        sub.binary = True
+        # o magic já foi consumido na detecção do formato
+        frame = await protocol.read_frame(reader, prefix=protocol.MAGIC)
+        while frame is not None and not sub.closed:
+            t0 = time.perf_counter()
+            kind, payload = frame
+            if kind == protocol.KIND_BARS:
+                await self._ingest_in_steps(self.ingest_records, payload, YIELD_BARS, t0)
+            elif kind == protocol.KIND_TICKS:
+                await self._ingest_in_steps(self.ingest_ticks, payload, YIELD_BARS * TICKS_PER_BAR, t0)
+            else:
+                self._dispatch(sub, payload, t0)
+            frame = await protocol.read_frame(reader)
+
+    async def _ingest_in_steps(self, ingest, records: np.ndarray, step: int, t0: float):
+        """Ingere o frame em fatias de `step` registros, cedendo o loop entre elas."""
+        for start in range(0, len(records), step):
+            if start:
+                await asyncio.sleep(0)
+            ingest(records[start:start + step], t0)
+
+    def _dispatch(self, sub: Subscriber, msg: Any, t0: float):
+        kind = msg.get('type') if isinstance(msg, dict) else None
+        if kind == 'bar':
+            try:
+                self.ingest(msg, t0)
+            except (KeyError, TypeError, ValueError):
+                self.counters['bad_messages'] += 1
+        elif kind == 'hello':
+            sub.subscribed = msg.get('role', 'subscriber') != 'feed'
+        elif kind == 'ping':
+            pong = {'type': 'pong'}
+            sub.offer(protocol.encode_message(pong) if sub.binary else encode_message(pong), None, 'drop_newest')
+        else:
+            self.counters['bad_messages'] += 1
+
+    async def _write_loop(self, sub: Subscriber):
+        try:
+            while True:
+                batch = [await sub.queue.get()]
+                while not sub.queue.empty():
+                    batch.append(sub.queue.get_nowait())
+                sub.writer.writelines(payload for payload, _ in batch)
+                if self.write_timeout is None:
+                    await sub.writer.drain()
+                else:
+                    await asyncio.wait_for(sub.writer.drain(), self.write_timeout)
+                done = time.perf_counter()
+                for _, t0 in batch:
+                    if t0 is not None:
+                        self.latency.add(done - t0)
+                        self.counters['messages'] += 1
+                sub.sent += len(batch)
+        except asyncio.TimeoutError:
+            self.counters['slow_disconnects'] += 1
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._drop(sub)
+
+    def _drop(self, sub: Subscriber):
+        """Remove o cliente na hora (sem await): não recebe mais nenhuma mensagem."""
+        if sub.closed:
+            return
+        sub.closed = True
+        self.clients.pop(sub.id, None)
+        if sub.task is not None and sub.task is not asyncio.current_task():
+            sub.task.cancel()
+        transport = sub.writer.transport
+        if transport.get_write_buffer_size():
+            # cliente que não lê nunca esvaziaria o buffer: fecha sem esperar
+            transport.abort()
+        else:
+            sub.writer.close()
+
+    async def _disconnect(self, sub: Subscriber):
+        self._drop(sub)
+        try:
+            await sub.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    # ------------------------------------------------------------------ métricas
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.counters, 'clients': len(self.clients), 'latency': self.latency.summary()}
+
+    def client_stats(self) -> List[Dict[str, Any]]:
+        return [sub.stats() for sub in self.clients.values()]
+
+
+async def serve(host: str = '0.0.0.0', port: int = 5555, detectors: Optional[Iterable] = None,
+                report_every: Optional[float] = 10.0, **kwargs):
+    """Roda o servidor até ser cancelado, imprimindo métricas a cada report_every s."""
+    server = SignalServer(detectors, host=host, port=port, **kwargs)
+    await server.start()
+    print(f"Servidor de sinais ouvindo em {host}:{server.port}")
+    reporter = None
+    if report_every:
+        async def report():
+            while True:
+                await asyncio.sleep(report_every)
+                print(server.metrics())
+        reporter = asyncio.ensure_future(report())
+    try:
+        await server.serve_forever()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        await server.close()
@@ -1,14 +1,62 @@
+# socket_client.py
+
+"""
+Cliente do servidor de sinais (socket_server.py), no protocolo binário
+(live.protocol). Uso:
+
+    # assina e imprime cada sinal com a latência desde o candle chegar no servidor
+    python socket_client.py subscribe --host 192.168.0.105 --port 5555
+    # envia os candles de um arquivo CSV/Parquet em frames de 4096 candles
+    python socket_client.py feed dados.parquet --batch 4096
+"""
+
+import argparse
 import socket
+import time
 
-HOST = '192.168.0.104'  # IP do celular
-PORT = 5555
+from live import protocol
 
-with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-    s.connect((HOST, PORT))
+
+def subscribe(sock: socket.socket):
+    sock.sendall(protocol.encode_message({'type': 'hello', 'role': 'subscriber'}))
     print("Conectado ao servidor!\n")
+    for kind, msg in protocol.iter_frames(sock):
+        if kind != protocol.KIND_MESSAGE or msg.get('type') != 'signals':
+            continue
+        latency = (time.time() - msg['sent_at']) * 1000
+        for name, events in msg['signals'].items():
+            print(f"[{msg['time']}] {name}: {events} ({latency:.1f} ms)")
+
+
+def feed(sock: socket.socket, path: str, batch: int):
+    from data.ingest import load_ohlc
+
+    df = load_ohlc(path)
+    sock.sendall(protocol.encode_message({'type': 'hello', 'role': 'feed'}))
+    t0 = time.perf_counter()
+    for frame in protocol.encode_bars(df, max_records=batch):
+        sock.sendall(frame)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(df):,} candles enviados em {elapsed:.2f}s ({len(df) / max(elapsed, 1e-9):,.0f} candles/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cliente do servidor de sinais SMC")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5555)
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('subscribe', help="recebe e imprime sinais (padrão)")
+    feed_parser = sub.add_parser('feed', help="envia candles de um arquivo")
+    feed_parser.add_argument('path')
+    feed_parser.add_argument('--batch', type=int, default=4096, help="candles por frame")
+    args = parser.parse_args()
+
+    with socket.create_connection((args.host, args.port)) as sock:
+        if args.command == 'feed':
+            feed(sock, args.path, args.batch)
+        else:
+            subscribe(sock)
+
 
-    while True:
-        msg = input("Digite sua mensagem (ou 'sair'): ")
-        if msg.lower() == "sair":
-            break
-        s.sendall(msg.encode())
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,37 @@
-import socket
-
-HOST = '192.168.0.105'  # Escuta em todas as interfaces
-PORT = 5555       # Porta de comunicação
-
-with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-    s.bind((HOST, PORT))
-    s.listen()
-    print(f"Servidor ouvindo na porta {PORT}...")
-
-    conn, addr = s.accept()
-    with conn:
-        print(f"Conectado por {addr}")
-        while True:
-            data = conn.recv(1024)
-            if not data:
-                break
-            print("Mensagem recebida:", data.decode())
+# socket_server.py
+
+"""
+Servidor de sinais ao vivo (ver live.server). Uso:
+
+    python socket_server.py --host 0.0.0.0 --port 5555 --levels Básico Avançado
+"""
+
+import argparse
+import asyncio
+
+from core.config import DETECTORS_BY_LEVEL
+from live.server import OVERFLOW_POLICIES, serve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de sinais SMC ao vivo")
+    parser.add_argument('--host', default='0.0.0.0', help="interface de escuta (padrão: todas)")
+    parser.add_argument('--port', type=int, default=5555)
+    parser.add_argument('--levels', nargs='+', default=list(DETECTORS_BY_LEVEL), help="níveis de detectores")
+    parser.add_argument('--queue-size', type=int, default=1000, help="mensagens pendentes por cliente")
+    parser.add_argument('--overflow', choices=OVERFLOW_POLICIES, default='drop_oldest')
+    parser.add_argument('--write-timeout', type=float, default=None, help="derruba clientes mais lentos que isso (s)")
+    parser.add_argument('--report-every', type=float, default=10.0, help="intervalo das métricas (s); 0 desliga")
+    args = parser.parse_args()
+
+    detectors = [d for lvl in args.levels for d in DETECTORS_BY_LEVEL[lvl]]
+    try:
+        asyncio.run(serve(args.host, args.port, detectors, report_every=args.report_every,
+                          queue_size=args.queue_size, overflow=args.overflow,
+                          write_timeout=args.write_timeout))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# tests/conftest.py
+
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def random_walk_bars(seed: int, n: int, freq: Optional[str] = 'min',
+                     start: Union[str, pd.Timestamp] = '2025-01-06', price: float = 100.0,
+                     step: float = 1.0, jitter: float = 0.5, wick: float = 0.4,
+                     tick: Optional[float] = 0.1, volume: bool = False,
+                     name: Optional[str] = None) -> pd.DataFrame:
+    """
+    Candles de um passeio aleatório com preços múltiplos de `tick` (níveis
+    repetidos e toques exatos; tick=None não arredonda).
+    - step: desvio do close a cada candle; jitter: do open em relação ao close anterior
+    - wick: média (exponencial) das sombras acima e abaixo do corpo
+    - freq: índice UTC a partir de `start` (None = índice 0..n-1); name: nome do índice
+    - volume: coluna 'volume' inteira (1..99) em float64
+    """
+    rng = np.random.default_rng(seed)
+    if tick is None:
+        snap = lambda x: x
+    else:
+        scale = 1 / tick
+        snap = lambda x: np.round(x * scale) / scale
+    close = snap(price + rng.normal(0, step, n).cumsum())
+    open_ = snap(np.r_[close[0], close[:-1]] + rng.normal(0, jitter, n))
+    high = np.maximum(open_, close) + snap(rng.exponential(wick, n))
+    low = np.minimum(open_, close) - snap(rng.exponential(wick, n))
+    df = pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close})
+    if volume:
+        df['volume'] = rng.integers(1, 100, n).astype('float64')
+    if freq is not None:
+        df.index = pd.date_range(start, periods=n, freq=freq, tz='UTC', name=name)
+    return df
+
+
+@pytest.fixture
+def make_bars():
+    """Fábrica de random_walk_bars (ver parâmetros acima)."""
+    return random_walk_bars
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+from aiohttp import web
+
+from data.async_provider import AsyncFetcher, AsyncYahooProvider, HTTPStatusError
+from data.cache import CachedProvider
+
+DELAY = 0.2
+
+
+class StubYahoo:
+    """Servidor local que imita o endpoint de chart do Yahoo."""
+
+    def __init__(self):
+        self.hits = []
+        self.active = 0
+        self.peak = 0
+        self.peers = set()
+
+    async def chart(self, request):
+        ticker = request.match_info['ticker']
+        self.hits.append(ticker)
+        self.peers.add(request.transport.get_extra_info('peername'))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(DELAY)
+        finally:
+            self.active -= 1
+        if ticker == 'MISSING':
+            return web.Response(status=404)
+        if ticker == 'FLAKY' and self.hits.count('FLAKY') < 3:
+            return web.Response(status=503)
+        p1, p2 = int(request.query['period1']), int(request.query['period2'])
+        stamps = list(range(p1, p2 + 1, 86_400))
+        price = [float(len(ticker) + i) for i in range(len(stamps))]
+        return web.json_response({'chart': {'error': None, 'result': [{
+            'timestamp': stamps,
+            'indicators': {'quote': [{'open': price, 'high': [p + 1 for p in price],
+                                      'low': [p - 1 for p in price], 'close': price,
+                                      'volume': [100.0] * len(price)}]},
+        }]}})
+
+
+async def _serve(stub, body):
+    app = web.Application()
+    app.router.add_get('/chart/{ticker}', stub.chart)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        return await body(f"http://127.0.0.1:{port}/chart")
+    finally:
+        await runner.cleanup()
+
+
+def run_with_stub(stub, body):
+    return asyncio.run(_serve(stub, body))
+
+
+def test_fetch_50_symbols_concurrently():
+    stub = StubYahoo()
+    jobs = [(f"SYM{k}", 'D1') for k in range(50)]
+
+    async def body(url):
+        fetcher = AsyncFetcher(AsyncYahooProvider(url), max_concurrency=50)
+        t0 = time.perf_counter()
+        res = await fetcher.fetch_many(jobs, '2024-01-01', '2024-01-10')
+        return res, time.perf_counter() - t0
+
+    res, elapsed = run_with_stub(stub, body)
+    assert list(res) == jobs
+    assert all(isinstance(df, pd.DataFrame) and len(df) == 10 for df in res.values())
+    assert elapsed < DELAY * 5   # em série levaria 50 * DELAY
+    assert stub.peak > 25
+
+
+def test_concurrency_limit_and_connection_pool():
+    stub = StubYahoo()
+    jobs = [(f"SYM{k}", 'D1') for k in range(12)]
+
+    async def body(url):
+        return await AsyncFetcher(AsyncYahooProvider(url), max_concurrency=4).fetch_many(jobs, '2024-01-01', '2024-01-02')
+
+    res = run_with_stub(stub, body)
+    assert len(res) == 12
+    assert stub.peak <= 4
+    assert len(stub.peers) <= 4   # conexões reaproveitadas pelo pool da sessão
+
+
+def test_retry_with_backoff_and_failures_per_job():
+    stub = StubYahoo()
+
+    async def body(url):
+        fetcher = AsyncFetcher(AsyncYahooProvider(url), retries=3, backoff=0.01)
+        return await fetcher.fetch_many([('FLAKY', 'D1'), ('MISSING', 'D1'), ('OK', 'D1')],
+                                        '2024-01-01', '2024-01-03')
+
+    res = run_with_stub(stub, body)
+    assert stub.hits.count('FLAKY') == 3
+    assert len(res[('FLAKY', 'D1')]) == 3
+    assert isinstance(res[('MISSING', 'D1')], HTTPStatusError)
+    assert stub.hits.count('MISSING') == 1   # 404 não é repetido
+    assert res[('OK', 'D1')]['close'].tolist() == [2.0, 3.0, 4.0]
+
+
+def test_fetch_many_through_cache_only_downloads_gaps(tmp_path):
+    stub = StubYahoo()
+    cache = CachedProvider(provider=None, cache_dir=tmp_path)
+
+    async def body(url):
+        fetcher = AsyncFetcher(AsyncYahooProvider(url))
+        first = await fetcher.fetch_many([('AAA', 'D1'), ('BBB', 'D1')], '2024-01-01', '2024-01-10', cache=cache)
+        again = await fetcher.fetch_many([('AAA', 'D1'), ('BBB', 'D1')], '2024-01-03', '2024-01-12', cache=cache)
+        return first, again
+
+    first, again = run_with_stub(stub, body)
+    assert len(stub.hits) == 4
+    assert len(first[('AAA', 'D1')]) == 10
+    assert again[('BBB', 'D1')].index[-1] == pd.Timestamp('2024-01-12', tz='UTC')
+    assert len(again[('BBB', 'D1')]) == 10
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from core.config import DETECTORS_BY_LEVEL
+from core.graph import DetectorGraph
+from backtest.batch import count_signals, run_batch
+from tests.conftest import random_walk_bars
+
+
+def synthetic_runner(source, symbol, timeframe, start, end, levels):
+    if symbol == 'BROKEN':
+        raise FileNotFoundError(f"sem dados para {symbol}")
+    seed = abs(hash((symbol, timeframe))) % 2**32
+    df = random_walk_bars(seed, 200, '15min', start=start)
+    detectors = [d for lvl in levels for d in DETECTORS_BY_LEVEL[lvl]]
+    return DetectorGraph(df).run(detectors)
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_run_batch_covers_matrix_and_isolates_failures(workers):
+    summary = run_batch('synthetic', pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01'),
+                        assets=['BTCUSD', 'BROKEN'], timeframes=['M1', 'H1'],
+                        levels=['Básico', 'Avançado'], max_workers=workers,
+                        runner=synthetic_runner)
+    assert len(summary) == 2 * 2 * 2
+    assert list(summary[['asset', 'timeframe', 'level']].iloc[0]) == ['BTCUSD', 'M1', 'Básico']
+    ok = summary[summary['asset'] == 'BTCUSD']
+    assert (ok['status'] == 'ok').all()
+    assert ok.loc[ok['level'] == 'Básico', 'detect_fvg'].notna().all()
+    broken = summary[summary['asset'] == 'BROKEN']
+    assert (broken['status'] == 'error').all()
+    assert broken['error'].str.contains('FileNotFoundError').all()
+
+
+def test_count_signals():
+    assert count_signals(True) == 1
+    assert count_signals([1, 2, 3]) == 3
+    assert count_signals({'premium': (1, 2), 'discount': (0, 1)}) == 1
+    assert count_signals({1.0: 2, 2.0: 3}) == 2
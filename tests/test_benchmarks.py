@@ -0,0 +1,59 @@
+# tests/test_benchmarks.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.suite import compare, load_baseline, measure, run_suite, save_baseline
+from benchmarks.synthetic import synthetic_ohlc
+from core.config import DETECTORS_BY_LEVEL
+
+
+def test_synthetic_is_deterministic():
+    pd.testing.assert_frame_equal(synthetic_ohlc(500, seed=3), synthetic_ohlc(500, seed=3))
+    assert not synthetic_ohlc(500, seed=3).equals(synthetic_ohlc(500, seed=4))
+
+
+def test_synthetic_ohlc_is_consistent():
+    df = synthetic_ohlc(20_000, tick=0.5)
+    assert len(df) == 20_000
+    assert (df['high'] >= df[['open', 'close']].max(axis=1)).all()
+    assert (df['low'] <= df[['open', 'close']].min(axis=1)).all()
+    assert (df['low'] > 0).all()
+    assert np.allclose(df['high'] / 0.5, np.rint(df['high'] / 0.5))
+    assert df.index.tz is not None and df.index.is_monotonic_increasing
+    assert (df.index.dayofweek < 5).all()
+
+
+def test_measure_reports_time_and_memory():
+    res = measure(lambda: np.ones(1_000_000), repeat=2)
+    assert res['seconds'] > 0
+    assert res['peak_mb'] >= 7  # 8 MB de float64
+
+
+def test_run_suite_covers_every_detector_and_backtest():
+    results = run_suite(sizes=[300], repeat=1, memory=False)
+    names = {det.__name__ for dets in DETECTORS_BY_LEVEL.values() for det in dets}
+    assert {f"{n}@300" for n in names} | {'run_backtest@300'} == set(results)
+    assert all(r['seconds'] >= 0 for r in results.values())
+
+
+def test_compare_flags_regressions_above_threshold():
+    baseline = {'detect_fvg@1000': {'seconds': 0.10, 'peak_mb': 10.0},
+                'detect_mss@1000': {'seconds': 0.10, 'peak_mb': 10.0},
+                'detect_bos@1000': {'seconds': 0.0001, 'peak_mb': 1.0}}
+    current = {'detect_fvg@1000': {'seconds': 0.20, 'peak_mb': 10.0},   # 2x mais lento
+               'detect_mss@1000': {'seconds': 0.11, 'peak_mb': 30.0},   # 3x mais memória
+               'detect_bos@1000': {'seconds': 0.0003, 'peak_mb': 1.0}}  # abaixo do piso de ruído
+    report = compare(current, baseline, threshold=0.25).set_index('benchmark')
+    assert report.loc['detect_fvg', 'regressed']
+    assert report.loc['detect_mss', 'regressed']
+    assert not report.loc['detect_bos', 'regressed']
+    assert report.loc['detect_fvg', 'ratio'] == pytest.approx(2.0)
+
+
+def test_baseline_round_trip(tmp_path):
+    results = {'detect_fvg@1000': {'seconds': 0.01, 'peak_mb': 1.5}}
+    path = tmp_path / 'baseline.json'
+    save_baseline(results, str(path))
+    assert load_baseline(str(path)) == results
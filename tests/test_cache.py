@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.cache import CachedProvider, merge_intervals, missing_intervals
+
+
+class FakeProvider:
+    """Gera candles horários determinísticos e conta as chamadas."""
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, ticker, timeframe, start, end):
+        self.calls.append((ticker, timeframe, start, end))
+        idx = pd.date_range(start, end, freq='h', tz='UTC')
+        price = (idx.asi8 // 3_600_000_000_000 % 1000).astype(float)
+        return pd.DataFrame({'Open': price, 'High': price + 1, 'Low': price - 1,
+                             'Close': price, 'Volume': 10.0}, index=idx)
+
+
+def ts(s):
+    return pd.Timestamp(s, tz='UTC')
+
+
+def test_missing_intervals():
+    covered = merge_intervals([(ts('2024-01-05'), ts('2024-01-10')), (ts('2024-01-01'), ts('2024-01-03'))])
+    gaps = missing_intervals(covered, ts('2024-01-02'), ts('2024-01-12'))
+    assert gaps == [(ts('2024-01-03'), ts('2024-01-05')), (ts('2024-01-10'), ts('2024-01-12'))]
+    assert missing_intervals(covered, ts('2024-01-06'), ts('2024-01-09')) == []
+    assert merge_intervals([(ts('2024-01-01'), ts('2024-01-02')), (ts('2024-01-02'), ts('2024-01-03'))]) \
+        == [(ts('2024-01-01'), ts('2024-01-03'))]
+
+
+def test_repeated_overlapping_requests_fetch_only_new_bars(tmp_path):
+    fake = FakeProvider()
+    cache = CachedProvider(fake, tmp_path)
+
+    first = cache.fetch('BTC-USD', '1h', '2024-01-01', '2024-01-10')
+    assert len(fake.calls) == 1
+    assert len(first) == 9 * 24 + 1
+
+    again = cache.fetch('BTC-USD', '1h', '2024-01-03', '2024-01-08')
+    assert len(fake.calls) == 1
+    pd.testing.assert_frame_equal(again, first.loc[ts('2024-01-03'):ts('2024-01-08')])
+
+    wider = cache.fetch('BTC-USD', '1h', '2023-12-30', '2024-01-12')
+    assert fake.calls[1:] == [('BTC-USD', '1h', '2023-12-30', '2024-01-01'),
+                              ('BTC-USD', '1h', '2024-01-10', '2024-01-12')]
+    expected = FakeProvider().fetch('BTC-USD', '1h', '2023-12-30', '2024-01-12').rename(columns=str.lower)
+    np.testing.assert_array_equal(wider['close'].to_numpy(), expected['close'].to_numpy())
+    assert wider.index.is_monotonic_increasing and not wider.index.has_duplicates
+    assert 'volume' in wider.columns
+
+
+def test_cache_persists_between_instances(tmp_path):
+    fake = FakeProvider()
+    CachedProvider(fake, tmp_path).fetch('EURUSD=X', '1h', '2024-02-01', '2024-02-03')
+    df = CachedProvider(fake, tmp_path).fetch('EURUSD=X', '1h', '2024-02-01', '2024-02-02')
+    assert len(fake.calls) == 1
+    assert len(df) == 25
+
+
+def test_future_range_is_not_marked_covered(tmp_path):
+    fake = FakeProvider()
+    cache = CachedProvider(fake, tmp_path)
+    later = (pd.Timestamp.now(tz='UTC') + pd.Timedelta(days=2)).strftime('%Y-%m-%d')
+    cache.fetch('BTC-USD', '1h', '2024-01-01', later)
+    cache.fetch('BTC-USD', '1h', '2024-01-01', later)
+    assert len(fake.calls) == 2
+    assert fake.calls[1][2] != '2024-01-01'
+
+
+def test_lru_eviction_by_series(tmp_path):
+    fake = FakeProvider()
+    cache = CachedProvider(fake, tmp_path, max_series=2)
+    cache.fetch('A', '1h', '2024-01-01', '2024-01-02')
+    cache.fetch('B', '1h', '2024-01-01', '2024-01-02')
+    cache.fetch('A', '1h', '2024-01-01', '2024-01-02')   # A vira o mais recente
+    cache.fetch('C', '1h', '2024-01-01', '2024-01-02')   # despeja B
+    assert cache.coverage('B', '1h') == []
+    assert not cache.store.series_dir('B', '1h').exists()
+    calls = len(fake.calls)
+    cache.fetch('A', '1h', '2024-01-01', '2024-01-02')
+    assert len(fake.calls) == calls
+
+
+def test_eviction_by_bytes(tmp_path):
+    fake = FakeProvider()
+    cache = CachedProvider(fake, tmp_path)
+    cache.fetch('A', '1h', '2024-01-01', '2024-01-05')
+    cache.max_bytes = cache.size_bytes() + 1
+    cache.fetch('B', '1h', '2024-01-01', '2024-01-05')
+    assert cache.coverage('A', '1h') == []
+    assert cache.coverage('B', '1h') != []
+    assert cache.size_bytes() <= cache.max_bytes
+
+
+def test_eviction_uses_indexed_sizes(tmp_path, monkeypatch):
+    fake = FakeProvider()
+    cache = CachedProvider(fake, tmp_path)
+    for ticker in 'ABCDE':
+        cache.fetch(ticker, '1h', '2024-01-01', '2024-01-05')
+    sizes = {k: e['bytes'] for k, e in cache._index.items()}
+    assert sizes == {k: cache._series_bytes(k) for k in cache._index}
+    del cache._index['A|1h']['bytes']          # índice gravado por uma versão antiga
+    walks = []
+    measure = cache._series_bytes
+    monkeypatch.setattr(cache, '_series_bytes', lambda key: walks.append(key) or measure(key))
+    cache.max_bytes = sizes['E|1h'] + 1
+    cache.read('E', '1h', '2024-01-01', '2024-01-05')
+    assert list(cache._index) == ['E|1h']
+    assert walks == ['A|1h']                   # só a série sem tamanho no índice é medida
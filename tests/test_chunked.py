@@ -0,0 +1,137 @@
+# tests/test_chunked.py
+
+import threading
+
+import pytest
+
+from backtest.batch import count_signals
+from backtest.chunked import BacktestWorker, chunk_bounds, run_backtest_chunked
+from backtest.engine import run_backtest_df
+from backtest.profiling import DetectorProfiler
+from benchmarks.synthetic import synthetic_ohlc
+
+POSITIONAL = ['detect_fvg', 'detect_breaker_blocks', 'detect_mitigation_blocks',
+              'detect_liquidity_voids', 'detect_stop_hunts', 'detect_killzones', 'detect_multi_fvg']
+
+
+@pytest.fixture(scope='module')
+def df():
+    return synthetic_ohlc(6_000, seed=5, volatility=2e-3)
+
+
+def test_chunk_bounds_by_count(df):
+    bounds = chunk_bounds(df.index, 2_500)
+    assert bounds == [(0, 2_500), (2_500, 5_000), (5_000, 6_000)]
+    with pytest.raises(ValueError):
+        chunk_bounds(df.index, 0)
+
+
+def test_chunk_bounds_by_day(df):
+    bounds = chunk_bounds(df.index, 'D')
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(df)
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+    for start, end in bounds:
+        assert df.index[start].normalize() == df.index[end - 1].normalize()
+    assert len(bounds) == df.index.normalize().nunique()
+
+
+def test_positional_detectors_match_single_pass(df):
+    expected = run_backtest_df(df, POSITIONAL)
+    result = run_backtest_chunked(df, POSITIONAL, chunk=1_000)
+    assert not result.cancelled
+    assert len(result.table) == 6
+    assert result.table['bars'].sum() == len(df)
+    for name in POSITIONAL:
+        assert result.totals[name] == count_signals(expected[name]), name
+        assert result.table[name].sum() == result.totals[name]
+
+
+def test_kept_results_use_global_positions(df):
+    result = run_backtest_chunked(df, ['detect_fvg'], chunk=1_500, keep_results=True)
+    chunks = result.results['detect_fvg']
+    assert len(chunks) == 4
+    for (start, end), events in zip(chunk_bounds(df.index, 1_500), chunks):
+        assert all(start <= ev['index'] < end for ev in events)
+    merged = [ev['index'] for events in chunks for ev in events]
+    assert merged == sorted(merged) and len(merged) == len(set(merged))
+
+
+def test_cancel_returns_partial_result(df):
+    cancel = threading.Event()
+    seen = []
+
+    def on_chunk(i, n, row, totals):
+        seen.append(i)
+        if i == 2:
+            cancel.set()
+
+    result = run_backtest_chunked(df, ['detect_fvg'], chunk=1_000, cancel=cancel, on_chunk=on_chunk)
+    assert result.cancelled
+    assert seen == [1, 2]
+    assert result.table['bars'].sum() == 2_000
+    assert result.totals['detect_fvg'] == result.table['detect_fvg'].sum()
+
+
+def test_cancel_before_start(df):
+    cancel = threading.Event()
+    cancel.set()
+    result = run_backtest_chunked(df, ['detect_fvg'], cancel=cancel)
+    assert result.cancelled and result.table.empty
+    assert result.totals == {'detect_fvg': 0}
+
+
+def drain(worker):
+    worker.join(30)
+    messages = []
+    while not worker.messages.empty():
+        messages.append(worker.messages.get_nowait())
+    return messages
+
+
+def test_worker_reports_chunks_then_done(df):
+    worker = BacktestWorker(df, ['detect_fvg', 'detect_stop_hunts'], chunk=2_000).start()
+    messages = drain(worker)
+    kinds = [k for k, _ in messages]
+    assert kinds == ['chunk'] * 3 + ['done']
+    assert [p['done'] for _, p in messages[:-1]] == [1, 2, 3]
+    assert messages[-2][1]['bars'] == len(df)
+    result = messages[-1][1]
+    assert messages[-2][1]['totals'] == result.totals
+
+
+def test_worker_reports_errors(df):
+    worker = BacktestWorker(df, ['detect_fvg'], chunk=-1).start()
+    (kind, error), = drain(worker)
+    assert kind == 'error' and isinstance(error, ValueError)
+
+
+def test_profiler_records_every_chunk(df):
+    profiler = DetectorProfiler(memory=False)
+    run_backtest_chunked(df, ['detect_fvg'], chunk=1_500, profiler=profiler)
+    report = profiler.report()
+    assert (report['detector'] == 'detect_fvg').sum() == 4
+
+
+def test_non_positional_totals_come_from_a_single_pass(df):
+    names = ['detect_liquidity_zones', 'compute_equilibrium_zone', 'detect_bos', 'detect_confluence_zones']
+    expected = run_backtest_df(df, names)
+    result = run_backtest_chunked(df, names + ['detect_fvg'], chunk=1_000)
+    assert result.per_chunk == ()
+    for name in names:
+        assert result.totals[name] == count_signals(expected[name]), name
+    assert result.table['compute_equilibrium_zone'].tolist() == [1] * 6
+    assert result.totals['detect_fvg'] == result.table['detect_fvg'].sum()
+
+
+def test_cancelled_run_marks_per_chunk_totals(df):
+    cancel = threading.Event()
+
+    def on_chunk(i, n, row, totals):
+        if i == 2:
+            cancel.set()
+
+    result = run_backtest_chunked(df, ['compute_equilibrium_zone', 'detect_fvg'], chunk=1_000,
+                                  cancel=cancel, on_chunk=on_chunk)
+    assert result.cancelled
+    assert result.per_chunk == ('compute_equilibrium_zone',)
+    assert result.totals['compute_equilibrium_zone'] == 2
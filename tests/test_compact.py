@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import patterns
+from core.compact import CompactOHLC
+from core.config import DETECTORS_BY_LEVEL
+
+# tick potência de 2: os preços são exatos em float64, então o caminho DataFrame
+# não tem ruído de arredondamento nos empates e serve de referência exata
+TICK = 0.25
+
+
+@pytest.fixture(params=[0, 1])
+def bars(request, make_bars):
+    return make_bars(request.param, 3000, start='2024-01-02', price=1500, step=3, jitter=1, wick=1.5, tick=TICK)
+
+
+def canon(obj):
+    """Arredonda floats (inclusive chaves de dict) para comparar com a versão decodificada."""
+    if isinstance(obj, float):
+        return round(obj, 8)
+    if isinstance(obj, dict):
+        return {canon(k): canon(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(canon(v) for v in obj)
+    if isinstance(obj, (pd.Index, np.ndarray)):
+        return list(obj)
+    return obj
+
+
+CALLS = [(d.__name__, {}) for dets in DETECTORS_BY_LEVEL.values() for d in dets] + [
+    ('detect_liquidity_zones', {'min_touches': 3, 'tol': 0.5}),
+    ('detect_liquidity_zones', {'atr_mult': 0.3}),
+    ('detect_liquidity_sweep', {'zones': [1500.0, 1510.5, 1499.75]}),
+    ('detect_sweeps_and_inducements', {'zones': [1500.0, 1510.5], 'tol': 0.25}),
+    ('detect_order_blocks', {'min_range': 4.0}),
+    ('detect_breaker_blocks', {'min_range': 3.0}),
+    ('detect_liquidity_voids', {'tol': 0.25}),
+    ('detect_stop_hunts', {'wick_ratio': 0.25}),
+    ('detect_confluence_levels', {'tolerance': 0.5}),
+    ('detect_confluence_zones', {'tolerance': 0.5}),
+    ('detect_choch_breaks', {}),
+]
+
+
+@pytest.mark.parametrize('mode', ['ticks', 'float32'])
+@pytest.mark.parametrize('name,kwargs', CALLS)
+def test_detectors_accept_compact(bars, mode, name, kwargs):
+    compact = CompactOHLC.from_frame(bars, tick_size=TICK, mode=mode, symbol='XAUUSD')
+    func = getattr(patterns, name)
+    assert canon(func(compact, **kwargs)) == canon(func(bars, **kwargs))
+
+
+def test_memory_and_round_trip(bars):
+    compact = CompactOHLC.from_frame(bars, tick_size=TICK)
+    assert compact.open.dtype == np.int32
+    prices = 4 * len(bars) * 4
+    assert compact.nbytes - bars.index.nbytes == prices
+    assert compact.nbytes < bars.memory_usage(deep=True).sum()
+    np.testing.assert_allclose(compact.to_frame().to_numpy(), bars.to_numpy(), atol=1e-9)
+    part = compact.iloc[-10:]
+    assert len(part) == 10 and part.index.equals(bars.index[-10:])
+    pd.testing.assert_series_equal(part['close'], bars['close'].iloc[-10:], atol=1e-9)
+
+
+def test_tick_aware_tolerance(bars):
+    ticks = CompactOHLC.from_frame(bars, tick_size=TICK)
+    assert ticks.tolerance(0.5) == pytest.approx(2.0)
+    assert ticks.tolerance(1e-5) < 1            # menor que um tick: igualdade exata
+    f32 = CompactOHLC.from_frame(bars, tick_size=TICK, mode='float32')
+    assert f32.tolerance(1e-5) == TICK / 2
+    assert f32.tolerance(0.5) == 0.5
+    bare = CompactOHLC.from_frame(bars, mode='float32')
+    assert bare.tolerance(0.0) == pytest.approx(np.finfo(np.float32).eps * bars['high'].max())
+    assert bare.price_tolerance(0.0) == bare.tolerance(0.0)
+    assert ticks.price_tolerance(0.5) == 0.5
+
+
+def test_invalid_configurations(bars):
+    with pytest.raises(ValueError):
+        CompactOHLC.from_frame(bars)                          # ticks sem tick_size
+    with pytest.raises(ValueError):
+        CompactOHLC.from_frame(bars, tick_size=1e-7)          # não cabe em int32
+    with pytest.raises(ValueError):
+        CompactOHLC.from_frame(bars, tick_size=TICK, mode='int8')
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import patterns
+from core.compact import CompactOHLC
+from core.events import EVENT_DTYPE, LEGACY_FORMATS, event_levels, to_frame, to_legacy
+
+
+@pytest.fixture(params=[0, 1, 2])
+def bars(request, make_bars):
+    return make_bars(request.param, 2000, freq=None, step=0.4, jitter=0.3, wick=0.3)
+
+
+@pytest.mark.parametrize('name', list(LEGACY_FORMATS))
+def test_table_round_trips_to_legacy(bars, name):
+    func = getattr(patterns, name)
+    table = func(bars, as_table=True)
+    assert table.dtype == EVENT_DTYPE
+    assert len(table) > 0
+    assert to_legacy(table, name) == func(bars)
+
+
+@pytest.mark.parametrize('name', list(LEGACY_FORMATS))
+def test_empty_and_short_inputs(name):
+    func = getattr(patterns, name)
+    short = pd.DataFrame({'open': [1.0], 'high': [1.0], 'low': [1.0], 'close': [1.0]})
+    table = func(short, as_table=True)
+    assert table.dtype == EVENT_DTYPE and len(table) == 0
+    assert to_legacy(table, name) == func(short) == []
+
+
+def test_sides_and_frame(bars):
+    table = patterns.detect_fvg(bars, as_table=True)
+    legacy = patterns.detect_fvg(bars)
+    assert (table['side'] == -1).sum() == sum(g['side'] == 'bear' for g in legacy)
+    frame = to_frame(table)
+    assert list(frame.columns) == ['index', 'side', 'lower', 'upper']
+    assert frame['lower'].dtype == np.float64 and frame['side'].dtype == np.int8
+    assert (frame['lower'] <= frame['upper']).all()
+
+
+def test_tables_feed_composite_detectors(bars):
+    fvgs = patterns.detect_fvg(bars, as_table=True)
+    obs = patterns.detect_order_blocks(bars, as_table=True)
+    assert event_levels(obs) == event_levels(patterns.detect_order_blocks(bars))
+    assert patterns.detect_confluence_zones(bars, tolerance=0.1, order_blocks=obs, fvgs=fvgs) \
+        == patterns.detect_confluence_zones(bars, tolerance=0.1)
+    multi = patterns.detect_multi_fvg(bars, gaps=fvgs)
+    assert multi is fvgs
+    none = patterns.detect_multi_fvg(bars, min_gaps=len(fvgs) + 1, as_table=True)
+    assert none.dtype == EVENT_DTYPE and len(none) == 0
+
+
+def test_compact_input_is_decoded(bars):
+    compact = CompactOHLC.from_frame(bars, tick_size=0.1)
+    table = patterns.detect_order_blocks(compact, as_table=True)
+    expected = patterns.detect_order_blocks(bars, as_table=True)
+    np.testing.assert_array_equal(table['index'], expected['index'])
+    np.testing.assert_allclose(table['lower'], expected['lower'], atol=1e-9)
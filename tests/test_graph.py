@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import patterns
+from core.config import DETECTORS_BY_LEVEL
+from core.graph import DetectorGraph
+
+
+@pytest.fixture
+def bars(make_bars):
+    return make_bars(5, 300, '15min')
+
+
+def all_detectors():
+    return [d for dets in DETECTORS_BY_LEVEL.values() for d in dets]
+
+
+def test_graph_results_match_direct_calls(bars):
+    results = DetectorGraph(bars).run(all_detectors())
+    for det in all_detectors():
+        expected = det(bars)
+        got = results[det.__name__]
+        if isinstance(expected, pd.Index):
+            assert got.equals(expected)
+        else:
+            assert got == expected, det.__name__
+
+
+def test_shared_intermediates_computed_once(bars):
+    graph = DetectorGraph(bars)
+    graph.run(all_detectors())
+    names = [name for name, _ in graph.computed]
+    assert len(names) == len(set(names))
+    assert len(names) == len(all_detectors())
+
+
+def test_custom_params_get_their_own_node(bars):
+    graph = DetectorGraph(bars)
+    res = graph.run(['detect_fvg', 'detect_order_blocks', 'detect_confluence_zones'],
+                    params={'detect_order_blocks': {'lookback': 200}})
+    assert res['detect_order_blocks'] == patterns.detect_order_blocks(bars, lookback=200)
+    # a confluência continua usando os OBs com parâmetros padrão
+    assert res['detect_confluence_zones'] == patterns.detect_confluence_zones(bars)
+    assert ('detect_order_blocks', ()) in graph.cache
+
+
+def test_inducement_reuses_sweeps(bars):
+    zones = list(patterns.detect_liquidity_zones(bars))
+    sweeps = patterns.detect_liquidity_sweep(bars, zones)
+    assert patterns.detect_inducement(bars, sweeps=sweeps) == patterns.detect_inducement(bars, zones)
+
+
+def test_forget_keeps_dependencies(bars):
+    graph = DetectorGraph(bars)
+    graph.get('detect_multi_fvg', min_gaps=1)
+    graph.forget('detect_multi_fvg', min_gaps=1)
+    graph.get('detect_multi_fvg', min_gaps=1)
+    assert [name for name, _ in graph.computed] == ['detect_fvg', 'detect_multi_fvg', 'detect_multi_fvg']
+
+
+def test_caller_inputs_replace_injected_dependencies(bars):
+    zones = list(patterns.detect_liquidity_zones(bars, tol=0.3))
+    graph = DetectorGraph(bars)
+    res = graph.run(['detect_inducement'], params={'detect_inducement': {'zones': zones}})
+    assert res['detect_inducement'] == patterns.detect_inducement(bars, zones)
+    # os sweeps padrão (zonas dos últimos candles) não entram no lugar das zonas
+    assert 'detect_liquidity_sweep' not in [name for name, _ in graph.computed]
+    res = graph.run(['detect_multi_fvg'], params={'detect_multi_fvg': {'as_table': True}})
+    assert np.array_equal(res['detect_multi_fvg'], patterns.detect_multi_fvg(bars, as_table=True))
+
+
+def test_large_array_params_do_not_share_a_cache_entry(bars):
+    # o repr do NumPy abrevia arrays grandes com '...'; arrays que só diferem no meio
+    zones = np.round(np.linspace(90, 110, 2_000), 2)
+    other = zones.copy()
+    other[1_000] += 0.35
+    assert repr(zones) == repr(other)
+    graph = DetectorGraph(bars)
+    first = graph.get('detect_liquidity_sweep', zones=zones)
+    second = graph.get('detect_liquidity_sweep', zones=other)
+    assert len(graph.computed) == 2
+    assert first == patterns.detect_liquidity_sweep(bars, zones)
+    assert second == patterns.detect_liquidity_sweep(bars, other)
+    graph.get('detect_liquidity_sweep', zones=zones.copy())
+    assert len(graph.computed) == 2
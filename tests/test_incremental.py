@@ -0,0 +1,39 @@
+# tests/test_incremental.py
+
+import numpy as np
+import pytest
+
+from core import patterns
+from core.incremental import ConfluenceLevels, LiquidityClusters
+from core.kernels import confluence_select
+
+
+@pytest.mark.parametrize('tol, min_touches', [(0.05, 2), (0.3, 2), (0.3, 3), (1.0, 1)])
+def test_liquidity_clusters_equal_batch_on_every_prefix(make_bars, tol, min_touches):
+    df = make_bars(11, 150, freq=None)
+    high, low = df['high'].to_numpy(), df['low'].to_numpy()
+    clusters = LiquidityClusters(tol, min_touches)
+    live = set()
+    for t in range(len(df)):
+        added, removed = clusters.update(high[t], low[t], t)
+        live -= {lvl for lvl, _ in removed}
+        live |= {lvl for lvl, _ in added}
+        expected = patterns.detect_liquidity_zones(df.iloc[:t + 1], min_touches=min_touches, tol=tol)
+        assert list(clusters.zones().items()) == list(expected.items()), t
+        assert live == set(expected) and clusters.n_zones == len(expected)
+
+
+@pytest.mark.parametrize('tol', [0.05, 0.3])
+def test_confluence_levels_follow_batch_selection(tol):
+    rng = np.random.default_rng(5)
+    levels = ConfluenceLevels(tol)
+    present = []
+    for step in range(600):
+        if present and rng.random() < 0.3:
+            levels.remove(*present.pop(rng.integers(len(present))))
+        else:
+            item = (float(np.round(rng.normal(0, 2), 2)), (int(rng.integers(3)), step))
+            present.append(item)
+            levels.add(*item)
+        values = np.array([v for v, _ in sorted(present, key=lambda it: it[1])])
+        assert levels.selected() == values[confluence_select(values, tol)].tolist(), step
@@ -0,0 +1,98 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.ingest import detect_datetime_format, load_in_background, load_ohlc, parquet_cache_path, read_ohlc_csv
+
+
+@pytest.fixture
+def bars(make_bars):
+    return make_bars(9, 5_000, start='2024-05-01', step=0.1, tick=1e-5, volume=True, name='time')
+
+
+def write_csv(bars, path, fmt='%Y-%m-%d %H:%M:%S', time_name='Datetime'):
+    out = bars.rename(columns=str.capitalize)
+    out.insert(0, time_name, bars.index.strftime(fmt))
+    out['Spread'] = 'x'                  # coluna extra não numérica é ignorada
+    out.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('fmt', ['%Y-%m-%d %H:%M:%S', '%Y.%m.%d %H:%M', '%d/%m/%Y %H:%M'])
+def test_chunked_read_matches_frame(tmp_path, bars, fmt):
+    path = write_csv(bars, tmp_path / 'bars.csv', fmt)
+    progress = []
+    df = read_ohlc_csv(path, chunksize=700, progress_callback=progress.append)
+    pd.testing.assert_frame_equal(df, bars, check_freq=False)
+    assert progress == sorted(progress) and progress[-1] == 100 and len(progress) > 5
+    assert all(df[c].dtype == np.float64 for c in df.columns)
+
+
+def test_epoch_and_explicit_dtype(tmp_path, bars):
+    path = tmp_path / 'epoch.csv'
+    out = bars.reset_index()
+    out['time'] = bars.index.asi8 // 10**6
+    out.to_csv(path, index=False)
+    df = read_ohlc_csv(path, dtype='float32')
+    assert df.index.equals(bars.index)
+    assert df['close'].dtype == np.float32
+
+
+def test_detect_format_and_errors(tmp_path):
+    assert detect_datetime_format('2024.05.01 10:00') == '%Y.%m.%d %H:%M'
+    assert detect_datetime_format('1714557600') is None
+    with pytest.raises(ValueError):
+        detect_datetime_format('maio 1')
+    path = tmp_path / 'bad.csv'
+    path.write_text('datetime,open,high,close\n2024-01-01 00:00,1,1,1\n')
+    with pytest.raises(ValueError, match='low'):
+        read_ohlc_csv(path)
+
+
+def test_parquet_conversion_is_reused(tmp_path, bars):
+    path = write_csv(bars, tmp_path / 'bars.csv')
+    first = load_ohlc(path, to_parquet=True)
+    cached = parquet_cache_path(path)
+    assert cached.exists()
+    os.remove(path)
+    path.write_text('lixo')               # CSV mais antigo que o cache é ignorado
+    os.utime(path, (0, 0))
+    pd.testing.assert_frame_equal(load_ohlc(path, to_parquet=True), first)
+
+
+def test_parquet_sidecar_needs_to_parquet_and_same_options(tmp_path, bars):
+    path = write_csv(bars, tmp_path / 'bars.csv')
+    load_ohlc(path, to_parquet=True)
+    cached = parquet_cache_path(path)
+    stale = bars.iloc[:10].copy()
+    stale.to_parquet(cached)              # sidecar com outro conteúdo, mais novo que o CSV
+    os.utime(path, (0, 0))
+    # sem to_parquet o CSV é lido mesmo com o sidecar mais novo
+    pd.testing.assert_frame_equal(load_ohlc(path), bars, check_freq=False)
+    load_ohlc(path, to_parquet=True)      # sidecar sem as opções: regravado
+    os.utime(path, (0, 0))
+    assert load_ohlc(path, to_parquet=True)['close'].dtype == np.float64
+    # dtype diferente invalida o sidecar
+    df = load_ohlc(path, to_parquet=True, dtype='float32')
+    assert df['close'].dtype == np.float32
+    os.utime(path, (0, 0))
+    assert load_ohlc(path, to_parquet=True, dtype='float32')['close'].dtype == np.float32
+    assert load_ohlc(path, to_parquet=True)['close'].dtype == np.float64
+
+
+def test_cancel_and_background(tmp_path, bars):
+    path = write_csv(bars, tmp_path / 'bars.csv')
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(InterruptedError):
+        read_ohlc_csv(path, chunksize=100, cancel=cancel)
+
+    done = {}
+    thread = load_in_background(path, on_done=lambda df: done.setdefault('df', df),
+                                on_error=lambda e: done.setdefault('error', e), chunksize=1000)
+    thread.join(10)
+    assert 'error' not in done
+    pd.testing.assert_frame_equal(done['df'], bars, check_freq=False)
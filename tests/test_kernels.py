@@ -0,0 +1,265 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import patterns
+from core.kernels import (
+    average_true_range,
+    cluster_labels,
+    confluence_select,
+    interleave,
+    ohlc_arrays,
+)
+
+
+# Implementações de referência (loops por candle) usadas para validar os kernels
+
+def ref_order_blocks(df, min_range=0, lookback=50):
+    obs = []
+    for i in range(1, min(len(df)-1, lookback)):
+        prev = df.iloc[i-1]; nxt = df.iloc[i+1]
+        if prev['close'] < prev['open'] and nxt['close'] > prev['high'] and (prev['high']-prev['low']) >= min_range:
+            obs.append({'side': 'bull', 'zone': (prev['low'], prev['high']), 'index': i-1})
+        if prev['close'] > prev['open'] and nxt['close'] < prev['low'] and (prev['high']-prev['low']) >= min_range:
+            obs.append({'side': 'bear', 'zone': (prev['low'], prev['high']), 'index': i-1})
+    return list({o['index']: o for o in obs}.values())
+
+
+def ref_breaker_blocks(df, min_range=0):
+    blocks = []
+    for i in range(1, len(df)-1):
+        prev, curr, nxt = df.iloc[i-1], df.iloc[i], df.iloc[i+1]
+        if curr['low'] < prev['low'] and nxt['close'] > curr['high'] and (curr['high']-curr['low']) >= min_range:
+            blocks.append({'index': i, 'type': 'bearish', 'zone': (curr['low'], curr['high'])})
+        if curr['high'] > prev['high'] and nxt['close'] < curr['low'] and (curr['high']-curr['low']) >= min_range:
+            blocks.append({'index': i, 'type': 'bullish', 'zone': (curr['low'], curr['high'])})
+    seen = set(); uniq = []
+    for b in blocks:
+        if b['index'] not in seen:
+            seen.add(b['index']); uniq.append(b)
+    return uniq
+
+
+def ref_mitigation_blocks(df):
+    blocks = []
+    for i in range(2, len(df)):
+        prev2, prev1, curr = df.iloc[i-2], df.iloc[i-1], df.iloc[i]
+        if prev1['high'] > prev2['high'] and curr['close'] <= prev2['high']:
+            blocks.append({'index': i, 'type': 'bullish', 'zone': (prev2['low'], prev2['high'])})
+        if prev1['low'] < prev2['low'] and curr['close'] >= prev2['low']:
+            blocks.append({'index': i, 'type': 'bearish', 'zone': (prev2['low'], prev2['high'])})
+    return blocks
+
+
+def ref_liquidity_voids(df, tol=0.0):
+    voids = []
+    for i in range(1, len(df)):
+        prev, curr = df.iloc[i-1], df.iloc[i]
+        if curr['low'] > prev['high'] + tol:
+            voids.append({'index': i, 'type': 'bullish', 'zone': (prev['high'], curr['low'])})
+        if curr['high'] < prev['low'] - tol:
+            voids.append({'index': i, 'type': 'bearish', 'zone': (curr['high'], prev['low'])})
+    return voids
+
+
+def ref_stop_hunts(df, wick_ratio=0.5):
+    hunts = []
+    for i in range(1, len(df)):
+        o, h, l, c = df.iloc[i][['open', 'high', 'low', 'close']]
+        rng = h - l
+        if rng == 0: continue
+        if (min(o, c) - l) / rng > wick_ratio and c <= o: hunts.append(i)
+        if (h - max(o, c)) / rng > wick_ratio and c >= o: hunts.append(i)
+    return hunts
+
+
+def ref_fvg(df):
+    gaps = []
+    highs = df['high']; lows = df['low']
+    for i in range(len(df) - 2):
+        if highs.iat[i] < lows.iat[i+2]:
+            gaps.append({'side': 'bull', 'lower': highs.iat[i], 'upper': lows.iat[i+2], 'index': i})
+        elif lows.iat[i] > highs.iat[i+2]:
+            gaps.append({'side': 'bear', 'lower': highs.iat[i+2], 'upper': lows.iat[i], 'index': i})
+    return gaps
+
+
+@pytest.fixture(params=[0, 1, 2])
+def noisy_df(request, make_bars):
+    # preços arredondados para gerar empates, gaps e candles de range zero
+    return make_bars(request.param, 400, freq=None)
+
+
+@pytest.mark.parametrize('name,ref,kwargs', [
+    ('detect_fvg', ref_fvg, {}),
+    ('detect_order_blocks', ref_order_blocks, {'lookback': 300}),
+    ('detect_order_blocks', ref_order_blocks, {'min_range': 1.0}),
+    ('detect_breaker_blocks', ref_breaker_blocks, {}),
+    ('detect_breaker_blocks', ref_breaker_blocks, {'min_range': 1.0}),
+    ('detect_mitigation_blocks', ref_mitigation_blocks, {}),
+    ('detect_liquidity_voids', ref_liquidity_voids, {}),
+    ('detect_liquidity_voids', ref_liquidity_voids, {'tol': 0.2}),
+    ('detect_stop_hunts', ref_stop_hunts, {}),
+    ('detect_stop_hunts', ref_stop_hunts, {'wick_ratio': 0.3}),
+])
+def test_kernels_match_reference_loops(noisy_df, name, ref, kwargs):
+    assert getattr(patterns, name)(noisy_df, **kwargs) == ref(noisy_df, **kwargs)
+
+
+def test_ohlc_arrays_passthrough_and_contiguous(noisy_df):
+    a = ohlc_arrays(noisy_df)
+    assert ohlc_arrays(a) is a
+    assert all(col.flags['C_CONTIGUOUS'] for col in a)
+    assert len(a) == len(noisy_df)
+
+
+def test_interleave_orders_first_before_second():
+    first = np.array([True, False, True, False])
+    second = np.array([False, True, True, False])
+    pos, is_second = interleave(first, second)
+    assert pos.tolist() == [0, 1, 2, 2]
+    assert is_second.tolist() == [False, True, False, True]
+
+
+def ref_liquidity_zones(df, min_touches=2, tol=1e-5):
+    counts = {}
+    for price in pd.concat([df['high'], df['low']]):
+        counts[price] = counts.get(price, 0) + 1
+    zones = {}
+    for price, cnt in counts.items():
+        found = next((z for z in zones if abs(z - price) <= tol), None)
+        if found is not None:
+            zones[found] += cnt
+        else:
+            zones[price] = cnt
+    return {z: c for z, c in zones.items() if c >= min_touches}
+
+
+@pytest.mark.parametrize('min_touches', [1, 2, 3])
+def test_liquidity_zones_match_reference(noisy_df, min_touches):
+    res = patterns.detect_liquidity_zones(noisy_df, min_touches=min_touches)
+    ref = ref_liquidity_zones(noisy_df, min_touches=min_touches)
+    assert res == ref
+    assert list(res) == list(ref)
+
+
+def test_liquidity_zones_merge_neighbours_within_tol():
+    df = pd.DataFrame({'open': [1.0, 1.0, 1.0], 'close': [1.0, 1.0, 1.0],
+                       'high': [10.00, 10.02, 12.0], 'low': [5.0, 5.01, 7.0]})
+    zones = patterns.detect_liquidity_zones(df, tol=0.05)
+    assert zones == {10.0: 2, 5.0: 2}
+
+
+def test_liquidity_zones_atr_relative_tolerance():
+    df = pd.DataFrame({'open': [10.0, 10.0], 'close': [10.0, 10.0],
+                       'high': [11.0, 11.3], 'low': [9.0, 9.2]})
+    assert patterns.detect_liquidity_zones(df) == {}
+    # ATR médio = 2.05 => tol ≈ 0.41 funde 11.0/11.3 e 9.0/9.2
+    assert patterns.detect_liquidity_zones(df, atr_mult=0.2) == {11.0: 2, 9.0: 2}
+
+
+@pytest.mark.parametrize('seed', range(6))
+@pytest.mark.parametrize('tol', [0.02, 0.5, 2.0, 7.5])
+def test_liquidity_zones_fuzz_against_reference(make_bars, seed, tol):
+    # preços de 0.01 em 0.01 (estilo BTC): tol de vários ticks forma zonas largas
+    df = make_bars(seed, 400, freq=None, price=30_000, step=3, jitter=1, wick=2, tick=0.01)
+    res = patterns.detect_liquidity_zones(df, min_touches=1, tol=tol)
+    ref = ref_liquidity_zones(df, min_touches=1, tol=tol)
+    assert list(res.items()) == list(ref.items())
+    atr = patterns.detect_liquidity_zones(df, min_touches=1, atr_mult=1.0)
+    tol_atr = 1.0 * average_true_range(ohlc_arrays(df))
+    assert list(atr.items()) == list(ref_liquidity_zones(df, min_touches=1, tol=tol_atr).items())
+
+
+def test_cluster_labels_only_depend_on_the_past():
+    rng = np.random.default_rng(3)
+    prices = np.round(100 + rng.normal(0, 0.2, 2_000).cumsum(), 2)
+    full = cluster_labels(prices, 0.3)
+    for k in (1, 10, 500, 1_999):
+        assert np.array_equal(cluster_labels(prices[:k], 0.3), full[:k])
+
+
+def ref_liquidity_sweep(df, zones, body_ratio=0.5, tol=1e-5):
+    sweeps = []
+    highs = df['high']; lows = df['low']; closes = df['close']; opens = df['open']
+    for i in range(1, len(df)):
+        h, l, o, c = highs.iat[i], lows.iat[i], opens.iat[i], closes.iat[i]
+        rng = h - l
+        if rng == 0 or abs(c-o)/rng > body_ratio:
+            continue
+        for z in zones:
+            if h > z + tol and c < z - tol:
+                sweeps.append({'index': i, 'level': z, 'direction': 'up'})
+            if l < z - tol and c > z + tol:
+                sweeps.append({'index': i, 'level': z, 'direction': 'down'})
+    seen = set(); uniq = []
+    for s in sweeps:
+        if (s['index'], s['level']) not in seen:
+            seen.add((s['index'], s['level'])); uniq.append(s)
+    return uniq
+
+
+def ref_inducement(df, zones):
+    out = []
+    for sw in ref_liquidity_sweep(df, zones):
+        nxt = sw['index'] + 1
+        if nxt < len(df):
+            c = df['close'].iat[nxt]
+            if sw['direction'] == 'up' and c > sw['level']:
+                out.append({'sweep': sw, 'confirm_idx': nxt})
+            if sw['direction'] == 'down' and c < sw['level']:
+                out.append({'sweep': sw, 'confirm_idx': nxt})
+    return out
+
+
+@pytest.mark.parametrize('body_ratio,tol', [(0.5, 1e-5), (0.8, 0.05), (1.0, 0.0), (1.0, -0.3)])
+def test_liquidity_sweep_matches_reference(noisy_df, body_ratio, tol):
+    # zonas fora de ordem, repetidas e coincidindo com preços dos candles
+    zones = list(patterns.detect_liquidity_zones(noisy_df))[::-1] + [noisy_df['close'].iat[5]] * 2
+    res = patterns.detect_liquidity_sweep(noisy_df, zones, body_ratio=body_ratio, tol=tol)
+    assert res == ref_liquidity_sweep(noisy_df, zones, body_ratio=body_ratio, tol=tol)
+
+
+def test_negative_tol_reports_up_when_both_directions_hold(noisy_df):
+    tol = -0.3
+    zones = list(patterns.detect_liquidity_zones(noisy_df))
+    res = patterns.detect_liquidity_sweep(noisy_df, zones, body_ratio=1.0, tol=tol)
+    h, l, c = (noisy_df[col].to_numpy() for col in ('high', 'low', 'close'))
+    both = [sw for sw in res
+            if h[sw['index']] > sw['level'] + tol and c[sw['index']] < sw['level'] - tol
+            and l[sw['index']] < sw['level'] - tol and c[sw['index']] > sw['level'] + tol]
+    assert both and all(sw['direction'] == 'up' for sw in both)
+    assert res == ref_liquidity_sweep(noisy_df, zones, body_ratio=1.0, tol=tol)
+
+
+def test_inducement_same_pass_matches_reference(noisy_df):
+    zones = list(patterns.detect_liquidity_zones(noisy_df))
+    both = patterns.detect_sweeps_and_inducements(noisy_df, zones)
+    assert both['sweeps'] == ref_liquidity_sweep(noisy_df, zones)
+    assert both['inducements'] == ref_inducement(noisy_df, zones)
+    assert patterns.detect_inducement(noisy_df, zones) == both['inducements']
+
+
+def ref_confluence_select(all_levels, tolerance):
+    confluence = []
+    for lvl in all_levels:
+        group = [x for x in all_levels if abs(x - lvl) <= tolerance]
+        if len(group) >= 2 and not any(abs(c - lvl) <= tolerance for c in confluence):
+            confluence.append(lvl)
+    return confluence
+
+
+@pytest.mark.parametrize('tolerance', [1e-5, 0.1, 0.25, 1.0])
+def test_confluence_matches_reference(noisy_df, tolerance):
+    all_levels, _ = patterns._confluence_inputs(noisy_df)
+    res = patterns.detect_confluence_zones(noisy_df, tolerance=tolerance)
+    assert res == ref_confluence_select(all_levels, tolerance)
+
+
+def test_confluence_levels_report_sources(noisy_df):
+    levels = patterns.detect_confluence_levels(noisy_df, tolerance=0.1)
+    assert levels
+    assert [lv['level'] for lv in levels] == patterns.detect_confluence_zones(noisy_df, tolerance=0.1)
+    for lv in levels:
+        assert set(lv['sources']) == set(patterns.CONFLUENCE_SOURCES)
+        assert lv['count'] == sum(lv['sources'].values()) >= 2
@@ -0,0 +1,220 @@
+# tests/test_live_server.py
+
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.synthetic import synthetic_ohlc
+from core.config import DETECTORS_BY_LEVEL
+from core.streaming import StreamingPipeline, iter_bars
+from live.server import SignalServer, decode_message, encode_message
+
+N_CLIENTS = 300
+DETECTORS = DETECTORS_BY_LEVEL['Básico'] + DETECTORS_BY_LEVEL['Avançado']
+
+
+@pytest.fixture(scope='module')
+def bars():
+    return synthetic_ohlc(400, seed=11, volatility=2e-3)
+
+
+def bar_message(row):
+    o, h, l, c, t = row
+    return {'type': 'bar', 'time': t.isoformat(), 'open': o, 'high': h, 'low': l, 'close': c}
+
+
+def expected_messages(bars):
+    pipe = StreamingPipeline(DETECTORS)
+    out = []
+    for row in iter_bars(bars):
+        signals = pipe.update(row)
+        if signals:
+            out.append(json.loads(encode_message({'signals': signals}))['signals'])
+    return out
+
+
+async def wait_for(predicate, timeout=10.0):
+    async def poll():
+        while not predicate():
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def read_until(reader, last_seq, timeout=10.0):
+    messages = []
+
+    async def loop():
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            msg = decode_message(line)
+            messages.append(msg)
+            if msg.get('seq') == last_seq:
+                return
+    await asyncio.wait_for(loop(), timeout)
+    return messages
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_hundreds_of_clients_receive_every_signal(bars):
+    expected = expected_messages(bars)
+    assert expected
+
+    async def body():
+        async with SignalServer(DETECTORS, port=0) as server:
+            conns = [await asyncio.open_connection('127.0.0.1', server.port) for _ in range(N_CLIENTS)]
+            feed_r, feed_w = await asyncio.open_connection('127.0.0.1', server.port)
+            feed_w.write(encode_message({'type': 'hello', 'role': 'feed'}))
+            await wait_for(lambda: len(server.clients) == N_CLIENTS + 1
+                           and sum(not c.subscribed for c in server.clients.values()) == 1)
+            readers = [asyncio.ensure_future(read_until(r, len(expected))) for r, _ in conns]
+            for row in iter_bars(bars):
+                feed_w.write(encode_message(bar_message(row)))
+            await feed_w.drain()
+            received = await asyncio.gather(*readers)
+            for _, w in conns + [(feed_r, feed_w)]:
+                w.close()
+            return received, server.metrics()
+
+    received, metrics = run(body())
+    for msgs in received:
+        assert [m['seq'] for m in msgs] == list(range(1, len(expected) + 1))
+        assert [m['signals'] for m in msgs] == expected
+    assert metrics['bars'] == len(bars)
+    assert metrics['dropped'] == 0
+    assert metrics['messages'] == N_CLIENTS * len(expected)
+    lat = metrics['latency']
+    assert lat['count'] == N_CLIENTS * len(expected)
+    assert 0 <= lat['p50_ms'] <= lat['p95_ms'] <= lat['p99_ms'] <= lat['max_ms']
+
+
+@pytest.mark.parametrize('policy', ['drop_oldest', 'drop_newest'])
+def test_full_queue_drops_messages(bars, policy):
+    async def body():
+        async with SignalServer(DETECTORS, port=0, queue_size=4, overflow=policy) as server:
+            conns = [await asyncio.open_connection('127.0.0.1', server.port) for _ in range(3)]
+            await wait_for(lambda: len(server.clients) == 3)
+            # sem await entre os candles: as tarefas de escrita não rodam e as filas enchem
+            for row in iter_bars(bars):
+                server.ingest(bar_message(row))
+            last = server._seq
+            stop = last if policy == 'drop_oldest' else 4
+            received = await asyncio.gather(*(read_until(r, stop) for r, _ in conns))
+            stats = server.client_stats()
+            for _, w in conns:
+                w.close()
+            return received, stats, server.metrics(), last
+
+    received, stats, metrics, last = run(body())
+    kept = list(range(last - 3, last + 1)) if policy == 'drop_oldest' else [1, 2, 3, 4]
+    for msgs in received:
+        assert [m['seq'] for m in msgs] == kept
+    assert all(s['dropped'] == last - 4 for s in stats)
+    assert metrics['dropped'] == 3 * (last - 4)
+
+
+def test_disconnect_policy_drops_slow_client(bars):
+    async def body():
+        async with SignalServer(DETECTORS, port=0, queue_size=2, overflow='disconnect') as server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            await wait_for(lambda: len(server.clients) == 1)
+            for row in iter_bars(bars):
+                server.ingest(bar_message(row))
+            lines = await asyncio.wait_for(reader.read(), 5)
+            await wait_for(lambda: not server.clients)
+            writer.close()
+            return lines, server.metrics()
+
+    lines, metrics = run(body())
+    assert metrics['slow_disconnects'] == 1
+    assert metrics['clients'] == 0
+    assert len(lines.splitlines()) <= 2
+
+
+def test_slow_reader_does_not_hold_back_others():
+    payload = 'x' * 60_000
+    n = 200
+
+    async def body():
+        async with SignalServer([], port=0, queue_size=8) as server:
+            slow = await asyncio.open_connection('127.0.0.1', server.port)   # nunca lê
+            fast = [await asyncio.open_connection('127.0.0.1', server.port) for _ in range(5)]
+            await wait_for(lambda: len(server.clients) == 6)
+            readers = [asyncio.ensure_future(read_until(r, n, timeout=30)) for r, _ in fast]
+            for seq in range(1, n + 1):
+                server.broadcast({'type': 'blob', 'seq': seq, 'data': payload})
+                await asyncio.sleep(0)
+            received = await asyncio.gather(*readers)
+            stats = {s['id']: s for s in server.client_stats()}
+            for _, w in fast + [slow]:
+                w.close()
+            return received, stats
+
+    received, stats = run(body())
+    for msgs in received:
+        assert [m['seq'] for m in msgs] == list(range(1, n + 1))
+    assert stats[1]['dropped'] > 0
+    assert all(stats[i]['dropped'] == 0 for i in range(2, 7))
+
+
+def test_ping_and_bad_messages():
+    async def body():
+        async with SignalServer([], port=0) as server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            writer.write(b'not json\n')
+            writer.write(encode_message({'type': 'bar', 'open': 1}))
+            writer.write(encode_message({'type': 'ping'}))
+            await writer.drain()
+            pong = decode_message(await asyncio.wait_for(reader.readline(), 5))
+            writer.close()
+            return pong, server.metrics()
+
+    pong, metrics = run(body())
+    assert pong == {'type': 'pong'}
+    assert metrics['bad_messages'] == 2
+    assert metrics['latency']['count'] == 0
+
+
+@pytest.mark.parametrize('bad', [
+    {'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5},                          # sem horário
+    {'time': 'ontem', 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5},
+    {'time': '2024-01-02', 'open': 1.0, 'high': 'x', 'low': 0.5, 'close': 1.5},
+    {'time': '2024-01-02', 'open': 1.0, 'high': float('nan'), 'low': 0.5, 'close': 1.5},
+])
+def test_malformed_bar_does_not_desync_the_pipeline(bars, bad):
+    expected = expected_messages(bars)
+
+    async def body():
+        async with SignalServer(DETECTORS, port=0) as server:
+            sub_r, sub_w = await asyncio.open_connection('127.0.0.1', server.port)
+            feed_r, feed_w = await asyncio.open_connection('127.0.0.1', server.port)
+            feed_w.write(encode_message({'type': 'hello', 'role': 'feed'}))
+            await wait_for(lambda: len(server.clients) == 2
+                           and sum(not c.subscribed for c in server.clients.values()) == 1)
+            reader = asyncio.ensure_future(read_until(sub_r, len(expected)))
+            rows = list(iter_bars(bars))
+            for i, row in enumerate(rows):
+                if i == len(rows) // 2:
+                    feed_w.write(encode_message({'type': 'bar', **bad}))
+                feed_w.write(encode_message(bar_message(row)))
+            await feed_w.drain()
+            received = await reader
+            for w in (sub_w, feed_w):
+                w.close()
+            return received, server.metrics()
+
+    received, metrics = run(body())
+    # o candle inválido não avança nenhum detector: os sinais seguintes batem
+    assert [m['signals'] for m in received] == expected
+    assert metrics['bars'] == len(bars)
+    assert metrics['bad_messages'] == 1
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        SignalServer([], overflow='block')
@@ -0,0 +1,158 @@
+# tests/test_optimizer.py
+
+import json
+
+import pytest
+
+from backtest import optimizer
+from backtest.optimizer import Sweep, expand, load_sweeps, parse_sweep, run_sweeps
+from benchmarks.synthetic import synthetic_ohlc
+from core.graph import DetectorGraph
+from trade.simulator import simulate, zone_candidates
+
+SWEEPS = [
+    Sweep('voids', 'detect_liquidity_voids', {'tol': [0.0, 0.5, 1.0]}),
+    Sweep('ob', 'detect_order_blocks', {'min_range': [0, 1.0], 'lookback': [20, 200]}),
+    Sweep('multi', 'detect_multi_fvg', {'min_gaps': [1, 10**9]}, objective='signals'),
+    Sweep('hunts', 'detect_stop_hunts', {'wick_ratio': {'low': 0.3, 'high': 0.9}}, 'random', 5, 3, 'signals'),
+]
+
+
+@pytest.fixture(scope='module')
+def df():
+    return synthetic_ohlc(3_000, seed=9, volatility=2e-3)
+
+
+def test_grid_is_cartesian_product():
+    combos = expand(SWEEPS[1])
+    assert combos == [{'min_range': 0, 'lookback': 20}, {'min_range': 0, 'lookback': 200},
+                      {'min_range': 1.0, 'lookback': 20}, {'min_range': 1.0, 'lookback': 200}]
+    assert expand(Sweep('x', 'detect_fvg', {'lookback': 3})) == [{'lookback': 3}]
+
+
+def test_random_search_is_reproducible_and_bounded():
+    sweep = Sweep('r', 'detect_order_blocks', {'lookback': {'low': 10, 'high': 100},
+                                               'min_range': {'low': 0.01, 'high': 10.0, 'log': True}},
+                  'random', 30, 4)
+    combos = expand(sweep)
+    assert combos == expand(sweep)
+    assert all(isinstance(c['lookback'], int) and 10 <= c['lookback'] <= 100 for c in combos)
+    assert all(0.01 <= c['min_range'] <= 10.0 for c in combos)
+    choices = expand(Sweep('c', 'detect_fvg', {'lookback': [3, 5]}, 'random', 50, 0))
+    assert sorted(c['lookback'] for c in choices) == [3, 5]
+
+
+@pytest.mark.parametrize('spec', [
+    {'detector': 'detect_nothing'},
+    {'detector': 'count_signals'},
+    {'detector': 'detect_fvg', 'search': 'bayes'},
+    {'detector': 'detect_fvg', 'params': {'tol': [1]}},
+    {'detector': 'detect_multi_fvg', 'params': {'gaps': [[]]}},
+    {'detector': 'detect_fvg', 'search': 'random', 'samples': 0},
+    {'detector': 'detect_fvg', 'objective': 'sharpe'},
+    {'detector': 'detect_stop_hunts'},                       # sem zonas: objective padrão não vale
+    {'detector': 'detect_stop_hunts', 'objective': 'profit_factor'},
+])
+def test_invalid_sweeps_are_rejected(spec):
+    with pytest.raises(ValueError):
+        parse_sweep(spec)
+
+
+def test_repo_config_is_valid():
+    sweeps = load_sweeps()
+    assert sweeps
+    assert all(expand(s) for s in sweeps)
+    assert parse_sweep({'detector': 'detect_fvg'}).objective == 'expectancy'
+    assert parse_sweep({'detector': 'detect_stop_hunts', 'objective': 'signals'}).objective == 'signals'
+
+
+def test_default_objective_is_trade_expectancy(df):
+    table = run_sweeps(df, SWEEPS[:2], max_workers=1)
+    assert (table['objective'] == 'expectancy').all()
+    graph = DetectorGraph(df)
+    for sweep in SWEEPS[:2]:
+        for params in expand(sweep):
+            result = graph.get(sweep.detector, **params)
+            stats = simulate(df, zone_candidates(result, sweep.detector)).stats
+            row = table[(table['sweep'] == sweep.name) & (table['params'] == optimizer.format_params(params))]
+            assert row['score'].item() == pytest.approx(stats['expectancy'])
+    # a combinação com mais sinais não é, por isso, a melhor
+    assert (table['score'] != table['signals']).any()
+
+
+def test_profit_factor_objective(df):
+    sweep = Sweep('ob', 'detect_order_blocks', {'min_range': [0, 1.0]}, objective='profit_factor')
+    table = run_sweeps(df, [sweep], max_workers=1)
+    assert (table['objective'] == 'profit_factor').all()
+    assert table['score'].is_monotonic_decreasing
+
+
+def test_results_are_ranked(df):
+    table = run_sweeps(df, SWEEPS, max_workers=1)
+    assert (table['status'] == 'ok').all()
+    assert list(table['sweep'].unique()) == ['voids', 'ob', 'multi', 'hunts']
+    for _, group in table.groupby('sweep'):
+        assert list(group['rank']) == list(range(1, len(group) + 1))
+        assert group['score'].is_monotonic_decreasing
+    multi = table[table['sweep'] == 'multi']
+    assert multi['params'].tolist() == ['min_gaps=1', f'min_gaps={10**9}']
+    assert multi['signals'].tolist()[1] == 0
+
+
+def test_parallel_matches_serial(df):
+    serial = run_sweeps(df, SWEEPS, max_workers=1)
+    parallel = run_sweeps(df, SWEEPS, max_workers=2, batch_size=2)
+    cols = ['sweep', 'rank', 'params', 'signals']
+    assert parallel[cols].equals(serial[cols])
+
+
+def first_gap_index(result):
+    return result[0]['index'] if result else -1
+
+
+def test_custom_score(df):
+    table = run_sweeps(df, SWEEPS[:1], max_workers=1, score=first_gap_index)
+    assert (table['score'] != table['signals']).any()
+    assert table['score'].is_monotonic_decreasing
+    assert (table['objective'] == 'custom').all()
+
+
+def test_checkpoint_resumes_after_crash(df, tmp_path, monkeypatch):
+    path = tmp_path / 'sweeps.jsonl'
+    full = run_sweeps(df, SWEEPS, checkpoint=path, max_workers=1)
+    lines = path.read_text().splitlines()
+    assert len(lines) == len(full)
+    # queda no meio da escrita: 3 execuções perdidas e uma linha truncada
+    path.write_text('\n'.join(lines[:-3]) + '\n' + lines[-3][:20])
+
+    calls = []
+    evaluate = optimizer._evaluate_batch
+
+    def counting(graph, sweep, detector, param_sets, *args):
+        calls.extend(param_sets)
+        return evaluate(graph, sweep, detector, param_sets, *args)
+
+    monkeypatch.setattr(optimizer, '_evaluate_batch', counting)
+    resumed = run_sweeps(df, SWEEPS, checkpoint=path, max_workers=1)
+    assert len(calls) == 3
+    cols = ['sweep', 'rank', 'params', 'signals']
+    assert resumed[cols].equals(full[cols])
+    rows = optimizer.load_checkpoint(path)
+    assert len(rows) == len(full)
+
+    calls.clear()
+    run_sweeps(df, SWEEPS, checkpoint=path, max_workers=1)
+    assert calls == []
+    run_sweeps(df.iloc[:-1], SWEEPS[:1], checkpoint=path, max_workers=1)
+    assert len(calls) == 3    # outros dados: o checkpoint não vale
+
+
+def test_errors_are_recorded_and_ranked_last(df, tmp_path):
+    sweep = Sweep('bad', 'detect_order_blocks', {'lookback': [50, 'x']})
+    path = tmp_path / 'sweeps.jsonl'
+    table = run_sweeps(df, [sweep], checkpoint=path, max_workers=1)
+    assert table['status'].tolist() == ['ok', 'error']
+    assert table['rank'].isna().tolist() == [False, True]
+    assert 'TypeError' in table['error'].iloc[1]
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r['status'] for r in rows] == ['ok', 'error']
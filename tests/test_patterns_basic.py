@@ -5,6 +5,7 @@ import pytest
 from core.patterns import (
     detect_bos,
     detect_choch,
+    detect_choch_breaks,
     detect_fvg,
     detect_order_blocks,
     detect_liquidity_zones,
@@ -39,6 +40,22 @@ def test_detect_choch_down_then_up():
     df = pd.DataFrame({'open':[10,10,10],'high':[15,14,16],'low':[5,3,3],'close':[9,4,17]})
     assert detect_choch(df) is True
 
+def test_detect_choch_breaks_indices_and_directions():
+    df = pd.DataFrame({'open':[5,5,5],'high':[10,12,11],'low':[5,5,4],'close':[9,11,3]})
+    res = detect_choch_breaks(df)
+    assert res['choch'] is True
+    assert res['index'].tolist() == [1, 2]
+    assert res['direction'].tolist() == [1, -1]
+
+def test_detect_choch_breaks_match_prefix_scan(make_bars):
+    df = make_bars(7, 300, freq=None, tick=None)
+    res = detect_choch_breaks(df)
+    up = [i for i in range(1, len(df)) if df['close'].iat[i] > df['high'].iloc[:i].max()]
+    dn = [i for i in range(1, len(df)) if df['close'].iat[i] < df['low'].iloc[:i].min()]
+    assert res['index'][res['direction'] == 1].tolist() == up
+    assert res['index'][res['direction'] == -1].tolist() == dn
+    assert detect_choch(df) == (bool(up) and bool(dn))
+
 def test_detect_fvg_gaps():
     # Fair Value Gap requer 3 candles: idx 0->2 gap
     df_up = pd.DataFrame({
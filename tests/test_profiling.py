@@ -0,0 +1,100 @@
+# tests/test_profiling.py
+
+import json
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.batch import count_signals
+from backtest.engine import run_backtest_df
+from backtest.profiling import REPORT_COLUMNS, DetectorProfiler, output_nbytes
+from benchmarks.synthetic import synthetic_ohlc
+from core.config import DETECTORS_BY_LEVEL
+from core.graph import DetectorGraph
+
+
+@pytest.fixture
+def bars():
+    return synthetic_ohlc(2_000, seed=7)
+
+
+def all_detectors():
+    return [d for dets in DETECTORS_BY_LEVEL.values() for d in dets]
+
+
+def test_profiled_run_matches_plain_run(bars):
+    prof = DetectorProfiler()
+    profiled = run_backtest_df(bars, all_detectors(), profiler=prof)
+    plain = run_backtest_df(bars, all_detectors())
+    assert profiled.keys() == plain.keys()
+    for name in plain:
+        if isinstance(plain[name], pd.Index):
+            assert profiled[name].equals(plain[name])
+        else:
+            assert profiled[name] == plain[name], name
+
+
+def test_one_record_per_computed_node(bars):
+    prof = DetectorProfiler()
+    graph = DetectorGraph(bars, profiler=prof)
+    results = graph.run(all_detectors())
+    report = prof.report()
+    assert list(report.columns) == REPORT_COLUMNS
+    assert list(report['detector']) == [name for name, _ in graph.computed]
+    assert (report['wall_s'] >= 0).all() and (report['cpu_s'] >= 0).all()
+    assert (report['peak_mb'] >= 0).all()
+    signals = dict(zip(report['detector'], report['signals']))
+    for name, res in results.items():
+        assert signals[name] == count_signals(res)
+
+
+def test_dependencies_are_measured_separately(bars):
+    prof = DetectorProfiler(memory=False)
+    DetectorGraph(bars, profiler=prof).run(['detect_confluence_zones'])
+    names = list(prof.report()['detector'])
+    assert names[-1] == 'detect_confluence_zones'
+    assert {'detect_order_blocks', 'detect_fvg', 'detect_liquidity_zones'} <= set(names[:-1])
+    assert prof.report()['peak_mb'].isna().all()
+
+
+def test_peak_memory_tracks_allocations():
+    prof = DetectorProfiler()
+    prof.call('alloc', lambda n: np.ones(n), 1_000_000)
+    assert prof.records[0].peak_mb >= 7
+    assert prof.records[0].output_bytes == 8_000_000
+    assert not tracemalloc.is_tracing()
+
+
+def test_failed_call_is_still_recorded():
+    prof = DetectorProfiler(memory=False)
+    with pytest.raises(ZeroDivisionError):
+        prof.call('boom', lambda: 1 / 0)
+    assert [r.detector for r in prof.records] == ['boom']
+
+
+def test_summary_sorted_by_wall_time(bars):
+    prof = DetectorProfiler(memory=False)
+    run_backtest_df(bars, all_detectors(), profiler=prof)
+    summary = prof.summary()
+    assert summary['wall_s'].is_monotonic_decreasing
+    assert set(summary['detector']) == set(prof.report()['detector'])
+
+
+def test_chrome_trace_export(bars, tmp_path):
+    prof = DetectorProfiler()
+    run_backtest_df(bars, DETECTORS_BY_LEVEL['Básico'], profiler=prof)
+    path = tmp_path / 'trace.json'
+    prof.write_chrome_trace(str(path))
+    trace = json.loads(path.read_text())
+    events = trace['traceEvents']
+    assert len(events) == len(prof.records)
+    assert all(ev['ph'] == 'X' and ev['dur'] >= 0 for ev in events)
+    assert [ev['ts'] for ev in events] == sorted(ev['ts'] for ev in events)
+    assert {'cpu_s', 'signals', 'output_bytes', 'peak_mb'} <= set(events[0]['args'])
+
+
+def test_output_nbytes_handles_nested_results():
+    assert output_nbytes([{'zone': (1.0, 2.0), 'index': 3}]) > 0
+    assert output_nbytes(pd.Index([1, 2, 3])) > 0
@@ -0,0 +1,268 @@
+# tests/test_protocol.py
+
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_ohlc
+from core.config import DETECTORS_BY_LEVEL
+from live import protocol
+from live.server import SignalServer
+
+
+@pytest.fixture(scope='module')
+def bars():
+    return synthetic_ohlc(5_000, seed=2, volatility=2e-3)
+
+
+def decode_all(blob, chunk):
+    decoder = protocol.FrameDecoder()
+    frames = []
+    for i in range(0, len(blob), chunk):
+        frames += decoder.feed(blob[i:i + chunk])
+    assert decoder.pending == 0
+    return frames
+
+
+def test_bar_records_round_trip(bars):
+    records = protocol.bar_records(bars)
+    assert records.dtype.itemsize == 48
+    frame = protocol.records_frame(records)
+    pd.testing.assert_frame_equal(frame, bars, check_freq=False, check_names=False)
+
+
+@pytest.mark.parametrize('chunk', [7, 4096, 1 << 20])
+def test_decoder_handles_any_chunking(bars, chunk):
+    frames = protocol.encode_bars(bars, max_records=1000)
+    assert len(frames) == 5
+    out = decode_all(b''.join(frames) + protocol.encode_message({'type': 'ping'}), chunk)
+    assert [k for k, _ in out] == [protocol.KIND_BARS] * 5 + [protocol.KIND_MESSAGE]
+    records = np.concatenate([p for k, p in out if k == protocol.KIND_BARS])
+    assert np.array_equal(records, protocol.bar_records(bars))
+    assert out[-1][1] == {'type': 'ping'}
+
+
+def test_decoder_byte_by_byte(bars):
+    frame = protocol.encode_bars(bars.iloc[:3])[0]
+    decoder = protocol.FrameDecoder()
+    out = [f for b in frame for f in decoder.feed(bytes([b]))]
+    assert len(out) == 1 and decoder.pending == 0
+    assert np.array_equal(out[0][1], protocol.bar_records(bars.iloc[:3]))
+
+
+def test_ticks_round_trip():
+    times = pd.date_range('2024-01-02', periods=1000, freq='250ms', tz='UTC')
+    ticks = protocol.tick_records(times, np.linspace(100, 101, 1000), np.ones(1000))
+    (kind, payload), = decode_all(b''.join(protocol.encode_ticks(ticks)), 333)
+    assert kind == protocol.KIND_TICKS
+    assert np.array_equal(payload, ticks)
+
+
+def test_naive_index_is_utc(bars):
+    naive = bars.tz_localize(None)
+    assert np.array_equal(protocol.bar_records(naive), protocol.bar_records(bars))
+
+
+@pytest.mark.parametrize('corrupt', ['magic', 'version', 'kind', 'size'])
+def test_invalid_frames_are_rejected(bars, corrupt):
+    frame = bytearray(protocol.encode_bars(bars.iloc[:10])[0])
+    if corrupt == 'magic':
+        frame[0:2] = b'XX'
+    elif corrupt == 'version':
+        frame[2] = 99
+    elif corrupt == 'kind':
+        frame[3] = 42
+    else:
+        frame[4:8] = (11).to_bytes(4, 'little')
+    with pytest.raises(protocol.ProtocolError):
+        protocol.FrameDecoder().feed(bytes(frame))
+
+
+def test_oversized_frame_is_rejected():
+    header = protocol.HEADER.pack(protocol.MAGIC, protocol.VERSION, protocol.KIND_MESSAGE, 0,
+                                  protocol.MAX_FRAME_BYTES + 1)
+    with pytest.raises(protocol.ProtocolError):
+        protocol.FrameDecoder().feed(header)
+
+
+def test_codec_throughput(bars):
+    records = protocol.bar_records(synthetic_ohlc(500_000))
+    t0 = time.perf_counter()
+    blob = b''.join(protocol.encode_records(protocol.KIND_BARS, records))
+    frames = decode_all(blob, 1 << 16)
+    elapsed = time.perf_counter() - t0
+    assert sum(len(p) for _, p in frames) == len(records)
+    assert len(records) / elapsed > 1_000_000
+
+
+def run_server(server_kwargs, body):
+    async def main():
+        async with SignalServer(port=0, **server_kwargs) as server:
+            return await body(server)
+    return asyncio.run(main())
+
+
+async def wait_for(predicate, timeout=20.0):
+    async def poll():
+        while not predicate():
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_server_ingests_binary_frames_fast():
+    records = protocol.bar_records(synthetic_ohlc(200_000))
+
+    async def body(server):
+        _, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        t0 = time.perf_counter()
+        for frame in protocol.encode_records(protocol.KIND_BARS, records, max_records=8192):
+            writer.write(frame)
+        await writer.drain()
+        await wait_for(lambda: server.counters['bars'] == len(records))
+        elapsed = time.perf_counter() - t0
+        writer.close()
+        return elapsed
+
+    elapsed = run_server({'detectors': []}, body)
+    assert len(records) / elapsed > 100_000
+
+
+def test_binary_subscriber_gets_same_signals_as_json(bars):
+    detectors = DETECTORS_BY_LEVEL['Básico']
+
+    async def body(server):
+        json_r, json_w = await asyncio.open_connection('127.0.0.1', server.port)
+        json_w.write(b'{"type":"hello","role":"subscriber"}\n')
+        bin_r, bin_w = await asyncio.open_connection('127.0.0.1', server.port)
+        bin_w.write(protocol.encode_message({'type': 'hello', 'role': 'subscriber'}))
+        _, feed_w = await asyncio.open_connection('127.0.0.1', server.port)
+        feed_w.write(protocol.encode_message({'type': 'hello', 'role': 'feed'}))
+        await wait_for(lambda: len(server.clients) == 3
+                       and sum(c.binary for c in server.clients.values()) == 2
+                       and sum(not c.subscribed for c in server.clients.values()) == 1)
+        for frame in protocol.encode_bars(bars, max_records=512):
+            feed_w.write(frame)
+        await feed_w.drain()
+        await wait_for(lambda: server.counters['bars'] == len(bars))
+        last = server._seq
+        json_msgs, bin_msgs = [], []
+        while not json_msgs or json_msgs[-1]['seq'] != last:
+            json_msgs.append(json.loads(await json_r.readline()))
+        while not bin_msgs or bin_msgs[-1]['seq'] != last:
+            kind, msg = await protocol.read_frame(bin_r)
+            assert kind == protocol.KIND_MESSAGE
+            bin_msgs.append(msg)
+        for w in (json_w, bin_w, feed_w):
+            w.close()
+        return json_msgs, bin_msgs
+
+    json_msgs, bin_msgs = run_server({'detectors': detectors}, body)
+    assert json_msgs and json_msgs == bin_msgs
+
+
+def test_large_frame_does_not_overflow_a_reading_subscriber(bars):
+    # um frame de 4000 candles gera centenas de mensagens; com a fila de 100 o
+    # assinante só recebe todas se o servidor ceder o loop durante o frame
+    async def body(server):
+        sub_r, sub_w = await asyncio.open_connection('127.0.0.1', server.port)
+        sub_w.write(protocol.encode_message({'type': 'hello', 'role': 'subscriber'}))
+        _, feed_w = await asyncio.open_connection('127.0.0.1', server.port)
+        feed_w.write(protocol.encode_message({'type': 'hello', 'role': 'feed'}))
+        await wait_for(lambda: len(server.clients) == 2
+                       and sum(c.subscribed for c in server.clients.values()) == 1)
+        received = []
+
+        async def read():
+            while True:
+                kind, msg = await protocol.read_frame(sub_r)
+                received.append(msg['seq'])
+
+        reader = asyncio.ensure_future(read())
+        feed_w.write(protocol.encode_bars(bars.iloc[:4000], max_records=4000)[0])
+        await feed_w.drain()
+        await wait_for(lambda: server.counters['bars'] == 4000)
+        await wait_for(lambda: len(received) + server.counters['dropped'] >= server._seq)
+        reader.cancel()
+        for w in (sub_w, feed_w):
+            w.close()
+        return received, server._seq, server.counters['dropped']
+
+    received, sent, dropped = run_server(
+        {'detectors': DETECTORS_BY_LEVEL['Básico'] + DETECTORS_BY_LEVEL['Avançado'], 'queue_size': 100}, body)
+    assert sent > 300
+    assert dropped == 0
+    assert received == list(range(1, sent + 1))
+
+
+def test_ticks_are_aggregated_into_bars():
+    times = pd.date_range('2024-01-02 10:00', periods=600, freq='1s', tz='UTC')   # 10 minutos
+    prices = 100 + np.sin(np.arange(600) / 20)
+    ticks = protocol.tick_records(times, prices, np.ones(600))
+
+    async def body(server):
+        _, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        for frame in protocol.encode_ticks(ticks, max_records=77):   # frames cortam os minutos
+            writer.write(frame)
+        await writer.drain()
+        await wait_for(lambda: server.counters['ticks'] == 600)
+        writer.close()
+        return server.counters['bars'], server.ticks.current
+
+    n_bars, current = run_server({'detectors': []}, body)
+    assert n_bars == 9                     # o 10º minuto continua em formação
+    assert current['time'] == pd.Timestamp('2024-01-02 10:09', tz='UTC')
+    assert current['volume'] == 60
+    assert current['high'] == prices[540:].max() and current['close'] == prices[-1]
+
+
+def test_invalid_frame_closes_connection():
+    async def body(server):
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        writer.write(protocol.MAGIC + b'\x07' + b'\x00' * 9)
+        await writer.drain()
+        data = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return data, server.metrics()
+
+    data, metrics = run_server({'detectors': []}, body)
+    assert data == b''
+    assert metrics['bad_messages'] == 1
+
+
+def test_blocking_iter_frames(bars):
+    a, b = socket.socketpair()
+    frames = protocol.encode_bars(bars, max_records=999)
+
+    def send():
+        for f in frames:
+            a.sendall(f)
+        a.close()
+
+    threading.Thread(target=send).start()
+    got = np.concatenate([p for _, p in protocol.iter_frames(b, chunk_size=1000)])
+    b.close()
+    assert np.array_equal(got, protocol.bar_records(bars))
+
+
+def test_invalid_records_are_skipped(bars):
+    detectors = DETECTORS_BY_LEVEL['Básico'] + DETECTORS_BY_LEVEL['Avançado']
+    clean, dirty = SignalServer(detectors), SignalServer(detectors)
+    records = protocol.bar_records(bars.iloc[:300])
+    broken = records.copy()
+    broken['high'][100] = np.nan
+    broken['time'][200] = np.iinfo(np.int64).min
+    valid = np.ones(len(records), dtype=bool)
+    valid[[100, 200]] = False
+    clean.ingest_records(records[valid])
+    dirty.ingest_records(broken)
+    assert dirty.counters['bad_messages'] == 2
+    assert dirty.counters['bars'] == clean.counters['bars'] == 298
+    assert dirty._seq == clean._seq > 0
+    for name, stream in dirty.pipeline.streams.items():
+        assert stream.n == clean.pipeline.streams[name].n == 298, name
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.data_provider import get_data
+from data.resample import BarAggregator, MultiTimeframe, resample_ohlc, timeframe_minutes
+from data.store import ParquetStore
+
+RULES = {'M5': '5min', 'M15': '15min', 'H1': '1h', 'D1': '1D'}
+
+
+@pytest.fixture
+def m1(make_bars):
+    bars = make_bars(5, 3 * 1440, start='2024-03-29 22:00', step=0.05, jitter=0.02, wick=0.01,
+                     tick=None, volume=True)
+    keep = np.random.default_rng(5).random(len(bars)) > 0.1   # buracos, como em fins de semana e feriados
+    return bars[keep]
+
+
+def reference(df, tf):
+    agg = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    out = df.resample(RULES[tf]).agg(agg)
+    return out[df['open'].resample(RULES[tf]).count() > 0]
+
+
+def test_timeframe_minutes():
+    assert timeframe_minutes('M15') == 15
+    assert timeframe_minutes('H4') == 240
+    assert timeframe_minutes('M3') == 3
+    with pytest.raises(ValueError):
+        timeframe_minutes('W1')
+
+
+@pytest.mark.parametrize('tf', list(RULES))
+def test_resample_matches_pandas(m1, tf):
+    pd.testing.assert_frame_equal(resample_ohlc(m1, tf), reference(m1, tf), check_freq=False)
+
+
+def test_multi_timeframe_lru(m1):
+    mtf = MultiTimeframe(m1, maxsize=2)
+    assert mtf.get('M1') is m1
+    h1 = mtf.get('H1')
+    assert mtf.get('H1') is h1
+    mtf.get('M5')
+    mtf.get('D1')                     # despeja H1 (menos usado)
+    assert mtf.cached() == ['M5', 'D1']
+    assert (mtf.hits, mtf.misses) == (1, 3)
+    with pytest.raises(ValueError):
+        MultiTimeframe(resample_ohlc(m1, 'M5'), base_timeframe='M5').get('M7')
+
+
+def test_append_updates_cached_timeframes_incrementally(m1):
+    cut = len(m1) - 700
+    mtf = MultiTimeframe(m1.iloc[:cut])
+    for tf in ('M15', 'H1', 'D1'):
+        mtf.get(tf)
+    # reescreve o último candle (em formação) e acrescenta os demais em lotes
+    partial = m1.iloc[[cut - 1]].copy()
+    partial['close'] += 1.0
+    mtf.append(partial)
+    for start in range(cut - 1, len(m1), 97):
+        mtf.append(m1.iloc[start:start + 97])
+    for tf in ('M15', 'H1', 'D1'):
+        pd.testing.assert_frame_equal(mtf.get(tf), reference(m1, tf), check_freq=False)
+    pd.testing.assert_frame_equal(mtf.base, m1)
+
+
+def test_append_does_not_copy_the_series(m1):
+    cut = len(m1) - 300
+    mtf = MultiTimeframe(m1.iloc[:cut])
+    mtf.get('H1')
+    mtf.append(m1.iloc[cut:cut + 1])
+    base, h1 = mtf.base, mtf.get('H1')
+    for i in range(cut + 1, len(m1)):
+        mtf.append(m1.iloc[i:i + 1])
+        # mesmos arrays (com folga) em vez de um concat da série inteira a cada candle
+        assert np.shares_memory(mtf.base['close'].to_numpy(), base['close'].to_numpy())
+        assert np.shares_memory(mtf.get('H1')['close'].to_numpy(), h1['close'].to_numpy())
+    pd.testing.assert_frame_equal(mtf.get('H1'), reference(m1, 'H1'), check_freq=False)
+    pd.testing.assert_frame_equal(mtf.base, m1)
+
+
+def test_append_bars_without_extra_columns(m1):
+    cut = len(m1) - 120
+    mtf = MultiTimeframe(m1.iloc[:cut])
+    mtf.get('H1')
+    mtf.append(m1.iloc[cut:][['open', 'high', 'low', 'close']])
+    assert mtf.base['volume'].iloc[cut:].isna().all()
+    assert mtf.base['volume'].iloc[:cut].tolist() == m1['volume'].iloc[:cut].tolist()
+    ohlc = ['open', 'high', 'low', 'close']
+    pd.testing.assert_frame_equal(mtf.get('H1')[ohlc], reference(m1, 'H1')[ohlc], check_freq=False)
+    with pytest.raises(ValueError):
+        mtf.append(m1.iloc[-5:][['open', 'high', 'close']])
+
+
+def test_appended_frames_keep_a_valid_index(m1):
+    cut = len(m1) - 50
+    mtf = MultiTimeframe(m1.iloc[:cut])
+    mtf.append(m1.iloc[cut:cut + 1])
+    before = mtf.base
+    assert before.index.is_monotonic_increasing and before.index[-1] in before.index
+    mtf.append(m1.iloc[cut + 1:])
+    # o índice de um frame já devolvido não muda com appends posteriores
+    assert len(before) == cut + 1 and before.index[-1] == m1.index[cut]
+    assert before.index.get_loc(m1.index[cut]) == cut
+    pd.testing.assert_frame_equal(mtf.base, m1)
+
+
+def test_bar_aggregator_matches_resample(m1):
+    agg = BarAggregator('M15')
+    closed = []
+    for t, row in m1.iterrows():
+        bar = agg.update(t, row['open'], row['high'], row['low'], row['close'], row['volume'])
+        if bar is not None:
+            closed.append(bar)
+    closed.append(agg.current)
+    out = pd.DataFrame(closed).set_index('time')
+    out.index.name = None
+    pd.testing.assert_frame_equal(out, reference(m1, 'M15'), check_freq=False)
+
+
+def test_get_data_resamples_from_m1_store(tmp_path, m1):
+    store = ParquetStore(tmp_path)
+    store.write('BTCUSD', 'M1', m1)
+    df = get_data(str(tmp_path), 'BTCUSD', 'H1', '2024-03-30', '2024-03-31 23:59')
+    expected = reference(m1.loc['2024-03-30':'2024-03-31'], 'H1')[['open', 'high', 'low', 'close']]
+    pd.testing.assert_frame_equal(df, expected, check_freq=False, check_names=False)
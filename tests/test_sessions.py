@@ -0,0 +1,139 @@
+# tests/test_sessions.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import patterns
+from core.sessions import (
+    KILLZONES,
+    Session,
+    filter_events,
+    in_sessions,
+    killzone_mask,
+    session_labels,
+    session_mask,
+    session_masks,
+)
+
+
+def legacy_killzones(index, sessions=[(8, 10), (13, 15)]):
+    return [ts for ts in index if any(start <= ts.hour < end for start, end in sessions)]
+
+
+def utc_hours(index, mask):
+    return sorted(set(index[mask].tz_convert('UTC').hour))
+
+
+@pytest.fixture
+def bars(make_bars):
+    return make_bars(0, 24 * 60 * 3, '7min', start='2024-01-01')
+
+
+@pytest.mark.parametrize('sessions', [[(8, 10), (13, 15)], [(0, 3)], [(7.5, 9)], [(20, 24), (1, 2)]])
+@pytest.mark.parametrize('tz', ['UTC', None, 'America/Sao_Paulo'])
+def test_hour_tuples_match_legacy_loop(bars, sessions, tz):
+    index = bars.index if tz == 'UTC' else (bars.index.tz_localize(None) if tz is None
+                                            else bars.index.tz_convert(tz))
+    expected = legacy_killzones(index, sessions)
+    assert list(index[killzone_mask(index, sessions)]) == expected
+
+
+@pytest.mark.parametrize('sessions', [[(8, 8)], [(7.5, 8)], [(0, 0), (24, 24)]])
+def test_empty_hour_tuples_match_nothing(bars, sessions):
+    assert legacy_killzones(bars.index, sessions) == []
+    assert not killzone_mask(bars.index, sessions).any()
+    assert not any(in_sessions(ts, sessions) for ts in bars.index[:300])
+
+
+def test_hour_tuple_wraps_past_midnight(bars):
+    mask = killzone_mask(bars.index, [(22, 2)])
+    assert utc_hours(bars.index, mask) == [0, 1, 22, 23]
+    assert [in_sessions(ts, [(22, 2)]) for ts in bars.index] == mask.tolist()
+
+
+def test_detect_killzones_returns_index_or_mask(bars):
+    kills = patterns.detect_killzones(bars)
+    assert isinstance(kills, pd.DatetimeIndex)
+    assert list(kills) == legacy_killzones(bars.index)
+    mask = patterns.detect_killzones(bars, as_mask=True)
+    assert mask.dtype == bool and len(mask) == len(bars)
+    assert bars.index[mask].equals(kills)
+
+
+def test_detect_killzones_requires_datetime_index():
+    with pytest.raises(ValueError):
+        patterns.detect_killzones(pd.DataFrame({'close': [1.0, 2.0]}))
+
+
+def test_killzones_follow_daylight_saving():
+    winter = pd.date_range('2024-01-15', periods=24 * 60, freq='min', tz='UTC')
+    summer = pd.date_range('2024-07-15', periods=24 * 60, freq='min', tz='UTC')
+    assert utc_hours(winter, session_mask(winter, 'london_open')) == [8, 9]
+    assert utc_hours(summer, session_mask(summer, 'london_open')) == [7, 8]
+    assert utc_hours(winter, session_mask(winter, 'new_york_open')) == [13, 14]
+    assert utc_hours(summer, session_mask(summer, 'new_york_open')) == [12, 13]
+    # no inverno as killzones com fuso coincidem com as faixas UTC legadas
+    assert np.array_equal(killzone_mask(winter, list(KILLZONES)), killzone_mask(winter))
+
+
+def test_dst_transition_week_uses_local_clock():
+    # EUA mudam de horário em 10/03/2024, Reino Unido só em 31/03
+    idx = pd.date_range('2024-03-08 12:00', '2024-03-11 16:00', freq='h', tz='UTC')
+    ny = idx[session_mask(idx, 'new_york_open')]
+    assert [ts.hour for ts in ny if ts.day == 8] == [13, 14]
+    assert [ts.hour for ts in ny if ts.day == 11] == [12, 13]
+
+
+def test_naive_index_is_utc():
+    aware = pd.date_range('2024-07-01', periods=2000, freq='5min', tz='UTC')
+    naive = aware.tz_localize(None)
+    assert np.array_equal(session_mask(naive, 'london'), session_mask(aware, 'london'))
+
+
+def test_non_nanosecond_index():
+    idx = pd.date_range('2024-07-01', periods=2000, freq='5min', tz='UTC')
+    coarse = idx.as_unit('s')
+    for name in ('asia', 'new_york_open'):
+        assert np.array_equal(session_mask(coarse, name), session_mask(idx, name))
+
+
+def test_session_across_midnight_and_weekdays():
+    idx = pd.date_range('2024-01-05', periods=4 * 24, freq='h', tz='UTC')  # sexta a segunda
+    overnight = Session('overnight', 'UTC', '22:00', '02:00')
+    assert sorted(set(idx[session_mask(idx, overnight)].hour)) == [0, 1, 22, 23]
+    weekdays = Session('weekdays', 'UTC', '00:00', '00:00', weekdays=(0, 1, 2, 3, 4))
+    assert set(idx[session_mask(idx, weekdays)].dayofweek) == {0, 4}
+
+
+def test_session_labels_priority_and_missing():
+    idx = pd.date_range('2024-01-15', periods=24, freq='h', tz='UTC')
+    labels = session_labels(idx, ['new_york', 'london'])
+    masks = session_masks(idx, ['london', 'new_york'])
+    overlap = masks['london'] & masks['new_york']
+    assert overlap.any()
+    assert (labels[overlap] == 'new_york').all()
+    assert (labels[masks['london'] & ~masks['new_york']] == 'london').all()
+    outside = ~(masks['london'] | masks['new_york'])
+    assert pd.isna(labels[outside]).all()
+
+
+def test_scalar_check_matches_vectorized():
+    idx = pd.date_range('2024-03-01', periods=3000, freq='37min', tz='UTC')
+    sessions = ['london_open', (13, 15), Session('x', 'Asia/Tokyo', '23:30', '01:15')]
+    mask = killzone_mask(idx, sessions)
+    assert [in_sessions(ts, sessions) for ts in idx] == mask.tolist()
+
+
+def test_unknown_session_name():
+    with pytest.raises(ValueError):
+        session_mask(pd.date_range('2024-01-01', periods=3, freq='h'), 'sydney')
+
+
+def test_filter_events_by_session(bars):
+    mask = patterns.detect_killzones(bars, as_mask=True)
+    table = patterns.detect_fvg(bars, as_table=True)
+    events = patterns.detect_fvg(bars)
+    filtered = filter_events(table, mask)
+    assert mask[filtered['index']].all()
+    assert filtered['index'].tolist() == [e['index'] for e in filter_events(events, mask)]
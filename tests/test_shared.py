@@ -0,0 +1,68 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import patterns
+from core.config import DETECTORS_BY_LEVEL
+from core.shared import SharedOHLC, attach_arrays, attach_frame, detach
+from backtest.batch import run_detectors_parallel
+
+
+@pytest.fixture
+def bars(make_bars):
+    return make_bars(11, 500, 'min', start='2025-03-01')
+
+
+def test_attached_views_are_zero_copy_and_read_only(bars):
+    with SharedOHLC(bars) as shm:
+        arrays = attach_arrays(shm.spec)
+        frame = attach_frame(shm.spec)
+        assert np.shares_memory(frame['high'].to_numpy(), arrays.high)
+        assert not arrays.close.flags.writeable
+        with pytest.raises(ValueError):
+            arrays.close[0] = 0.0
+        pd.testing.assert_frame_equal(frame, bars[['open', 'high', 'low', 'close']], check_freq=False)
+        del arrays, frame
+        detach(shm.spec)
+
+
+def test_detectors_accept_shared_frame(bars):
+    with SharedOHLC(bars) as shm:
+        frame = attach_frame(shm.spec)
+        assert patterns.detect_fvg(frame) == patterns.detect_fvg(bars)
+        assert list(patterns.detect_killzones(frame)) == list(patterns.detect_killzones(bars))
+        assert patterns.detect_choch(attach_arrays(shm.spec)) == patterns.detect_choch(bars)
+        del frame
+        detach(shm.spec)
+
+
+def test_run_detectors_parallel_matches_serial(bars):
+    detectors = [d for dets in DETECTORS_BY_LEVEL.values() for d in dets]
+    res = run_detectors_parallel(bars, detectors, max_workers=3)
+    assert list(res) == [d.__name__ for d in detectors]
+    for det in detectors:
+        expected = det(bars)
+        if isinstance(expected, pd.Index):
+            assert list(res[det.__name__]) == list(expected)
+        else:
+            assert res[det.__name__] == expected, det.__name__
+
+
+@pytest.mark.parametrize('broken', ['missing', 'dtype'])
+def test_failed_copy_releases_the_block(bars, monkeypatch, broken):
+    created = []
+
+    class Recording(shared_memory.SharedMemory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self.name)
+
+    monkeypatch.setattr('core.shared.shared_memory.SharedMemory', Recording)
+    df = bars.drop(columns='close') if broken == 'missing' else bars.assign(close='x')
+    with pytest.raises((KeyError, ValueError)):
+        SharedOHLC(df)
+    assert len(created) == 1
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=created[0])
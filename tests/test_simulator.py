@@ -0,0 +1,218 @@
+# tests/test_simulator.py
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_ohlc
+from core import patterns
+from core.kernels import ohlc_arrays
+from trade.simulator import (
+    LONG, SHORT, REASONS, TouchIndex, bos_direction, breakout_candidates, make_candidates,
+    simulate, with_structure, zone_candidates,
+)
+
+
+@pytest.fixture(scope='module')
+def df():
+    return synthetic_ohlc(4_000, seed=21, volatility=2e-3)
+
+
+def bars(rows):
+    """[(open, high, low, close), ...] -> DataFrame com índice de minutos."""
+    index = pd.date_range('2024-01-02', periods=len(rows), freq='1min')
+    return pd.DataFrame(rows, columns=['open', 'high', 'low', 'close'], index=index)
+
+
+@pytest.mark.parametrize('n, block', [(1, 4), (37, 4), (1000, 32), (1000, 7), (4096, 64)])
+def test_touch_index_matches_brute_force(n, block):
+    rng = np.random.default_rng(n + block)
+    values = rng.normal(size=n).cumsum()
+    values[rng.integers(n, size=n // 50)] = np.nan
+    m = 2_000
+    start = rng.integers(-2, n + 2, size=m)
+    end = start + rng.integers(0, n, size=m)
+    level = rng.normal(size=m) * 3 + values[np.clip(start, 0, n - 1)]
+    level[::7] = np.inf
+    got = TouchIndex(values, block).first(start, level, end)
+    for s, e, lv, g in zip(start, end, level, got):
+        window = np.flatnonzero(values[max(s, 0):min(e, n)] >= lv) if s >= 0 else []
+        assert g == (max(s, 0) + window[0] if len(window) else -1)
+
+
+def reference(df, cand, order, entry_window, max_bars, cancel_at_target=True):
+    """Simulação candle a candle de um candidato, com as convenções de simulate."""
+    a = ohlc_arrays(df)
+    n = len(a)
+    s, side, entry, stop, target = cand.item()
+
+    def touched(j, level, rising):
+        return a.high[j] >= level if rising else a.low[j] <= level
+
+    def price(j, level, rising, gap):
+        if not gap:
+            return level
+        return max(level, a.open[j]) if rising else min(level, a.open[j])
+
+    long = side == LONG
+    if order == 'market':
+        if s + 1 >= n:
+            return 'unfilled', -1, np.nan, -1, np.nan
+        f, px = s + 1, a.open[s + 1]
+    else:
+        f = None
+        for j in range(s + 1, min(s + 1 + entry_window, n)):
+            if cancel_at_target and touched(j, target, long) and not touched(j, entry, not long):
+                return 'cancelled', -1, np.nan, -1, np.nan
+            if touched(j, entry, not long):
+                f, px = j, price(j, entry, not long, True)
+                break
+        if f is None:
+            return 'unfilled', -1, np.nan, -1, np.nan
+    last = n - 1 if max_bars is None else min(f + max_bars, n - 1)
+    for j in range(f, last + 1):
+        gap = j > f or order == 'market'
+        if touched(j, stop, not long):
+            if not gap:
+                # fill de ordem limitada já além do stop: sai no preço da entrada
+                return 'stop', f, px, j, min(stop, px) if long else max(stop, px)
+            return 'stop', f, px, j, price(j, stop, not long, gap)
+        if (j > f or order == 'market') and touched(j, target, long):
+            return 'target', f, px, j, price(j, target, long, gap)
+    reason = 'timeout' if max_bars is not None and f + max_bars <= n - 1 else 'end'
+    return reason, f, px, last, a.close[last]
+
+
+@pytest.mark.parametrize('order, entry_window, max_bars', [
+    ('limit', 20, 200), ('limit', 5, 30), ('limit', 50, None), ('market', 0, 100), ('market', 0, None),
+])
+def test_simulate_matches_bar_by_bar_reference(df, order, entry_window, max_bars):
+    cand = zone_candidates(patterns.detect_fvg(df, as_table=True), 'detect_fvg', rr=1.5)
+    if order == 'market':
+        cand = breakout_candidates(df, rr=1.5)
+    res = simulate(df, cand, order=order, entry_window=entry_window, max_bars=max_bars)
+    trades = res.trades
+    assert len(trades) == len(cand)
+    for k in np.random.default_rng(0).choice(len(cand), size=min(400, len(cand)), replace=False):
+        reason, f, px, x, xp = reference(df, cand[k], order, entry_window, max_bars)
+        row = trades.iloc[k]
+        assert row['reason'] == reason, k
+        assert row['entry_bar'] == f and row['exit_bar'] == x
+        np.testing.assert_allclose([row['entry_price'], row['exit_price']], [px, xp], equal_nan=True)
+
+
+def test_long_trade_outcomes():
+    df = bars([
+        (100, 101, 99, 100),       # 0 sinal
+        (100, 100.5, 98, 99),      # 1 toca a entrada 99 -> entra
+        (99, 101, 97.9, 100.5),    # 2 toca 101 e 97.9 no mesmo candle
+        (100.5, 103.5, 100, 103),  # 3 alvo 103
+        (103, 104, 102, 103),
+    ])
+    cand = make_candidates([0, 0, 0, 0], LONG, [99, 99, 99, 97.5], [97, 98.6, 97.9, 96], [103, 103, 101, 100.4])
+    trades = simulate(df, cand, max_bars=10).trades
+    assert trades['reason'].tolist() == ['target', 'stop', 'stop', 'cancelled']
+    first = trades.iloc[0]
+    assert (first['entry_bar'], first['exit_bar'], first['bars']) == (1, 3, 2)
+    assert first['pnl'] == 4 and first['r'] == 2
+    # no candle da entrada o stop já vale
+    assert (trades.iloc[1]['exit_bar'], trades.iloc[1]['exit_price']) == (1, 98.6)
+    # stop e alvo no mesmo candle contam como stop
+    assert (trades.iloc[2]['exit_bar'], trades.iloc[2]['exit_price']) == (2, 97.9)
+    # o último sobe até o alvo (candle 1) sem tocar a entrada: cancelado
+    assert trades.iloc[3]['entry_bar'] == -1
+
+
+def test_gaps_fill_at_open_and_short_side():
+    df = bars([
+        (100, 100, 99, 99.5),    # 0 sinal
+        (102, 102.5, 101.5, 102),  # 1 abre acima da entrada 101 -> vende na abertura 102
+        (102, 102.2, 101, 101.5),
+        (106, 107, 105, 106),    # 3 gap acima do stop 104 -> sai na abertura 106
+    ])
+    cand = make_candidates(0, SHORT, 101, 104, 95)
+    row = simulate(df, cand).trades.iloc[0]
+    assert row['reason'] == 'stop'
+    assert (row['entry_price'], row['exit_price']) == (102, 106)
+    assert row['pnl'] == -4 and row['r'] == pytest.approx(-2)
+
+
+@pytest.mark.parametrize('side, entry, stop, target, candle', [
+    (LONG, 100, 95, 110, (93, 94, 92, 93.5)),       # abre abaixo do stop: compra a 93
+    (SHORT, 100, 105, 90, (107, 108, 106, 106.5)),  # abre acima do stop: vende a 107
+])
+def test_limit_fill_gapping_through_stop_is_not_a_profit(side, entry, stop, target, candle):
+    df = bars([(100, 100.5, 99.5, 100), candle, candle])
+    row = simulate(df, make_candidates(0, side, entry, stop, target)).trades.iloc[0]
+    assert row['reason'] == 'stop' and row['exit_bar'] == row['entry_bar'] == 1
+    assert row['entry_price'] == candle[0]
+    assert row['exit_price'] == candle[0] and row['pnl'] == 0
+
+
+def test_timeout_end_unfilled_invalid():
+    df = bars([(100, 100.5, 99.5, 100)] * 6)
+    cand = make_candidates([0, 0, 0, 0, 9, 0], LONG,
+                           [100, 100, 90, 100, 100, 100], [99, 99, 89, 99, 99, 101], [102, 102, 101, 102, 102, 102])
+    trades = simulate(df, cand, max_bars=2, entry_window=3).trades
+    trades_end = simulate(df, cand[:1], max_bars=None).trades
+    assert trades['reason'].tolist() == ['timeout', 'timeout', 'unfilled', 'timeout', 'invalid', 'invalid']
+    assert trades.iloc[0]['exit_bar'] == 3
+    assert trades_end['reason'].tolist() == ['end']
+    assert trades_end.iloc[0]['exit_bar'] == 5
+    assert trades['pnl'].isna().tolist() == [False, False, True, False, True, True]
+    assert pd.isna(trades.iloc[2]['entry_time']) and trades.iloc[0]['entry_time'] == df.index[1]
+
+
+def test_equity_and_drawdown(df):
+    cand = zone_candidates(patterns.detect_order_blocks(df, lookback=4_000, as_table=True), 'detect_order_blocks')
+    res = simulate(df, cand, size=2.0, fee=0.5, initial_capital=1_000)
+    done = res.trades[res.trades['exit_bar'] >= 0]
+    assert len(done) > 0
+    assert res.equity.iloc[-1] == pytest.approx(1_000 + done['pnl'].sum())
+    np.testing.assert_allclose(done['pnl'], 2 * done['side'] * (done['exit_price'] - done['entry_price']) - 0.5)
+    expected = res.equity - res.equity.cummax()
+    pd.testing.assert_series_equal(res.drawdown, expected, check_names=False)
+    stats = res.stats
+    assert stats['trades'] == len(done)
+    assert stats['max_drawdown'] == pytest.approx(expected.min())
+    assert stats['win_rate'] == pytest.approx((done['pnl'] > 0).mean())
+    assert sum(stats['reasons'].values()) == len(cand)
+    assert set(stats['reasons']) == set(REASONS)
+
+
+def test_zone_candidates_respect_confirmation(df):
+    table = patterns.detect_fvg(df, as_table=True)
+    cand = zone_candidates(table, 'detect_fvg', rr=3.0)
+    assert np.array_equal(cand['signal'], table['index'] + 2)
+    legacy = zone_candidates(patterns.detect_fvg(df), 'detect_fvg', rr=3.0)
+    assert np.array_equal(cand, legacy)
+    long = cand['side'] == LONG
+    assert np.array_equal(cand['entry'][long], table['upper'][long])
+    np.testing.assert_allclose(cand['target'] - cand['entry'], 3 * (cand['entry'] - cand['stop']))
+    with pytest.raises(ValueError):
+        zone_candidates(table)
+    assert np.array_equal(zone_candidates(table, delay=0)['signal'], table['index'])
+
+
+def test_structure_direction(df):
+    direction = bos_direction(df)
+    breaks = breakout_candidates(df)
+    assert np.array_equal(direction[breaks['signal']], breaks['side'])
+    assert direction[:breaks['signal'][0]].tolist() == [0] * breaks['signal'][0]
+    cand = zone_candidates(patterns.detect_fvg(df, as_table=True), 'detect_fvg')
+    aligned = with_structure(cand, direction)
+    assert 0 < len(aligned) < len(cand)
+    assert (direction[aligned['signal']] == aligned['side']).all()
+
+
+def test_millions_of_candidates_in_seconds():
+    big = synthetic_ohlc(500_000, seed=4)
+    cand = zone_candidates(patterns.detect_fvg(big, as_table=True), 'detect_fvg')
+    cand = np.concatenate([cand] * (2_000_000 // len(cand) + 1))[:2_000_000]
+    t0 = time.perf_counter()
+    res = simulate(big, cand)
+    elapsed = time.perf_counter() - t0
+    assert res.stats['candidates'] == 2_000_000
+    assert elapsed < 20
@@ -0,0 +1,92 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from data.data_provider import get_data
+from data.store import ParquetStore, normalize_ohlc
+
+
+@pytest.fixture
+def minutes(make_bars):
+    n = len(pd.date_range('2024-01-25', '2024-03-05', freq='min', inclusive='left'))
+    return make_bars(3, n, start='2024-01-25', step=0.1, tick=None, volume=True)
+
+
+@pytest.fixture
+def store(tmp_path, minutes):
+    s = ParquetStore(tmp_path, row_group_size=5_000)
+    s.write('BTCUSD', 'M1', minutes)
+    return s
+
+
+def test_write_partitions_by_month(store):
+    assert store.symbols() == ['BTCUSD']
+    assert store.timeframes('BTCUSD') == ['M1']
+    assert store.months('BTCUSD', 'M1') == ['2024-01', '2024-02', '2024-03']
+    meta = pq.ParquetFile(store.partition_path('BTCUSD', 'M1', '2024-02')).metadata
+    assert meta.num_row_groups > 1
+    assert 'volume' in meta.schema.names
+
+
+def test_default_row_groups_split_a_month(tmp_path, make_bars):
+    month = make_bars(1, 29 * 1440, start='2024-02-01', step=0.1)
+    store = ParquetStore(tmp_path)
+    store.write('BTCUSD', 'M1', month)
+    parquet = pq.ParquetFile(store.partition_path('BTCUSD', 'M1', '2024-02'))
+    assert parquet.num_row_groups > 1
+    # cada row group cobre no máximo um dia: a leitura de um dia cai em poucos grupos
+    col = parquet.schema_arrow.get_field_index('time')
+    days = [parquet.metadata.row_group(i).column(col).statistics for i in range(parquet.num_row_groups)]
+    assert all(s.max - s.min < pd.Timedelta('1D') for s in days)
+    df = store.read('BTCUSD', 'M1', '2024-02-10', '2024-02-10 23:59')
+    pd.testing.assert_frame_equal(df, month.loc['2024-02-10', ['open', 'high', 'low', 'close']],
+                                  check_freq=False, check_names=False)
+
+
+def test_read_projects_ohlc_by_default(store):
+    assert list(store.read('BTCUSD', 'M1', '2024-02-01', '2024-02-02').columns) == ['open', 'high', 'low', 'close']
+    assert 'volume' in store.read('BTCUSD', 'M1', '2024-02-01', '2024-02-02', columns=['close', 'volume'])
+
+
+def test_read_week_touches_only_needed_partitions(store, minutes):
+    start, end = '2024-02-05', '2024-02-11 23:59'
+    assert store.partitions('BTCUSD', 'M1', start, end) == [store.partition_path('BTCUSD', 'M1', '2024-02')]
+    df = store.read('BTCUSD', 'M1', start, end)
+    expected = minutes.loc[start:end, ['open', 'high', 'low', 'close']]
+    pd.testing.assert_frame_equal(df, expected, check_freq=False, check_names=False)
+
+
+def test_read_across_months(store, minutes):
+    df = store.read('BTCUSD', 'M1', '2024-01-30 12:00', '2024-03-01 00:10')
+    expected = minutes.loc['2024-01-30 12:00':'2024-03-01 00:10', ['open', 'high', 'low', 'close']]
+    assert len(store.partitions('BTCUSD', 'M1', '2024-01-30 12:00', '2024-03-01 00:10')) == 3
+    pd.testing.assert_frame_equal(df, expected, check_freq=False, check_names=False)
+
+
+def test_write_merges_existing_month(store, minutes):
+    patch = minutes.loc['2024-02-10 00:00':'2024-02-10 00:04'].copy()
+    patch['close'] = -1.0
+    store.write('BTCUSD', 'M1', patch)
+    df = store.read('BTCUSD', 'M1', '2024-02-09 23:58', '2024-02-10 00:06')
+    assert len(df) == 9
+    assert (df['close'].to_numpy() == -1.0).sum() == 5
+
+
+def test_read_missing_series_is_empty(store):
+    df = store.read('XAUUSD', 'M1', '2024-02-01', '2024-02-02')
+    assert df.empty and list(df.columns) == ['open', 'high', 'low', 'close']
+
+
+def test_normalize_time_column_and_naive_tz():
+    raw = pd.DataFrame({'Time': ['2024-01-01 00:01', '2024-01-01 00:00', '2024-01-01 00:01'],
+                        'Open': [1, 2, 3], 'High': 1, 'Low': 1, 'Close': 1})
+    df = normalize_ohlc(raw)
+    assert str(df.index.tz) == 'UTC'
+    assert df.index.is_monotonic_increasing and not df.index.has_duplicates
+    assert df['open'].tolist() == [2, 3]
+
+
+def test_get_data_from_store_directory(store, minutes):
+    df = get_data(str(store.root), 'BTCUSD', 'M1', pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-01 01:00'))
+    assert len(df) == 61
+    assert df.index[0] == pd.Timestamp('2024-02-01', tz='UTC')
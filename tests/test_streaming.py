@@ -0,0 +1,108 @@
+import pytest
+
+from core import patterns
+from core.config import DETECTORS_BY_LEVEL
+from core.streaming import (
+    STREAMING_DETECTORS,
+    StreamingLiquiditySweep,
+    StreamingPipeline,
+    make_streaming,
+    replay,
+    verify_replay,
+)
+
+
+@pytest.fixture(params=[0, 1])
+def bars(request, make_bars):
+    return make_bars(request.param, 120, '37min')
+
+
+def test_every_level_detector_has_streaming_counterpart():
+    names = {d.__name__ for dets in DETECTORS_BY_LEVEL.values() for d in dets}
+    assert names <= set(STREAMING_DETECTORS)
+
+
+@pytest.mark.parametrize('name,params', [
+    ('detect_bos', {}),
+    ('detect_bos', {'lookback': 5}),
+    ('detect_choch', {}),
+    ('detect_fvg', {}),
+    ('detect_order_blocks', {}),
+    ('detect_order_blocks', {'lookback': 30, 'min_range': 0.5}),
+    ('detect_liquidity_zones', {}),
+    ('detect_liquidity_zones', {'tol': 0.05}),
+    ('detect_liquidity_zones', {'tol': 0.3}),
+    ('detect_liquidity_zones', {'tol': 0.3, 'min_touches': 3}),
+    ('compute_equilibrium_zone', {}),
+    ('detect_killzones', {}),
+    ('detect_mss', {}),
+    ('detect_breaker_blocks', {}),
+    ('detect_confluence_zones', {}),
+    ('detect_confluence_zones', {'tolerance': 0.1}),
+    ('detect_confluence_zones', {'tolerance': 0.3}),
+    ('detect_mitigation_blocks', {}),
+    ('detect_liquidity_voids', {}),
+    ('detect_stop_hunts', {'wick_ratio': 0.3}),
+    ('detect_multi_fvg', {'min_gaps': 3}),
+    ('detect_order_flow_imbalance', {'factor': 0.6}),
+])
+def test_replay_matches_batch_on_every_prefix(bars, name, params):
+    assert verify_replay(bars, name, **params)
+
+
+def test_replay_sweep_and_inducement_with_fixed_zones(bars):
+    zones = list(patterns.detect_liquidity_zones(bars))
+    assert verify_replay(bars, 'detect_liquidity_sweep', zones=zones)
+    assert verify_replay(bars, 'detect_inducement', zones=zones)
+
+
+def test_causal_sweep_without_zones_has_no_batch_equivalent(bars):
+    with pytest.raises(ValueError):
+        verify_replay(bars, 'detect_liquidity_sweep')
+    assert isinstance(replay(bars, StreamingLiquiditySweep()), list)
+
+
+def test_update_returns_only_new_events(bars):
+    stream = make_streaming(patterns.detect_fvg)
+    events = replay(bars, stream)
+    assert events == patterns.detect_fvg(bars)
+    assert len({e['index'] for e in events}) == len(events)
+
+
+def test_liquidity_zones_capacity_bounds_state(bars):
+    stream = make_streaming('detect_liquidity_zones', capacity=16)
+    replay(bars, stream)
+    assert len(stream.clusters.anchors) <= 16
+
+
+def test_liquidity_zones_state_is_bounded_by_default():
+    stream = make_streaming('detect_liquidity_zones')
+    assert stream.capacity is not None
+    # preços sempre novos: sem limite cada candle criaria duas âncoras
+    for i in range(stream.capacity):
+        stream.update((0, 1_000 + i, 100 - i * 1e-3, 0))
+    assert len(stream.clusters.anchors) <= stream.capacity
+
+
+def test_confluence_state_is_bounded(bars):
+    stream = make_streaming('detect_confluence_zones', tolerance=0.3, capacity=8)
+    replay(bars, stream)
+    assert len(stream.zone_levels) <= 8
+    assert sum(len(keys) for keys in stream.levels.keys.values()) <= 8 + len(stream.liq.zones)
+
+
+def test_confluence_events_cover_final_selection(bars):
+    stream = make_streaming('detect_confluence_zones', tolerance=0.3)
+    events = replay(bars, stream)
+    assert set(stream.snapshot(events)) <= {e['level'] for e in events}
+    assert stream.snapshot(events) == patterns.detect_confluence_zones(bars, tolerance=0.3)
+
+
+def test_pipeline_routes_bars_to_all_detectors(bars):
+    pipe = StreamingPipeline(DETECTORS_BY_LEVEL['Avançado'])
+    out = {}
+    for ts, row in bars.iterrows():
+        for name, events in pipe.update(row).items():
+            out.setdefault(name, []).extend(events)
+    assert out['detect_liquidity_voids'] == patterns.detect_liquidity_voids(bars)
+    assert out['detect_breaker_blocks'] == patterns.detect_breaker_blocks(bars)
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from core import patterns
+from core.config import DETECTORS_BY_LEVEL
+from backtest.walk_forward import walk_forward_signals
+
+
+@pytest.fixture
+def bars(make_bars):
+    return make_bars(3, 150, '23min')
+
+
+def all_detectors():
+    return [d for dets in DETECTORS_BY_LEVEL.values() for d in dets]
+
+
+def test_table_has_one_row_per_bar(bars):
+    table = walk_forward_signals(bars, all_detectors())
+    assert len(table) == len(bars)
+    assert table.index.equals(bars.index)
+    assert 'compute_equilibrium_zone_mid' in table
+
+
+@pytest.mark.parametrize('name', ['detect_bos', 'detect_choch', 'detect_mss',
+                                  'detect_order_flow_imbalance'])
+def test_boolean_columns_equal_batch_on_prefix(bars, name):
+    col = walk_forward_signals(bars, [name])[name].to_numpy()
+    func = getattr(patterns, name)
+    expected = []
+    for t in range(len(bars)):
+        res = func(bars.iloc[:t + 1])
+        expected.append(res if isinstance(res, bool) else (t in res))
+    assert col.tolist() == expected
+
+
+@pytest.mark.parametrize('name', ['detect_fvg', 'detect_order_blocks', 'detect_liquidity_zones',
+                                  'detect_breaker_blocks', 'detect_mitigation_blocks',
+                                  'detect_liquidity_voids', 'detect_stop_hunts', 'detect_multi_fvg'])
+def test_event_counts_accumulate_to_batch_on_prefix(bars, name):
+    cum = walk_forward_signals(bars, [name])[name].cumsum().to_numpy()
+    func = getattr(patterns, name)
+    # contagens em cada candle usam só o prefixo até ele
+    for t in range(0, len(bars), 7):
+        assert cum[t] == len(func(bars.iloc[:t + 1])), t
+
+
+@pytest.mark.parametrize('name, params', [
+    ('detect_liquidity_zones', {'tol': 0.05}),
+    ('detect_liquidity_zones', {'tol': 0.3}),
+    ('detect_liquidity_zones', {'tol': 0.3, 'min_touches': 3}),
+    ('detect_confluence_zones', {'tolerance': 0.05}),
+    ('detect_confluence_zones', {'tolerance': 0.3}),
+])
+def test_zone_totals_equal_batch_on_every_prefix(bars, name, params):
+    # com tol de vários ticks um high novo pode absorver zonas de lows já vistas
+    cum = walk_forward_signals(bars, [name], {name: params})[name].cumsum().to_numpy()
+    func = getattr(patterns, name)
+    for t in range(len(bars)):
+        assert cum[t] == len(func(bars.iloc[:t + 1], **params)), t
+
+
+def test_causal_sweeps_equal_last_bar_of_prefix_batch(bars):
+    col = walk_forward_signals(bars, ['detect_liquidity_sweep'])['detect_liquidity_sweep'].to_numpy()
+    for t in range(1, len(bars)):
+        sweeps = patterns.detect_liquidity_sweep(bars.iloc[:t + 1])
+        assert col[t] == sum(s['index'] == t for s in sweeps), t
+
+
+def test_equilibrium_and_killzones_have_no_lookahead(bars):
+    table = walk_forward_signals(bars, [patterns.compute_equilibrium_zone, patterns.detect_killzones])
+    for t in (0, 40, len(bars) - 1):
+        eq = patterns.compute_equilibrium_zone(bars.iloc[:t + 1])
+        assert table['compute_equilibrium_zone_low'].iat[t] == eq['discount'][0]
+        assert table['compute_equilibrium_zone_high'].iat[t] == eq['premium'][1]
+    assert table.index[table['detect_killzones']].tolist() == list(patterns.detect_killzones(bars))
+
+
+def test_future_bars_do_not_change_past_rows(bars):
+    full = walk_forward_signals(bars, all_detectors())
+    part = walk_forward_signals(bars.iloc[:90], all_detectors())
+    pd.testing.assert_frame_equal(full.iloc[:90], part, check_dtype=False)
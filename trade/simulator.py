@@ -0,0 +1,359 @@
+# trade/simulator.py
+
+"""
+Simulação vetorizada de trades a partir dos sinais dos detectores.
+
+Cada candidato é (signal, side, entry, stop, target): o candle em que o sinal
+é conhecido, +1 compra / -1 venda e os três preços. simulate() resolve para
+todos os candidatos de uma vez:
+
+  1. entrada: ordem limitada em `entry` tocada até `entry_window` candles
+     após o sinal (cancelada se o alvo vier antes), ou a mercado na abertura
+     do candle seguinte (order='market');
+  2. saída: primeiro toque no stop ou no alvo até `max_bars` candles após a
+     entrada; sem toque, sai no fechamento do último candle da janela.
+
+Os toques são buscas de "primeiro j >= início com high[j] >= nível" (ou
+low[j] <= nível) feitas por TouchIndex, sem loop por candle nem por trade.
+Convenções conservadoras: stop e alvo no mesmo candle contam como stop; numa
+entrada limitada o alvo só vale a partir do candle seguinte ao da entrada;
+um candle que abre além do nível executa na abertura (gap), e um stop no
+próprio candle do fill nunca sai melhor que a entrada.
+
+Os candidatos são simulados de forma independente (sem limite de posições
+simultâneas); o PnL realizado entra na curva de capital no candle de saída.
+"""
+
+from typing import Any, Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.events import BEAR, BULL, LEGACY_FORMATS, event_levels, event_table, is_event_table
+from core.kernels import bos_masks, ohlc_arrays
+
+LONG, SHORT = BULL, BEAR
+
+CANDIDATE_DTYPE = np.dtype([('signal', np.int64), ('side', np.int8), ('entry', np.float64),
+                            ('stop', np.float64), ('target', np.float64)])
+
+# candles entre o 'index' do evento e o candle em que o padrão fica conhecido
+# (mesmas confirmações de backtest.walk_forward: um FVG em i só existe em i+2)
+CONFIRMATION: Dict[str, int] = {
+    'detect_fvg': 2,
+    'detect_order_blocks': 2,
+    'detect_breaker_blocks': 1,
+    'detect_mitigation_blocks': 0,
+    'detect_liquidity_voids': 0,
+}
+
+REASONS = ('target', 'stop', 'timeout', 'end', 'cancelled', 'unfilled', 'invalid')
+TARGET, STOP, TIMEOUT, END, CANCELLED, UNFILLED, INVALID = range(len(REASONS))
+
+QUERY_CHUNK = 1 << 16   # consultas por passada em TouchIndex (limita a memória temporária)
+
+
+class TouchIndex:
+    """
+    Primeiro toque vetorizado sobre uma série: first(start, level, end) devolve,
+    para cada consulta, o primeiro j em [start, end) com values[j] >= level
+    (-1 se não houver; nível NaN nunca é tocado). A série é dividida em blocos de `block` candles e uma
+    sparse table guarda o máximo de cada faixa de 2^k blocos; cada consulta
+    verifica o próprio bloco, pula por saltos binários os blocos que não
+    alcançam o nível e localiza o candle dentro do bloco encontrado, em
+    O(block + log(n / block)) operações vetorizadas. Memória O(n).
+    Para "low <= nível", use TouchIndex(-low) e -nível.
+    """
+
+    def __init__(self, values: np.ndarray, block: int = 32):
+        values = np.asarray(values, dtype=np.float64)
+        self.n = len(values)
+        self.block = block
+        n_blocks = max(-(-self.n // block), 1)
+        padded = np.full(n_blocks * block, -np.inf)
+        padded[:self.n] = values
+        padded[np.isnan(padded)] = -np.inf    # NaN nunca toca
+        self.blocks = padded.reshape(n_blocks, block)
+        # table[k][i] = max dos blocos [i, i + 2^k)
+        self.table = [self.blocks.max(axis=1)]
+        span = 1
+        while span < n_blocks:
+            prev = self.table[-1]
+            self.table.append(np.maximum(prev[:-span], prev[span:]))
+            span *= 2
+
+    def first(self, start: np.ndarray, level: np.ndarray, end: Optional[np.ndarray] = None) -> np.ndarray:
+        start = np.asarray(start, dtype=np.int64)
+        level = np.broadcast_to(np.asarray(level, dtype=np.float64), start.shape)
+        end = np.full(len(start), self.n) if end is None else \
+            np.minimum(np.broadcast_to(np.asarray(end, dtype=np.int64), start.shape), self.n)
+        out = np.empty(len(start), dtype=np.int64)
+        for lo in range(0, len(start), QUERY_CHUNK):
+            part = slice(lo, lo + QUERY_CHUNK)
+            out[part] = self._first(start[part], level[part], end[part])
+        return out
+
+    def _first(self, start: np.ndarray, level: np.ndarray, end: np.ndarray) -> np.ndarray:
+        block = self.block
+        out = np.full(len(start), -1, dtype=np.int64)
+        idx = np.flatnonzero((start >= 0) & (start < end) & ~np.isnan(level))
+        start, level = start[idx], level[idx]
+
+        # 1) dentro do bloco do início
+        first_block = start // block
+        offsets = np.arange(block)
+        hit = (self.blocks[first_block] >= level[:, None]) & (offsets >= (start % block)[:, None])
+        found = hit.any(axis=1)
+        out[idx[found]] = first_block[found] * block + hit[found].argmax(axis=1)
+
+        # 2) primeiro bloco seguinte cujo máximo alcança o nível (saltos binários)
+        rest = ~found
+        idx, level, pos = idx[rest], level[rest], first_block[rest] + 1
+        for k in range(len(self.table) - 1, -1, -1):
+            table = self.table[k]
+            inside = pos < len(table)
+            skip = inside & (table[np.where(inside, pos, 0)] < level) if len(table) else inside
+            pos += skip.astype(np.int64) << k
+
+        # 3) candle dentro do bloco encontrado
+        has = pos < len(self.blocks)
+        idx, level, pos = idx[has], level[has], pos[has]
+        out[idx] = pos * block + (self.blocks[pos] >= level[:, None]).argmax(axis=1)
+        out[out >= end] = -1
+        return out
+
+
+class SimulationResult(NamedTuple):
+    trades: pd.DataFrame     # um candidato por linha (ver simulate)
+    equity: pd.Series        # capital por candle (PnL realizado no candle de saída)
+    drawdown: pd.Series      # equity - máximo anterior (<= 0)
+    stats: Dict[str, Any]
+
+
+def make_candidates(signal, side, entry, stop, target) -> np.ndarray:
+    """Colunas (mesmo comprimento ou escalares) -> array CANDIDATE_DTYPE."""
+    cols = np.broadcast_arrays(np.asarray(signal), np.asarray(side), np.asarray(entry, dtype=float),
+                               np.asarray(stop, dtype=float), np.asarray(target, dtype=float))
+    out = np.empty(cols[0].shape[0] if cols[0].ndim else 1, dtype=CANDIDATE_DTYPE)
+    for name, col in zip(CANDIDATE_DTYPE.names, cols):
+        out[name] = col
+    return out
+
+
+def _as_event_table(events, detector: Optional[str]) -> np.ndarray:
+    if is_event_table(events):
+        return events
+    if detector not in LEGACY_FORMATS:
+        raise ValueError(f"Formato de eventos desconhecido para {detector!r}; use as_table=True")
+    key, _, bear, _ = LEGACY_FORMATS[detector]
+    n = len(events)
+    index = np.fromiter((ev['index'] for ev in events), dtype=np.int64, count=n)
+    is_bear = np.fromiter((ev[key] == bear for ev in events), dtype=bool, count=n)
+    edges = np.asarray(event_levels(events), dtype=float).reshape(n, 2)
+    return event_table(index, is_bear, edges[:, 0], edges[:, 1])
+
+
+def zone_candidates(events, detector: Optional[str] = None, delay: Optional[int] = None,
+                    rr: float = 2.0, entry: str = 'edge', stop_buffer: float = 0.0) -> np.ndarray:
+    """
+    Zonas (OB, FVG, breakers, mitigation, voids) -> ordens limitadas de retorno à zona.
+    - events: tabela de core.events (as_table=True) ou a lista de dicts de `detector`
+    - delay: candles até a confirmação (padrão: CONFIRMATION[detector])
+    - entry: 'edge' (limite da zona mais próximo do preço: upper na compra,
+      lower na venda) ou 'mid'
+    - stop além do outro limite da zona (± stop_buffer); alvo a rr vezes o risco
+    Zona bull -> compra, zona bear -> venda.
+    """
+    table = _as_event_table(events, detector)
+    if delay is None:
+        if detector not in CONFIRMATION:
+            raise ValueError("Informe detector (em CONFIRMATION) ou delay")
+        delay = CONFIRMATION[detector]
+    if entry not in ('edge', 'mid'):
+        raise ValueError(f"entry deve ser 'edge' ou 'mid', não {entry!r}")
+    side = table['side']
+    lower, upper = table['lower'], table['upper']
+    is_long = side == LONG
+    if entry == 'mid':
+        price = (lower + upper) / 2
+    else:
+        price = np.where(is_long, upper, lower)
+    stop = np.where(is_long, lower - stop_buffer, upper + stop_buffer)
+    target = price + rr * (price - stop)
+    return make_candidates(table['index'] + delay, side, price, stop, target)
+
+
+def breakout_candidates(df, lookback: int = 2, rr: float = 2.0) -> np.ndarray:
+    """
+    Rompimentos de estrutura (BOS, core.kernels.bos_masks) -> entradas a mercado
+    na direção do rompimento: stop no extremo oposto do candle do rompimento e
+    alvo a rr vezes a distância do fechamento ao stop. Use com order='market'.
+    """
+    a = ohlc_arrays(df)
+    up, down = bos_masks(a, lookback)
+    signal = np.flatnonzero(up | down)
+    is_long = up[signal]
+    entry = a.close[signal].astype(float)
+    stop = np.where(is_long, a.low[signal], a.high[signal]).astype(float)
+    return make_candidates(signal, np.where(is_long, LONG, SHORT), entry, stop, entry + rr * (entry - stop))
+
+
+def bos_direction(df, lookback: int = 2) -> np.ndarray:
+    """Direção do último rompimento de estrutura conhecido em cada candle (+1, -1 ou 0 antes do primeiro)."""
+    up, down = bos_masks(ohlc_arrays(df), lookback)
+    direction = np.where(up, LONG, np.where(down, SHORT, 0)).astype(np.int8)
+    last = np.maximum.accumulate(np.where(direction != 0, np.arange(len(direction)), 0))
+    return direction[last] if len(direction) else direction
+
+
+def with_structure(candidates: np.ndarray, direction: np.ndarray) -> np.ndarray:
+    """Só os candidatos a favor da direção de estrutura (bos_direction) no candle do sinal."""
+    signal = candidates['signal']
+    inside = (signal >= 0) & (signal < len(direction))
+    keep = inside & (direction[np.clip(signal, 0, max(len(direction) - 1, 0))] == candidates['side'])
+    return candidates[keep]
+
+
+def _level_price(level: np.ndarray, bar_open: np.ndarray, rising: np.ndarray, gap: np.ndarray) -> np.ndarray:
+    """Preço executado ao tocar `level`: a abertura, se o candle já abriu além do nível (gap)."""
+    beyond = np.where(rising, np.maximum(level, bar_open), np.minimum(level, bar_open))
+    return np.where(gap, beyond, level)
+
+
+def simulate(df, candidates: np.ndarray, order: str = 'limit', entry_window: int = 20,
+             max_bars: Optional[int] = 500, cancel_at_target: bool = True, size=1.0,
+             fee: float = 0.0, initial_capital: float = 0.0, block: int = 32) -> SimulationResult:
+    """
+    Simula todos os candidatos (array CANDIDATE_DTYPE) sobre os candles de df.
+    - order: 'limit' (entra em `entry`) ou 'market' (abertura do candle após o sinal)
+    - entry_window: candles após o sinal em que a ordem limitada fica ativa
+    - max_bars: candles após a entrada até sair no fechamento (None: até o fim dos dados)
+    - cancel_at_target: cancela a ordem limitada se o alvo for tocado antes da entrada
+    - size: quantidade por trade (escalar ou por candidato); fee: custo fixo por trade
+    trades tem uma linha por candidato: signal, side, entry, stop, target, reason
+    (REASONS), entry_bar, entry_price, exit_bar, exit_price, bars, pnl, r e,
+    com índice datetime, entry_time/exit_time. Candidatos sem entrada ficam com
+    entry_bar = exit_bar = -1 e pnl/r NaN.
+    """
+    if order not in ('limit', 'market'):
+        raise ValueError(f"order deve ser 'limit' ou 'market', não {order!r}")
+    a = ohlc_arrays(df)
+    n = len(a)
+    bar_open = a.open.astype(float)
+    close = a.close.astype(float)
+    signal = candidates['signal'].astype(np.int64)
+    side = candidates['side'].astype(np.int8)
+    entry, stop, target = (candidates[name].astype(float) for name in ('entry', 'stop', 'target'))
+    m = len(candidates)
+    is_long = side == LONG
+    highs = TouchIndex(a.high, block)
+    neg_lows = TouchIndex(-np.asarray(a.low, dtype=float), block)
+
+    def touch(rows, rising, start, level, end):
+        """Primeiro candle em [start, end) que alcança level (rising: high >=, senão low <=)."""
+        out = np.full(len(rows), -1, dtype=np.int64)
+        up = rising[rows]
+        out[up] = highs.first(start[up], level[rows][up], end[up])
+        out[~up] = neg_lows.first(start[~up], -level[rows][~up], end[~up])
+        return out
+
+    reason = np.full(m, INVALID, dtype=np.int8)
+    valid = ((signal >= 0) & (signal < n) & ((side == LONG) | (side == SHORT))
+             & np.isfinite(stop) & np.isfinite(target) & (side * (target - stop) > 0))
+    if order == 'limit':
+        valid &= np.isfinite(entry) & (side * (entry - stop) > 0) & (side * (target - entry) > 0)
+
+    # entradas
+    entry_bar = np.full(m, -1, dtype=np.int64)
+    entry_price = np.full(m, np.nan)
+    rows = np.flatnonzero(valid)
+    after = signal[rows] + 1
+    if order == 'market':
+        fill = np.where(after < n, after, -1)
+        filled = fill >= 0
+        entry_price[rows[filled]] = bar_open[fill[filled]]
+    else:
+        window_end = np.minimum(after + entry_window, n)
+        fill = touch(rows, ~is_long, after, entry, window_end)
+        if cancel_at_target:
+            reached = touch(rows, is_long, after, target, window_end)
+            cancelled = (reached >= 0) & ((fill < 0) | (reached < fill))
+            reason[rows[cancelled]] = CANCELLED
+            fill[cancelled] = -1
+        filled = fill >= 0
+        r, f = rows[filled], fill[filled]
+        entry_price[r] = _level_price(entry[r], bar_open[f], ~is_long[r], np.ones(len(r), dtype=bool))
+    entry_bar[rows] = fill
+    reason[rows[(fill < 0) & (reason[rows] != CANCELLED)]] = UNFILLED
+
+    # saídas
+    rows = np.flatnonzero(entry_bar >= 0)
+    f = entry_bar[rows]
+    horizon = np.full(len(f), n - 1) if max_bars is None else f + max_bars
+    last = np.minimum(horizon, n - 1)
+    # sem toque: 'timeout' se a janela de max_bars coube nos dados, senão 'end'
+    timed_out = np.zeros(len(f), dtype=bool) if max_bars is None else horizon <= n - 1
+    stop_bar = touch(rows, ~is_long, f, stop, last + 1)
+    target_bar = touch(rows, is_long, f + (order == 'limit'), target, last + 1)
+    stopped = (stop_bar >= 0) & ((target_bar < 0) | (stop_bar <= target_bar))
+    hit = ~stopped & (target_bar >= 0)
+    exit_bar = np.where(stopped, stop_bar, np.where(hit, target_bar, last))
+    gap = (exit_bar > f) | (order == 'market')
+    r_long = is_long[rows]
+    stop_price = _level_price(stop[rows], bar_open[exit_bar], ~r_long, gap)
+    # stop no candle do fill: se a entrada já saiu além do stop, o gap vale para a saída também
+    fill_px = entry_price[rows]
+    stop_price = np.where(gap, stop_price,
+                          np.where(r_long, np.minimum(stop_price, fill_px), np.maximum(stop_price, fill_px)))
+    exit_price = np.where(
+        stopped, stop_price,
+        np.where(hit, _level_price(target[rows], bar_open[exit_bar], r_long, gap), close[exit_bar]))
+    reason[rows] = np.where(stopped, STOP, np.where(hit, TARGET, np.where(timed_out, TIMEOUT, END)))
+
+    exits = np.full(m, -1, dtype=np.int64)
+    exits[rows] = exit_bar
+    exit_px = np.full(m, np.nan)
+    exit_px[rows] = exit_price
+    size = np.broadcast_to(np.asarray(size, dtype=float), (m,))
+    move = side * (exit_px - entry_price)
+    risk = side * (entry_price - stop)
+    pnl = move * size - fee
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_multiple = np.where(risk > 0, move / risk, np.nan)
+
+    trades = pd.DataFrame({
+        'signal': signal, 'side': side, 'entry': entry, 'stop': stop, 'target': target,
+        'reason': pd.Categorical.from_codes(reason, REASONS),
+        'entry_bar': entry_bar, 'entry_price': entry_price, 'exit_bar': exits, 'exit_price': exit_px,
+        'bars': np.where(exits >= 0, exits - entry_bar, -1), 'pnl': pnl, 'r': r_multiple,
+    })
+    index = df.index if isinstance(df, pd.DataFrame) else pd.RangeIndex(n)
+    if isinstance(index, pd.DatetimeIndex):
+        for col, bars in (('entry_time', entry_bar), ('exit_time', exits)):
+            trades[col] = index[np.clip(bars, 0, max(n - 1, 0))].where(bars >= 0) if n else pd.NaT
+
+    closed = exits >= 0
+    realized = np.bincount(exits[closed], weights=pnl[closed], minlength=n)[:n]
+    equity = pd.Series(initial_capital + np.cumsum(realized), index=index, name='equity')
+    drawdown = (equity - equity.cummax()).rename('drawdown')
+    return SimulationResult(trades, equity, drawdown, trade_stats(trades, drawdown))
+
+
+def trade_stats(trades: pd.DataFrame, drawdown: Optional[pd.Series] = None) -> Dict[str, Any]:
+    """Resumo dos trades executados: win rate, profit factor, expectancy, R médio e drawdown máximo."""
+    done = trades[trades['exit_bar'] >= 0]
+    pnl = done['pnl'].to_numpy()
+    gross_profit = float(pnl[pnl > 0].sum())
+    gross_loss = float(-pnl[pnl < 0].sum())
+    count = len(done)
+    return {
+        'candidates': len(trades),
+        'trades': count,
+        'win_rate': float((pnl > 0).mean()) if count else 0.0,
+        'profit_factor': gross_profit / gross_loss if gross_loss else (np.inf if gross_profit else 0.0),
+        'expectancy': float(pnl.mean()) if count else 0.0,
+        'avg_r': float(np.nanmean(done['r'])) if count and done['r'].notna().any() else 0.0,
+        'total_pnl': float(pnl.sum()),
+        'max_drawdown': float(drawdown.min()) if drawdown is not None and len(drawdown) else 0.0,
+        'reasons': trades['reason'].value_counts().reindex(REASONS, fill_value=0).to_dict(),
+    }